@@ -0,0 +1,8 @@
+"""
+Benchmarks for quantumpy, run against a local stand-in for the Quantum API
+(benchmarks.server), so they need no account and no network:
+
+    python -m benchmarks.run [--scenario pagination] [--latency 0.02] [--compare results/previous.json]
+
+bench_decode.py measures response decoding on its own.
+"""
@@ -0,0 +1,116 @@
+"""
+Compare response decoding modes on representative Quantum API payloads.
+
+    python benchmarks/bench_decode.py [--repeat 20]
+
+For each payload it reports the time to decode one body and the memory
+held by the decoded result with:
+
+    legacy   the former behavior: decode to str, stdlib json with Decimal
+    decimal  decoder='decimal'
+    fast     decoder='fast' (orjson when installed)
+    stdlib   decoder='fast' forced onto the stdlib/simplejson path
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from quantumpy import decoding
+
+def posts_page(posts=100):
+    rnd = random.Random(1)
+    return {
+        'data': [
+            {
+                'id':         '{}_{}'.format(1000 + i % 7, 10 ** 12 + i),
+                'profile':    {'id': str(1000 + i % 7), 'name': 'Profile {}'.format(i % 7)},
+                'type':       rnd.choice(['photo', 'video', 'link', 'status']),
+                'message':    'Lorem ipsum dolor sit amet ' * rnd.randint(1, 12),
+                'created':    '2017-03-{:02d}T{:02d}:15:00Z'.format(1 + i % 28, i % 24),
+                'link':       'https://www.facebook.com/{}/posts/{}'.format(1000 + i % 7, i),
+                'reactions':  {key: rnd.randint(0, 5000) for key in ('like', 'love', 'haha', 'wow', 'sad', 'angry')},
+                'comments':   rnd.randint(0, 800),
+                'shares':     rnd.randint(0, 300),
+                'engagement': round(rnd.random() * 10, 6),
+                'reach':      round(rnd.random() * 1e5, 2)
+            }
+            for i in range(posts)
+        ],
+        'paging': {'next': 'https://quantum.socialmetrix.com/api/v1/accounts/1/projects/1/facebook/profiles/1/posts?cursor=abc'}
+    }
+
+def date_series(ids=50, days=365):
+    rnd   = random.Random(2)
+    start = date(2016, 1, 1)
+    return [
+        {
+            'id':     str(1000 + i),
+            'series': [
+                {
+                    'date':       (start + timedelta(days=d)).isoformat(),
+                    'fans':       rnd.randint(10 ** 4, 10 ** 6),
+                    'growth':     round(rnd.uniform(-1, 1), 6),
+                    'engagement': round(rnd.random(), 6)
+                }
+                for d in range(days)
+            ]
+        }
+        for i in range(ids)
+    ]
+
+def legacy(data):
+    return json.loads(data.decode('utf-8'), parse_float=Decimal)
+
+def stdlib(data):
+    orjson, decoding.orjson = decoding.orjson, None
+    try:
+        return decoding.loads_fast(data)
+    finally:
+        decoding.orjson = orjson
+
+def retained(function, data):
+    tracemalloc.start()
+    result = function(data)
+    size   = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = [
+        ('posts page (100 posts)',       json.dumps(posts_page()).encode('utf-8')),
+        ('date series (50 ids x 365 d)', json.dumps(date_series()).encode('utf-8'))
+    ]
+    modes = [
+        ('legacy',  legacy),
+        ('decimal', decoding.loads_decimal),
+        ('fast',    decoding.loads_fast),
+        ('stdlib',  stdlib)
+    ]
+
+    print('JSON backend: {}'.format('orjson' if decoding.orjson is not None else decoding.json.__name__))
+    for name, data in payloads:
+        print('\n{} - {:.0f} KB'.format(name, len(data) / 1024.0))
+        print('{:<10}{:>12}{:>12}{:>12}'.format('mode', 'ms/decode', 'speedup', 'MB held'))
+
+        baseline = None
+        for mode, function in modes:
+            seconds  = min(timeit.repeat(lambda: function(data), number=1, repeat=args.repeat))
+            baseline = baseline or seconds
+            print('{:<10}{:>12.2f}{:>11.1f}x{:>12.2f}'.format(mode, seconds * 1000, baseline / seconds, retained(function, data) / 1048576.0))
+
+if __name__ == '__main__':
+    main()
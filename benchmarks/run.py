@@ -0,0 +1,365 @@
+"""
+Scripted client scenarios against the mock Quantum API.
+
+    python -m benchmarks.run [--scenario NAME ...] [--latency 0.02] [--repeat 3]
+                             [--output FILE] [--compare FILE]
+
+The mock server runs in a child process so that its CPU time and memory
+are not counted against the client. For each scenario it reports:
+
+    req/s     HTTP requests completed per second of wall time
+    p50, p99  latency of those requests in milliseconds
+    cpu       client CPU seconds per run, and as a share of wall time
+    memory    peak Python memory allocated during one run (tracemalloc)
+
+Results are written as JSON to benchmarks/results/ (or --output) and can
+be compared with an earlier run with --compare.
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from datetime import datetime
+
+import requests
+
+from benchmarks.server import MockServer
+from quantumpy import QuantumAPI, RetryPolicy, Exporter, ExportJob, NDJSONWriter, ShardedExporter, Warehouse
+
+PROJECT = 1
+PROFILE = '1001'
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+IDS     = [str(1000 + i) for i in range(20)]
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# (name, higher is better) for --compare
+COMPARED = [
+    ('requests_per_second', True),
+    ('latency_p50',         False),
+    ('latency_p99',         False),
+    ('cpu_seconds',         False),
+    ('peak_memory_mb',      False)
+]
+
+def summary(api):
+    api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, IDS)
+
+def single_call(api):
+    for _ in range(100):
+        summary(api)
+
+def pagination(api):
+    for page in api.get_facebook_profiles_posts(PROJECT, PROFILE, SINCE, UNTIL, [PROFILE], page=True):
+        pass
+
+def pagination_prefetch(api):
+    for page in api.get_facebook_profiles_posts(PROJECT, PROFILE, SINCE, UNTIL, [PROFILE], page=True, prefetch=3):
+        pass
+
+def streaming(api):
+    for post in api.get_facebook_profiles_posts(PROJECT, PROFILE, SINCE, UNTIL, [PROFILE], stream=True, records=True):
+        pass
+
+def long_series(api):
+    for _ in range(5):
+        api.get_facebook_fans_count_by_date(PROJECT, '2013-01-01', '2017-12-31', IDS)
+
+def chunked_series(api):
+    for _ in range(5):
+        api.get_facebook_fans_count_by_date(PROJECT, '2013-01-01', '2017-12-31', IDS, chunk='year')
+
+def repeated_series(api):
+    for _ in range(20):
+        api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-12-31', IDS)
+
+def warehouse(api):
+    directory = tempfile.mkdtemp()
+    try:
+        store = Warehouse(os.path.join(directory, 'metrics.db'))
+        for _ in range(20):
+            store.load(api, 'get_facebook_fans_count_by_date', PROJECT, '2017-01-01', '2017-12-31', IDS)
+            store.query('get_facebook_fans_count_by_date', PROJECT, '2017-03-01', '2017-08-31', IDS[:5], bucket='month', aggregate='last')
+    finally:
+        shutil.rmtree(directory)
+
+def retries(api):
+    for _ in range(100):
+        api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, IDS, retry=10)
+
+def fanout(api):
+    ids = [str(10 ** 6 + i) for i in range(5000)]
+    for _ in range(3):
+        api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, ids)
+
+def batch(api):
+    calls = [('get_facebook_profiles_stat_summary', (PROJECT, SINCE, UNTIL, [id])) for id in IDS * 5]
+    api.batch(calls, max_workers=16)
+
+def sequential_join(api):
+    ids = [post['id'] for page in api.get_facebook_profiles_posts(PROJECT, PROFILE, SINCE, UNTIL, [PROFILE], page=True) for post in page['data']]
+    for i in range(0, len(ids), 100):
+        api.get_facebook_profiles_post_interactions(PROJECT, SINCE, UNTIL, ids[i:i + 100])
+
+def pipelined_join(api):
+    for post in api.posts_with_interactions('get_facebook_profiles_posts', PROJECT, PROFILE, SINCE, UNTIL, [PROFILE]):
+        pass
+
+def overview(api):
+    for _ in range(20):
+        api.get_project_overview(PROJECT, SINCE, UNTIL)
+
+def export(api):
+    directory = tempfile.mkdtemp()
+    try:
+        jobs = [ExportJob('get_facebook_profiles_posts', (PROJECT, id, SINCE, UNTIL, [id])) for id in IDS]
+        Exporter(api, NDJSONWriter(directory, max_records=10000), concurrency=8).run(jobs)
+    finally:
+        shutil.rmtree(directory)
+
+def sharded_export(processes):
+    def export(api):
+        directory = tempfile.mkdtemp()
+        try:
+            jobs     = [ExportJob('get_facebook_profiles_posts', (PROJECT, id, SINCE, UNTIL, [id])) for id in IDS]
+            factory  = functools.partial(QuantumAPI, 'benchmark', baseurl=api.baseurl)
+            exporter = ShardedExporter(factory, os.path.join(directory, 'queue.db'), directory, processes=processes)
+            exporter.run(jobs)
+        finally:
+            shutil.rmtree(directory)
+    return export
+
+def herd(api):
+    threads = [threading.Thread(target=summary, args=(api,)) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+class Scenario(object):
+    """
+    A workload run with a fresh client, `settings` for the mock server and `options` for QuantumAPI
+    """
+    def __init__(self, name, function, description, settings=None, options=None):
+        self.name        = name
+        self.function    = function
+        self.description = description
+        self.settings    = settings or {}
+        self.options     = options or {}
+
+    def client(self, url, hooks):
+        options = dict(self.options)
+        if 'retry_policy' in options:
+            options['retry_policy'] = options['retry_policy']()
+        return QuantumAPI('benchmark', baseurl=url, hooks=hooks, **options)
+
+SCENARIOS = [
+    Scenario('single_call', single_call, '100 sequential summary calls for 20 ids'),
+    Scenario('pagination', pagination, '20 pages of 200 posts', {'pages': 20, 'page_size': 200}),
+    Scenario('pagination_prefetch', pagination_prefetch, '20 pages of 200 posts, prefetch=3', {'pages': 20, 'page_size': 200}),
+    Scenario('streaming', streaming, '20 pages of 200 posts as streamed Post records', {'pages': 20, 'page_size': 200}),
+    Scenario('long_series', long_series, '5 by-date calls, 20 ids x 5 years'),
+    Scenario('chunked_series', chunked_series, '5 by-date calls, 20 ids x 5 years in yearly chunks'),
+    Scenario(
+        'retries', retries, '100 summary calls, 20% HTTP 500 and 5% HTTP 429',
+        {'error_rate': 0.2, 'throttle_rate': 0.05},
+        {'retry_policy': lambda: RetryPolicy(backoff=0.005, breaker=None)}
+    ),
+    Scenario('fanout', fanout, '3 summary calls for 5000 ids in batches of 100', options={'ids_batch_size': 100, 'max_workers': 8}),
+    Scenario('batch', batch, '100 single-id summary calls through batch(), 16 workers'),
+    Scenario('sequential_join', sequential_join, '10 pages of 100 posts, then their interactions 100 ids at a time'),
+    Scenario('pipelined_join', pipelined_join, 'sequential_join through posts_with_interactions()'),
+    Scenario('overview', overview, '20 project overviews, 4 network summaries each'),
+    Scenario('export', export, '20 listings of 10 pages x 100 posts streamed to NDJSON, 8 fetchers'),
+    Scenario('sharded_export', sharded_export(1), 'export at 50ms latency, in 1 worker process', {'latency': 0.05}),
+    Scenario('sharded_export_4', sharded_export(4), 'export at 50ms latency, sharded over 4 worker processes', {'latency': 0.05}),
+    Scenario('herd', herd, '50 threads making the same summary call at once'),
+    Scenario('repeated_series', repeated_series, 'the same by-date call for 20 ids x 1 year, 20 times'),
+    Scenario('warehouse', warehouse, 'repeated_series loaded into a Warehouse once and queried by month'),
+    Scenario('revalidate', repeated_series, 'repeated_series, revalidated with ETags', {'etags': True}, {'validators': True}),
+    Scenario('revalidate_digest', repeated_series, 'repeated_series, no ETags: unchanged bodies skip decoding', options={'validators': True})
+]
+
+DEFAULTS = {'jitter': 0.0, 'error_rate': 0.0, 'throttle_rate': 0.0, 'page_size': 100, 'pages': 10, 'etags': False}
+
+class RemoteServer(object):
+    """
+    MockServer running in a child process, configured over its /_mock routes
+    """
+    def __init__(self):
+        self.process = None
+        self.session = requests.Session()
+        self.address = None
+        self.url     = None
+
+    def __enter__(self):
+        queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(queue,))
+        self.process.daemon = True
+        self.process.start()
+        self.address = queue.get(timeout=30)
+        self.url     = self.address + '/api'
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+    def configure(self, **settings):
+        return self._call('POST', '/_mock/settings', settings)
+
+    def reset(self):
+        return self._call('POST', '/_mock/reset')
+
+    def stats(self):
+        return self._call('GET', '/_mock/stats')
+
+    def _call(self, method, path, data=None):
+        response = self.session.request(method, self.address + path, json=data)
+        response.raise_for_status()
+        return response.json()
+
+def _serve(queue):
+    server = MockServer()
+    queue.put(server.address)
+    server.server.serve_forever()
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of sorted `values`
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(q / 100.0 * len(values) + 0.5)) - 1))]
+
+def median(values):
+    return percentile(sorted(values), 50)
+
+def measure(scenario, server, latency, repeat=3, memory=True):
+    # A scenario's own settings, latency included, take precedence
+    settings = dict(DEFAULTS, latency=latency)
+    settings.update(scenario.settings)
+    server.configure(**settings)
+
+    events, seconds, cpu, served = [], [], [], []
+    for _ in range(repeat):
+        run = []
+        api = scenario.client(server.url, [run.append])
+        api.account_id  # log in outside the measurement
+        server.reset()
+
+        started, started_cpu = time.perf_counter(), time.process_time()
+        scenario.function(api)
+        seconds.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - started_cpu)
+
+        served.append(server.stats())
+        events.extend(run)
+        api.session.close()
+
+    peak = None
+    if memory:
+        api = scenario.client(server.url, [])
+        api.account_id
+        tracemalloc.start()
+        scenario.function(api)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        api.session.close()
+
+    latencies = sorted(event.total for event in events if event.total is not None)
+    requests  = len(events) / float(repeat)
+    if not events:
+        # The requests were made by other processes: count those the server saw
+        requests = median([stats['requests'] for stats in served])
+    wall      = median(seconds)
+
+    return {
+        'description':         scenario.description,
+        'settings':            settings,
+        'runs':                repeat,
+        'seconds':             wall,
+        'requests':            requests,
+        'requests_per_second': requests / wall,
+        'latency_p50':         percentile(latencies, 50) * 1000 if latencies else None,
+        'latency_p99':         percentile(latencies, 99) * 1000 if latencies else None,
+        'cpu_seconds':         median(cpu),
+        'cpu_utilization':     median(cpu) / wall,
+        'peak_memory_mb':      peak / 1048576.0 if peak is not None else None,
+        'server_errors':       median([stats['errors'] + stats['throttled'] for stats in served]),
+        'response_bytes':      median([stats['bytes'] for stats in served])
+    }
+
+def report(name, result):
+    memory  = '{:8.2f}'.format(result['peak_memory_mb']) if result['peak_memory_mb'] is not None else '{:>8}'.format('-')
+    latency = ''.join('{:9.1f}'.format(value) if value is not None else '{:>9}'.format('-') for value in (result['latency_p50'], result['latency_p99']))
+    print('{:<22}{:>8.1f}{}{:>8.2f}{:>6.0f}%{}{:>8.0f}'.format(
+        name, result['requests_per_second'], latency,
+        result['cpu_seconds'], result['cpu_utilization'] * 100, memory, result['requests']
+    ))
+
+def compare(previous, current):
+    print('\nCompared with {}'.format(previous.get('created', 'previous run')))
+    print('{:<22}{:<22}{:>12}{:>12}{:>9}'.format('scenario', 'metric', 'before', 'after', 'change'))
+    for name, result in current['scenarios'].items():
+        before = previous['scenarios'].get(name)
+        if before is None:
+            continue
+        for metric, higher in COMPARED:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher else change < 0
+            marker = '' if abs(change) < 10 else ('  better' if better else '  WORSE')
+            print('{:<22}{:<22}{:>12.2f}{:>12.2f}{:>+8.1f}%{}'.format(name, metric, old, new, change, marker))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1].strip())
+    parser.add_argument('--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS], help='run only these scenarios')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds the mock server waits before each response')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run of each scenario')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    results   = {
+        'created':   datetime.now().isoformat(),
+        'python':    platform.python_version(),
+        'platform':  platform.platform(),
+        'latency':   args.latency,
+        'scenarios': {}
+    }
+
+    print('{:<22}{:>8}{:>9}{:>9}{:>8}{:>7}{:>8}{:>8}'.format('scenario', 'req/s', 'p50 ms', 'p99 ms', 'cpu s', 'cpu', 'mem MB', 'reqs'))
+    with RemoteServer() as server:
+        for scenario in scenarios:
+            result = measure(scenario, server, args.latency, args.repeat, not args.no_memory)
+            results['scenarios'][scenario.name] = result
+            report(scenario.name, result)
+
+    output = args.output or os.path.join(RESULTS, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    if not os.path.isdir(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)))
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print('\nResults saved to {}'.format(output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,32 @@
+import sys
+
 from quantumpy.exceptions import (
     QuantumPythonError,
     QuantumError,
     AuthenticationError,
     HandlerNotFoundError,
     InternalServerError,
-    HTTPError
+    HTTPError,
+    RateLimitError,
+    ServiceUnavailableError,
+    CircuitOpenError
 )
+from quantumpy.auth import FileTokenCache
+from quantumpy.batch import BatchCall, BatchResult, BatchExecutor
+from quantumpy.coalesce import SingleFlight
+from quantumpy.columnar import ColumnarSeries
+from quantumpy.cache import Cache, MemoryCache, SQLiteCache, TieredCache
+from quantumpy.export import Exporter, ExportJob, ExportResult, NDJSONWriter, ParquetWriter
+from quantumpy.metrics import MetricsCollector, RequestEvent
+from quantumpy.overview import ProjectOverview
+from quantumpy.pagination import PageIterator, RecordIterator
+from quantumpy.records import Record, Post, Tweet, Video, RecordPage
+from quantumpy.shard import ShardedExporter, WorkQueue
+from quantumpy.ratelimit import RateLimiter, TokenBucket, SQLiteTokenBucket
+from quantumpy.retry import RetryPolicy, CircuitBreaker
+from quantumpy.sync import SeriesSync
+from quantumpy.validators import ValidatorStore
+from quantumpy.warehouse import Warehouse
 from quantumpy.quantum_api import QuantumAPI
 
 __all__ = [
@@ -15,5 +36,56 @@ __all__ = [
     'HandlerNotFoundError',
     'InternalServerError',
     'HTTPError',
-    'QuantumAPI'
+    'RateLimitError',
+    'ServiceUnavailableError',
+    'CircuitOpenError',
+    'QuantumAPI',
+    'BatchCall',
+    'BatchResult',
+    'BatchExecutor',
+    'ProjectOverview',
+    'PageIterator',
+    'RecordIterator',
+    'Record',
+    'Post',
+    'Tweet',
+    'Video',
+    'RecordPage',
+    'Exporter',
+    'ExportJob',
+    'ExportResult',
+    'NDJSONWriter',
+    'ParquetWriter',
+    'ShardedExporter',
+    'WorkQueue',
+    'MetricsCollector',
+    'RequestEvent',
+    'Cache',
+    'MemoryCache',
+    'SQLiteCache',
+    'TieredCache',
+    'SingleFlight',
+    'ValidatorStore',
+    'SeriesSync',
+    'Warehouse',
+    'ColumnarSeries',
+    'RateLimiter',
+    'TokenBucket',
+    'SQLiteTokenBucket',
+    'FileTokenCache',
+    'RetryPolicy',
+    'CircuitBreaker'
 ]
+
+if sys.version_info >= (3, 7):
+    __all__.append('AsyncQuantumAPI')
+
+    def __getattr__(name):
+        # Imported on first use, aiohttp being slow to import
+        if name == 'AsyncQuantumAPI':
+            from quantumpy.async_api import AsyncQuantumAPI
+            return AsyncQuantumAPI
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+elif sys.version_info >= (3, 6):
+    from quantumpy.async_api import AsyncQuantumAPI
+    __all__.append('AsyncQuantumAPI')
@@ -0,0 +1,674 @@
+import asyncio
+import collections
+import copy
+import inspect
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from quantumpy.batch import BatchCall, BatchResult
+from quantumpy.coalesce import request_key
+from quantumpy.columnar import ColumnarSeries
+from quantumpy.exceptions import *
+from quantumpy.join import attach, check_options, id_batches, interactions_method, page_posts
+from quantumpy.metrics import RequestEvent
+from quantumpy.overview import ProjectOverview, overview_calls, project_profiles
+from quantumpy.quantum_api import QuantumAPI
+from quantumpy.pagination import _DONE
+from quantumpy.records import RecordPage
+from quantumpy.series import date_windows, merge_results
+
+class AsyncQuantumAPI(QuantumAPI):
+    """
+    Asyncio client for the Quantum API. Requires aiohttp.
+
+    Exposes the same get_* methods as QuantumAPI, but each one returns a
+    coroutine, or an async generator of pages when called with page=True.
+    Every call goes through a single aiohttp session, so concurrent calls
+    share one connection pool of up to `limit` connections.
+
+        async with AsyncQuantumAPI(api_secret) as q:
+            projects = await q.get_projects()
+            async for page in q.get_facebook_profiles_posts(..., page=True):
+                ...
+    """
+    def __init__(self, secret, baseurl='https://quantum.socialmetrix.com/api', version='v1', timeout=None, limit=100, cache=None, max_url_length=4000, ids_batch_size=None, token_cache=None, refresh_margin=60, retry_policy=None, rate_limiter=None, decoder='fast', hooks=None, coalesce=True, validators=None, warehouse=None):
+        if aiohttp is None:
+            raise ImportError('AsyncQuantumAPI requires the aiohttp package')
+
+        self._configure(secret, baseurl, version, timeout, cache, max_url_length, ids_batch_size, token_cache, refresh_margin, retry_policy, rate_limiter, decoder, hooks, validators, warehouse)
+        self.session    = None
+        self.limit      = limit
+        self.pool_size  = limit
+        self.coalesce   = bool(coalesce)
+        self._flights   = {}
+        self._auth_lock = None
+
+        # Connections opened and reused by the session, counted by its trace config
+        self._connections = {'opened': 0, 'reused': 0}
+
+    @property
+    def jwt(self):
+        return self._jwt
+
+    @property
+    def account_id(self):
+        return self._account_id
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def open(self):
+        """
+        Create the shared connection pool and authenticate
+        """
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector     = aiohttp.TCPConnector(limit=self.limit),
+                timeout       = self._client_timeout(),
+                trace_configs = [_trace_config(self._connections)]
+            )
+        await self._refresh_token()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def authenticate(self):
+        data = {'method': 'API-SECRET', 'secret': self.secret}
+        try:
+            async with self.session.post(self.url + '/login', json=data, headers={'Content-Type': 'application/json'}) as response:
+                status = response.status
+                body   = await response.json(content_type=None)
+        except Exception as e:
+            raise AuthenticationError(e)
+
+        if status != 200:
+            raise AuthenticationError('Error authenticating ({}): {}'.format(body['code'], body['message']))
+
+        return body['jwt'], body['user']['accountId']
+
+    def batch(self, calls, max_workers=8, ordered=True):
+        """
+        Coroutine version of QuantumAPI.batch, at most `max_workers` calls
+        being awaited at once. With ordered False, returns an async generator
+        of the BatchResults as they complete instead.
+        """
+        calls = [BatchCall.coerce(call) for call in calls]
+        if ordered:
+            return self._batch(calls, max_workers)
+        return self._batch_as_completed(calls, max_workers)
+
+    async def _batch(self, calls, max_workers):
+        semaphore = asyncio.Semaphore(max_workers)
+        return await asyncio.gather(*[self._batch_call(i, call, semaphore) for i, call in enumerate(calls)])
+
+    async def _batch_as_completed(self, calls, max_workers):
+        semaphore = asyncio.Semaphore(max_workers)
+        tasks     = [asyncio.ensure_future(self._batch_call(i, call, semaphore)) for i, call in enumerate(calls)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _batch_call(self, index, call, semaphore):
+        async with semaphore:
+            try:
+                method = getattr(self, call.method) if isinstance(call.method, str) else call.method
+                result = method(*call.args, **call.kwargs)
+                if hasattr(result, '__aiter__'):
+                    result = [item async for item in result]
+                elif inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                return BatchResult(index, call, error=e)
+        return BatchResult(index, call, result=result)
+
+    def pool_stats(self):
+        """
+        QuantumAPI.pool_stats for the session's connector: connections opened
+        and reused so far, requests sent over them, idle connections and the
+        connector's limit
+        """
+        connector = self.session.connector if self.session is not None else None
+        return {
+            'pools':    int(connector is not None),
+            'opened':   self._connections['opened'],
+            'reused':   self._connections['reused'],
+            'requests': self._connections['opened'] + self._connections['reused'],
+            'idle':     sum(len(conns) for conns in getattr(connector, '_conns', {}).values()),
+            'maxsize':  connector.limit if connector is not None else 0
+        }
+
+    def _resize_pool(self, size):
+        # The connector's limit is set when the session is created
+        pass
+
+    async def get_project_overview(self, project_id, since, until, profiles=None, timezone='UTC', retry=3, aliases=None):
+        """
+        Coroutine version of QuantumAPI.get_project_overview, the summaries being awaited together
+        """
+        if not isinstance(profiles, dict):
+            profiles = (profiles or project_profiles)(await self.get_project_by_id(project_id, retry=retry))
+
+        calls   = overview_calls(self, project_id, since, until, profiles, timezone, retry)
+        results = await asyncio.gather(*[
+            getattr(self, method)(*args, **kwargs) for network, method, args, kwargs in calls
+        ], return_exceptions=True)
+        return ProjectOverview.from_results([
+            (call[0], None, result) if isinstance(result, Exception) else (call[0], result, None)
+            for call, result in zip(calls, results)
+        ], aliases)
+
+    async def posts_with_interactions(self, method, project_id, profile_id, since, until, ids, interactions=None, key='interactions', batch_size=100, concurrency=4, timezone='UTC', retry=3, **kwargs):
+        """
+        Async generator version of QuantumAPI.posts_with_interactions, the
+        interactions of each page being requested as tasks
+        """
+        check_options(kwargs)
+        interactions = getattr(self, interactions_method(method, interactions))
+        window       = 2 * concurrency
+        pending      = collections.deque()
+        in_flight    = 0
+
+        pages = getattr(self, method)(project_id, profile_id, since, until, ids, page=True, prefetch=1, timezone=timezone, retry=retry, **kwargs)
+        try:
+            async for page in pages:
+                posts = page_posts(page)
+                tasks = [
+                    asyncio.ensure_future(interactions(project_id, since, until, batch, timezone=timezone, retry=retry))
+                    for batch in id_batches(posts, batch_size)
+                ]
+                pending.append((posts, tasks))
+                in_flight += len(tasks)
+
+                while pending and in_flight > window:
+                    posts, tasks = pending.popleft()
+                    in_flight -= len(tasks)
+                    for post in attach(posts, await asyncio.gather(*tasks), key):
+                        yield post
+
+            while pending:
+                posts, tasks = pending.popleft()
+                for post in attach(posts, await asyncio.gather(*tasks), key):
+                    yield post
+        finally:
+            await pages.aclose()
+            for posts, tasks in pending:
+                for task in tasks:
+                    task.cancel()
+
+    async def _refresh_token(self, force=False):
+        """
+        Async counterpart of QuantumAPI._ensure_token
+        """
+        if not force and not self._token_expiring():
+            return
+
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+
+        async with self._auth_lock:
+            if not force and not self._token_expiring():
+                return
+
+            stale = self._jwt
+            key   = self.token_cache.key(self.url, self.secret) if self.token_cache is not None else None
+
+            if key is not None:
+                cached = self.token_cache.load(key)
+                if cached is not None and cached[0] != stale:
+                    self._set_token(*cached)
+                    if not self._token_expiring():
+                        return
+
+            self._set_token(*(await self.authenticate()))
+            if key is not None:
+                self.token_cache.store(key, self._jwt, self._account_id)
+
+    def _client_timeout(self):
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=self.timeout)
+
+    async def _stored(self, endpoint, args, params, response, columnar=False):
+        return super(AsyncQuantumAPI, self)._stored(endpoint, args, params, await response, columnar)
+
+    def _query(self, method, path, params=None, retry=0, page=False, prefetch=0, cursor=None, chunk=None, columnar=False, stream=False, records=None):
+        if self.jwt is None:
+            raise AuthenticationError('Not authenticated, use "async with" or await open() first')
+
+        if columnar:
+            return self._columnar(self._query(method, path, params, retry, chunk=chunk))
+
+        path, params = self._prepare(path, params)
+
+        if stream:
+            return AsyncRecordIterator(self, method, path, params, retry=retry, cursor=cursor, record_class=records)
+
+        if page:
+            return AsyncPageIterator(self, method, path, params, retry=retry, cursor=cursor, prefetch=prefetch, record_class=records)
+
+        if records is not None:
+            return self._records(self._query(method, path, params, retry), records)
+
+        if chunk is not None:
+            return self._chunked_fetch(method, path, params, retry, chunk)
+
+        batches = self._split_ids(path, params)
+        if len(batches) > 1:
+            return self._gather(method, path, [dict(params, ids=ids) for ids in batches], retry)
+
+        return self._fetch(method, path, params, retry)
+
+    async def _columnar(self, query):
+        return ColumnarSeries.from_result(await query)
+
+    async def _records(self, query, record_class):
+        return RecordPage.from_result(await query, record_class)
+
+    async def _fetch(self, method, path, params, retry):
+        if self.cache is None:
+            return await self._flight(method, path, params, retry)
+
+        key    = self.cache.key(method, self.url + path, params)
+        result = self.cache.get(key)
+        if result is None:
+            ttl    = self.cache.ttl(params)
+            result = await self._flight(method, path, params, retry)
+            self.cache.set(key, result, ttl)
+
+        return result
+
+    async def _flight(self, method, path, params, retry):
+        if not self.coalesce:
+            result, next_url = await self._retry_request(method, path, params, retry)
+            return result
+
+        # Identical calls made while this one is in flight await the same task
+        key    = request_key(method, self.url + path, params)
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._flights[key] = asyncio.ensure_future(self._retry_request(method, path, params, retry))
+            flight.add_done_callback(lambda task: self._flights.pop(key, None))
+
+        # Shielded, so one caller being cancelled does not cancel the others
+        result, next_url = await asyncio.shield(flight)
+        return result if leader else copy.deepcopy(result)
+
+    async def _chunked_fetch(self, method, path, params, retry, chunk):
+        windows = date_windows(params['since'], params['until'], chunk)
+        return await self._gather(method, path, [dict(params, since=since, until=until) for since, until in windows], retry)
+
+    async def _gather(self, method, path, requests, retry):
+        results = await asyncio.gather(*[
+            self._query(method, path, params, retry) for params in requests
+        ])
+        return merge_results(results)
+
+    async def _retry_request(self, method, path, params, retry, page=None):
+        policy  = self.retry_policy
+        attempt = 0
+        relogin = True
+        tries   = 0
+        probe   = False
+
+        try:
+            while True:
+                if not probe:
+                    probe = policy.before_request()
+                try:
+                    await self._refresh_token()
+                    tries += 1
+                    result = await self._request(method, path, params, tries - 1, page)
+                except AuthenticationError:
+                    if not relogin:
+                        raise
+                    relogin = False
+                    await self._refresh_token(force=True)
+                except QuantumPythonError as e:
+                    probe = False
+                    policy.record_failure(e)
+                    delay = policy.delay(attempt, e) if attempt < retry and policy.is_retryable(e) else None
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                else:
+                    probe = False
+                    policy.record_success()
+                    return result
+        finally:
+            if probe:
+                policy.release_probe()
+
+    async def _request(self, method, path, params, attempt=0, page=None):
+        if method != 'GET':
+            raise NotImplementedError(
+                'Quantum API does not yet support {} requests'.format(method)
+            )
+
+        params = self._encode_params(params)
+
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.reserve(self.account_id, path)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        event = RequestEvent(method, path, attempt, page) if self.hooks else None
+        try:
+            result = await self._send(method, path, params, event)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                event.total = time.time() - event.started
+                self._emit(event)
+
+        try:
+            next_url = result['paging']['next']
+        except(KeyError, TypeError):
+            next_url = None
+
+        return result, next_url
+
+    async def _send(self, method, path, params, event=None):
+        key, entry, headers = self._conditional(method, path, params)
+        try:
+            async with self.session.request(
+                method,
+                self.url + path,
+                params            = params,
+                allow_redirects   = True,
+                headers           = headers,
+                trace_request_ctx = event
+            ) as response:
+                headers_at       = time.time()
+                status           = response.status
+                response_headers = response.headers
+                content          = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HTTPError(e)
+
+        if event is None:
+            return self._handle_response(key, entry, status, response_headers, content)
+
+        downloaded     = time.time()
+        event.status   = status
+        event.bytes    = len(content)
+        event.ttfb     = headers_at - event.started
+        event.download = downloaded - headers_at
+        try:
+            return self._handle_response(key, entry, status, response_headers, content)
+        finally:
+            event.decode = time.time() - downloaded
+
+    async def _stream(self, method, path, params, parser, attempt=0, page=None):
+        if method != 'GET':
+            raise NotImplementedError(
+                'Quantum API does not yet support {} requests'.format(method)
+            )
+
+        params = self._encode_params(params)
+
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.reserve(self.account_id, path)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        event = RequestEvent(method, path, attempt, page) if self.hooks else None
+        try:
+            try:
+                async with self.session.request(
+                    method,
+                    self.url + path,
+                    params            = params,
+                    allow_redirects   = True,
+                    headers           = self.headers,
+                    trace_request_ctx = event
+                ) as response:
+                    if event is not None:
+                        event.status = response.status
+                        event.ttfb   = time.time() - event.started
+
+                    if response.status != 200:
+                        records = parser.load(self._parse_page(response.status, response.headers, await response.read()))
+                        for record in records:
+                            yield record
+                    else:
+                        async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+                            if event is not None:
+                                event.bytes += len(chunk)
+                            for record in parser.feed(chunk):
+                                yield record
+                        for record in parser.close():
+                            yield record
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise HTTPError(e)
+
+            self._check(parser.rest)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                event.total    = time.time() - event.started
+                event.download = event.total - event.ttfb if event.ttfb is not None else None
+                self._emit(event)
+
+def _trace_config(connections):
+    """
+    aiohttp tracing that fills in the connect time and connection reuse of
+    RequestEvents, and counts the connections opened and reused
+    """
+    config = aiohttp.TraceConfig()
+
+    async def create_start(session, context, params):
+        context.connect_started = time.time()
+
+    async def create_end(session, context, params):
+        connections['opened'] += 1
+        event = context.trace_request_ctx
+        if event is not None:
+            event.connect = (event.connect or 0.0) + time.time() - context.connect_started
+            event.reused  = False
+
+    async def reuse(session, context, params):
+        connections['reused'] += 1
+        event = context.trace_request_ctx
+        if event is not None and event.reused is None:
+            event.connect = 0.0
+            event.reused  = True
+
+    config.on_connection_create_start.append(create_start)
+    config.on_connection_create_end.append(create_end)
+    config.on_connection_reuseconn.append(reuse)
+    return config
+
+class AsyncPageIterator(object):
+    """
+    Async counterpart of PageIterator: retries failing pages in place,
+    exposes the paging.next `cursor` after each page and can resume from a
+    saved one. With `prefetch`, pages are read ahead by a background task.
+    """
+    def __init__(self, api, method, path, params, retry=0, cursor=None, prefetch=0, record_class=None):
+        self.api          = api
+        self.method       = method
+        self.retry        = retry
+        self.cursor       = cursor
+        self.record_class = record_class
+        self.pages        = 0
+        self.done         = False
+
+        if cursor is not None:
+            path, params = api._split_cursor(cursor, params)
+
+        fetched = self._fetch(path, params)
+        self._pages = self._prefetch(fetched, prefetch) if prefetch else fetched
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            page, self.cursor = await self._pages.__anext__()
+        except StopAsyncIteration:
+            self.done = True
+            raise
+        self.pages += 1
+        return page
+
+    async def aclose(self):
+        await self._pages.aclose()
+
+    async def _fetch(self, path, params):
+        page = 0
+        while path:
+            page += 1
+            result, next_url = await self.api._retry_request(self.method, path, params, self.retry, page)
+            if self.record_class is not None:
+                result = RecordPage.from_result(result, self.record_class)
+
+            yield result, next_url
+
+            if next_url:
+                path, params = self.api._split_cursor(next_url, params)
+            else:
+                path = None
+
+    async def _prefetch(self, pages, depth):
+        buffer = asyncio.Queue(maxsize=max(1, depth))
+
+        async def fetch():
+            try:
+                async for page in pages:
+                    await buffer.put((page, None))
+            except Exception as e:
+                await buffer.put((None, e))
+            else:
+                await buffer.put((_DONE, None))
+
+        task = asyncio.ensure_future(fetch())
+        try:
+            while True:
+                page, error = await buffer.get()
+                if error is not None:
+                    raise error
+                if page is _DONE:
+                    return
+                yield page
+        finally:
+            task.cancel()
+
+class AsyncRecordIterator(object):
+    """
+    Async counterpart of RecordIterator: yields the records of every page
+    as they are parsed off the connection, retrying a failed page without
+    repeating the records already yielded.
+    """
+    def __init__(self, api, method, path, params, retry=0, cursor=None, key='data', record_class=None):
+        self.api          = api
+        self.method       = method
+        self.retry        = retry
+        self.cursor       = cursor
+        self.key          = key
+        self.record_class = record_class
+        self.pages        = 0
+        self.records      = 0
+        self.done         = False
+
+        if cursor is not None:
+            path, params = api._split_cursor(cursor, params)
+
+        self._rest    = {}
+        self._records = self._fetch(path, params)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            record = await self._records.__anext__()
+        except StopAsyncIteration:
+            self.done = True
+            raise
+        self.records += 1
+        return record
+
+    async def aclose(self):
+        await self._records.aclose()
+
+    async def _fetch(self, path, params):
+        while path:
+            async for record in self._page(path, params, self.pages + 1):
+                yield record if self.record_class is None else self.record_class.from_dict(record)
+
+            try:
+                self.cursor = self._rest['paging']['next']
+            except (KeyError, TypeError):
+                self.cursor = None
+            self.pages += 1
+
+            if self.cursor:
+                path, params = self.api._split_cursor(self.cursor, params)
+            else:
+                path = None
+
+    async def _page(self, path, params, page):
+        policy  = self.api.retry_policy
+        attempt = 0
+        relogin = True
+        sent    = 0
+        tries   = 0
+        probe   = False
+
+        try:
+            while True:
+                if not probe:
+                    probe = policy.before_request()
+                parser = self.api._stream_parser(self.key)
+                i      = 0
+                try:
+                    await self.api._refresh_token()
+                    tries += 1
+                    async for record in self.api._stream(self.method, path, params, parser, tries - 1, page):
+                        if i >= sent:
+                            sent += 1
+                            yield record
+                        i += 1
+                except AuthenticationError:
+                    if not relogin:
+                        raise
+                    relogin = False
+                    await self.api._refresh_token(force=True)
+                except QuantumPythonError as e:
+                    probe = False
+                    policy.record_failure(e)
+                    delay = policy.delay(attempt, e) if attempt < self.retry and policy.is_retryable(e) else None
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                else:
+                    probe = False
+                    policy.record_success()
+                    self._rest = parser.rest
+                    return
+        finally:
+            if probe:
+                policy.release_probe()
@@ -0,0 +1,83 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import base64
+import hashlib
+import os
+import stat
+import tempfile
+
+from quantumpy.exceptions import QuantumPythonError
+
+def jwt_expiry(token):
+    """
+    Expiry timestamp (the `exp` claim) of a JWT, or None if it has none or cannot be decoded
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload.encode('ascii')).decode('utf-8'))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+class FileTokenCache(object):
+    """
+    Keeps JWTs in small files under `directory` so that processes sharing
+    the same API secret and backend can reuse a token instead of logging
+    in again. Files are named after a hash of the secret, never the secret
+    itself, and are only readable by the current user.
+
+    The directory (by default ~/.cache/quantumpy/tokens, or under
+    $XDG_CACHE_HOME) is created with mode 0700; a directory owned by
+    another user or open to others is refused with QuantumPythonError.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+
+    def key(self, url, secret):
+        return hashlib.sha256((url + '\n' + secret).encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """
+        Return the cached (jwt, account_id), or None
+        """
+        if not os.path.isdir(self.directory):
+            return None
+
+        self._check_directory()
+        try:
+            with open(os.path.join(self.directory, key)) as f:
+                data = json.load(f)
+            return data['jwt'], data['account_id']
+        except (IOError, OSError, KeyError, ValueError):
+            return None
+
+    def store(self, key, jwt, account_id):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory, 0o700)
+            except OSError:
+                pass
+        self._check_directory()
+
+        # mkstemp creates a new file (O_EXCL) readable by the current user only
+        fd, tmp = tempfile.mkstemp(prefix=key + '.', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'jwt': jwt, 'account_id': account_id}, f)
+            getattr(os, 'replace', os.rename)(tmp, os.path.join(self.directory, key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _check_directory(self):
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise QuantumPythonError('Token cache {} is not a directory'.format(self.directory))
+        if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            raise QuantumPythonError('Token cache directory {} must be owned by the current user with mode 0700'.format(self.directory))
+
+def default_directory():
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'quantumpy', 'tokens')
@@ -0,0 +1,124 @@
+import six
+import types
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from quantumpy.pagination import PageIterator, RecordIterator
+
+class BatchCall(object):
+    """
+    A deferred QuantumAPI method call, given either by method name or as a
+    bound method:
+
+        BatchCall('get_facebook_profiles_stat_summary', project_id, since, until, ids)
+        BatchCall(q.get_projects)
+    """
+    def __init__(self, method, *args, **kwargs):
+        self.method = method
+        self.args   = args
+        self.kwargs = kwargs
+
+    @classmethod
+    def coerce(cls, call):
+        """
+        Accept a BatchCall, a method name or a (method, args[, kwargs]) tuple
+        """
+        if isinstance(call, cls):
+            return call
+        if isinstance(call, six.string_types) or callable(call):
+            return cls(call)
+        if isinstance(call, (tuple, list)) and 1 <= len(call) <= 3:
+            method = call[0]
+            args   = call[1] if len(call) > 1 else ()
+            kwargs = call[2] if len(call) > 2 else {}
+            return cls(method, *args, **kwargs)
+        raise TypeError('Invalid batch call: {!r}'.format(call))
+
+    def __call__(self, api):
+        method = getattr(api, self.method) if isinstance(self.method, six.string_types) else self.method
+        result = method(*self.args, **self.kwargs)
+
+        # Paginated calls are drained inside the worker thread
+        if isinstance(result, (types.GeneratorType, PageIterator, RecordIterator)):
+            result = list(result)
+
+        return result
+
+    def __repr__(self):
+        name = self.method if isinstance(self.method, six.string_types) else getattr(self.method, '__name__', repr(self.method))
+        return 'BatchCall({}, args={!r}, kwargs={!r})'.format(name, self.args, self.kwargs)
+
+class BatchResult(object):
+    """
+    Outcome of a single BatchCall: either `result` or `error` is set
+    """
+    def __init__(self, index, call, result=None, error=None):
+        self.index  = index
+        self.call   = call
+        self.result = result
+        self.error  = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """
+        Return the result, re-raising the call's exception if it failed
+        """
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def __repr__(self):
+        if self.ok:
+            return 'BatchResult({}, ok)'.format(self.index)
+        return 'BatchResult({}, error={!r})'.format(self.index, self.error)
+
+class BatchExecutor(object):
+    """
+    Runs QuantumAPI method calls on a bounded thread pool that shares the
+    client's requests.Session. The session's connection pool is grown to
+    `max_workers` so that no worker waits for a free connection.
+
+        with BatchExecutor(q, max_workers=16) as executor:
+            for result in executor.map(calls, ordered=False):
+                ...
+    """
+    def __init__(self, api, max_workers=8):
+        self.api         = api
+        self.max_workers = max_workers
+        self.executor    = ThreadPoolExecutor(max_workers=max_workers)
+
+        api._resize_pool(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def submit(self, call):
+        """
+        Schedule a single call, returning a concurrent.futures.Future
+        """
+        return self.executor.submit(BatchCall.coerce(call), self.api)
+
+    def map(self, calls, ordered=True):
+        """
+        Run all calls, yielding a BatchResult per call. Results follow the
+        order of `calls` when ordered is True, or completion order otherwise.
+        Errors are collected per call rather than raised.
+        """
+        calls   = [BatchCall.coerce(call) for call in calls]
+        futures = [self.executor.submit(call, self.api) for call in calls]
+        index   = {future: i for i, future in enumerate(futures)}
+
+        for future in (futures if ordered else as_completed(futures)):
+            i = index[future]
+            try:
+                yield BatchResult(i, calls[i], result=future.result())
+            except Exception as e:
+                yield BatchResult(i, calls[i], error=e)
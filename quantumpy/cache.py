@@ -0,0 +1,207 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from quantumpy.coalesce import request_key
+from six.moves import cPickle as pickle
+
+class Cache(object):
+    """
+    Base class for QuantumAPI response caches. Subclasses implement lookup()
+    and set(); this class provides the request key and the TTL policy.
+
+    Date ranges that ended more than `settle_days` ago are treated as
+    immutable and cached for `settled_ttl` seconds. Anything else, ranges
+    touching today or requests without dates, gets `recent_ttl` seconds.
+    """
+    def __init__(self, recent_ttl=300, settled_ttl=30 * 86400, settle_days=2):
+        self.recent_ttl  = recent_ttl
+        self.settled_ttl = settled_ttl
+        self.settle_days = settle_days
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+
+    def key(self, method, url, params):
+        """
+        Key on the request method, normalized URL and sorted params
+        """
+        return hashlib.sha1(request_key(method, url, params).encode('utf-8')).hexdigest()
+
+    def ttl(self, params):
+        until = _parse_date((params or {}).get('until'))
+        if until is None:
+            return self.recent_ttl
+
+        if until < datetime.utcnow().date() - timedelta(days=self.settle_days):
+            return self.settled_ttl
+
+        return self.recent_ttl
+
+    def get(self, key):
+        """
+        Return the cached value, or None on a miss
+        """
+        entry = self.lookup(key)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key):
+        """
+        Return a (value, expires) tuple, or None on a miss
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class MemoryCache(Cache):
+    """
+    In-process LRU cache holding up to `maxsize` entries, each with its own TTL.
+    Cached results are shared between callers and must not be mutated.
+    """
+    def __init__(self, maxsize=1024, **kwargs):
+        super(MemoryCache, self).__init__(**kwargs)
+        self.maxsize  = maxsize
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] < time.time():
+                self.misses += 1
+                return None
+
+            self._entries[key] = entry
+            self.hits += 1
+            return entry
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time() + ttl)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCache(Cache):
+    """
+    Persistent cache in a SQLite file, shared by every process pointing at
+    the same `path`. The store is kept under `max_bytes` of pickled values
+    by evicting the least recently used entries.
+    """
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, **kwargs):
+        super(SQLiteCache, self).__init__(**kwargs)
+        self.path      = path
+        self.max_bytes = max_bytes
+        self._local    = threading.local()
+
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def lookup(self, key):
+        now = time.time()
+        with self._connection() as db:
+            row = db.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+
+            db.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+
+        self.hits += 1
+        return pickle.loads(bytes(row[0])), row[1]
+
+    def set(self, key, value, ttl):
+        now  = time.time()
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        with self._connection() as db:
+            db.execute('DELETE FROM cache WHERE expires < ?', (now,))
+            db.execute(
+                'INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, sqlite3.Binary(data), len(data), now + ttl, now)
+            )
+
+            total = db.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for old_key, size in db.execute('SELECT key, size FROM cache ORDER BY accessed').fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute('DELETE FROM cache WHERE key = ?', (old_key,))
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute('DELETE FROM cache')
+
+class TieredCache(Cache):
+    """
+    Looks entries up in each cache in turn, promoting hits from slower
+    tiers into the faster ones. Typically an in-memory LRU in front of a
+    persistent SQLite store:
+
+        cache = TieredCache(MemoryCache(), SQLiteCache('/var/cache/quantum.db'))
+        q = QuantumAPI(api_secret, cache=cache)
+    """
+    def __init__(self, *tiers, **kwargs):
+        super(TieredCache, self).__init__(**kwargs)
+        self.tiers = tiers
+
+    def lookup(self, key):
+        for i, tier in enumerate(self.tiers):
+            entry = tier.lookup(key)
+            if entry is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, entry[0], entry[1] - time.time())
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def set(self, key, value, ttl):
+        for tier in self.tiers:
+            tier.set(key, value, ttl)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        stats = super(TieredCache, self).stats()
+        stats['tiers'] = [dict(tier.stats(), type=type(tier).__name__) for tier in self.tiers]
+        return stats
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
@@ -0,0 +1,68 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import copy
+import six
+import sys
+import threading
+
+from concurrent.futures import Future
+
+def request_key(method, url, params):
+    """
+    Normalized form of a request: method, URL and sorted params
+    """
+    return json.dumps([method, url, sorted((params or {}).items())], default=list)
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical calls. While a call for a key is in
+    flight, other callers asking for the same key wait for it and receive
+    its result, or its exception, instead of issuing their own request.
+    Nothing is kept once the call returns; see Cache for that.
+
+    Waiting callers receive a deep copy of the result, so that no two
+    callers share a mutable object. One SingleFlight can be shared by several QuantumAPI clients.
+    """
+    def __init__(self):
+        self.calls     = 0
+        self.coalesced = 0
+        self._flights  = {}
+        self._lock     = threading.Lock()
+
+    def do(self, key, function):
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = function()
+        except BaseException:
+            error = sys.exc_info()
+            self._land(key)
+            future.set_exception(error[1])
+            six.reraise(*error)
+
+        self._land(key)
+        future.set_result(result)
+        return result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': self.in_flight()}
+
+    def _land(self, key):
+        with self._lock:
+            del self._flights[key]
@@ -0,0 +1,150 @@
+import importlib
+import numbers
+import six
+
+from quantumpy.series import point_date, _series_key
+
+class ColumnarSeries(object):
+    """
+    By-date series held as arrays instead of nested records. Requires numpy.
+
+    `dates` is the sorted datetime64[D] index shared by every profile,
+    `ids` the profile ids and `values` maps every metric to a float matrix
+    of shape (len(ids), len(dates)), NaN where a profile has no point for
+    a date. Scalar per-profile values of the response (e.g. totals) are
+    kept in `fields`, one array per name aligned with `ids`.
+
+        fans = q.get_facebook_fans_count_by_date(project_id, since, until, ids, columnar=True)
+        fans['count'].sum(axis=0)     # all profiles, per date
+        fans.get('count', ids[0])     # one profile
+        fans.to_frame('count')        # pandas DataFrame, one column per id
+    """
+    def __init__(self, dates, ids, values, fields=None):
+        self.dates  = dates
+        self.ids    = ids
+        self.values = values
+        self.fields = fields or {}
+
+    @property
+    def metrics(self):
+        return sorted(self.values)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, metric):
+        return self.values[metric]
+
+    def __repr__(self):
+        return '<ColumnarSeries {} ids x {} dates: {}>'.format(len(self.ids), len(self.dates), ', '.join(self.metrics))
+
+    def get(self, metric, id):
+        """
+        The series of `metric` for profile `id`, aligned with `dates`
+        """
+        return self.values[metric][self.ids.index(id)]
+
+    def to_frame(self, metric=None):
+        """
+        Date-indexed DataFrame with one column per id, or per (metric, id) when no `metric` is given. Requires pandas.
+        """
+        pd    = _import('pandas', 'ColumnarSeries.to_frame')
+        index = pd.DatetimeIndex(self.dates, name='date')
+        if metric is not None:
+            return pd.DataFrame(self.values[metric].T, index=index, columns=self.ids)
+
+        return pd.concat(
+            {name: pd.DataFrame(self.values[name].T, index=index, columns=self.ids) for name in self.metrics},
+            axis = 1
+        )
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        Build from a parsed by-date response: a list (or {'data': [...]}) of
+        id records each holding a date series, or a single series
+        """
+        np = _import('numpy', 'ColumnarSeries')
+
+        ids, fields, series = _records(result)
+
+        days = [_days(points) for points in series]
+        if days:
+            dates = np.unique(np.concatenate(days))
+        else:
+            dates = np.array([], dtype='datetime64[D]')
+
+        values = {}
+        for row, points in enumerate(series):
+            if not points:
+                continue
+
+            position = np.searchsorted(dates, days[row])
+            for metric, column in _columns(points):
+                if metric not in values:
+                    values[metric] = np.full((len(ids), len(dates)), np.nan)
+                values[metric][row, position] = np.array(column, dtype=float)
+
+        fields = {name: np.array([record.get(name) for record in fields]) for name in _field_names(fields)}
+
+        return cls(dates, ids, values, fields)
+
+def _import(name, user):
+    """
+    Import numpy or pandas on first use, both being slow to import
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError('{} requires the {} package'.format(user, name))
+
+def _records(result):
+    """
+    Split a response into parallel lists of ids, scalar fields and series
+    """
+    if isinstance(result, dict) and isinstance(result.get('data'), list):
+        result = result['data']
+
+    if isinstance(result, dict):
+        items = [(key, {}, value) for key, value in result.items() if isinstance(value, list)]
+    elif isinstance(result, list) and _series_key(result) is not None:
+        items = [(None, {}, result)]
+    else:
+        items = []
+        for record in result or []:
+            if not isinstance(record, dict):
+                continue
+            points = next((value for value in record.values() if isinstance(value, list) and _series_key(value) is not None), [])
+            scalar = {key: value for key, value in record.items() if key != 'id' and not isinstance(value, (list, dict))}
+            items.append((record.get('id'), scalar, points))
+
+    return [item[0] for item in items], [item[1] for item in items], [item[2] for item in items]
+
+def _days(points):
+    np = _import('numpy', 'ColumnarSeries')
+    if not points:
+        return np.array([], dtype='datetime64[D]')
+
+    key   = _series_key(points)
+    dates = [key(point) for point in points]
+    if all(isinstance(value, six.string_types) for value in dates):
+        return np.array([value[:10] for value in dates], dtype='datetime64[D]')
+    return np.array([point_date(value) for value in dates], dtype='datetime64[D]')
+
+def _columns(points):
+    sample = points[0]
+    if isinstance(sample, dict):
+        for metric, value in sample.items():
+            if metric != 'date' and isinstance(value, numbers.Number) and not isinstance(value, bool):
+                yield metric, [point.get(metric) for point in points]
+    else:
+        for i in range(1, len(sample)):
+            yield 'value' if i == 1 else 'value{}'.format(i), [point[i] for point in points]
+
+def _field_names(fields):
+    names = []
+    for record in fields:
+        for name in record:
+            if name not in names:
+                names.append(name)
+    return names
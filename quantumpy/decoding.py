@@ -0,0 +1,56 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import six
+import sys
+
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The stdlib json module only accepts bytes from Python 3.6 on
+_LOADS_BYTES = json.__name__ == 'simplejson' or sys.version_info >= (3, 6) or six.PY2
+
+def loads_fast(data):
+    """
+    Decode a JSON response body (bytes or str) with native floats, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes) and not _LOADS_BYTES:
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+def loads_decimal(data):
+    """
+    Decode a JSON response body keeping every non-integer number as an exact Decimal
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data, parse_float=Decimal)
+
+DECODERS = {
+    'fast':    loads_fast,
+    'decimal': loads_decimal
+}
+
+def parse_float(decoder):
+    """
+    The parse_float matching `decoder`, for decoders that parse incrementally
+    """
+    return Decimal if decoder is loads_decimal else None
+
+def get_decoder(decoder):
+    """
+    Resolve a `decoder` argument: 'fast', 'decimal' or any callable taking the response body
+    """
+    if callable(decoder):
+        return decoder
+    try:
+        return DECODERS[decoder]
+    except KeyError:
+        raise ValueError('Unknown decoder: {!r} (expected one of {})'.format(decoder, ', '.join(sorted(DECODERS))))
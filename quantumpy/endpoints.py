@@ -0,0 +1,325 @@
+import re
+import six
+
+from quantumpy.records import Post, Tweet, Video
+
+# Arguments sent as query params; every other argument is an option of QuantumAPI._query
+QUERY_PARAMS = ('since', 'until', 'ids', 'owner', 'type', 'timezone')
+
+DEFAULTS = {
+    'owner':    None,
+    'type':     None,
+    'page':     False,
+    'timezone': 'UTC',
+    'retry':    3,
+    'prefetch': 0,
+    'cursor':   None,
+    'chunk':    None,
+    'columnar': False,
+    'stream':   False,
+    'records':  False
+}
+
+# Arguments following the path ids, in positional order, for each kind of endpoint
+SUMMARY         = ('since', 'until', 'ids', 'timezone', 'retry')
+INTERACTIONS    = SUMMARY + ('chunk',)
+SERIES          = SUMMARY + ('chunk', 'columnar')
+FILTERED_SERIES = ('since', 'until', 'ids', 'owner', 'type', 'timezone', 'retry', 'chunk', 'columnar')
+LISTING         = ('since', 'until', 'ids', 'owner', 'type', 'page', 'timezone', 'retry', 'prefetch', 'cursor', 'stream', 'records')
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+_SOURCE = '''def {name}(self{signature}):
+    return self._call(endpoint, ({args}), {{{params}}}{options})
+'''
+
+class Endpoint(object):
+    """
+    Declarative description of a Quantum API endpoint, from which the
+    matching QuantumAPI method is generated:
+
+        name          method name
+        path          path template; {account_id} is filled in by the client
+                      and every other placeholder becomes a positional argument
+        arguments     the method's other arguments in order, query params
+                      (QUERY_PARAMS) and options of _query alike
+        error         message of the QuantumError raised when the call fails,
+                      formatted with the call's arguments
+        ids           what the ids param holds, for the docstring
+        record_class  Record subclass returned with records=True
+    """
+    def __init__(self, name, path, arguments=('retry',), error=None, ids='fanpages', description=None, record_class=None, method='GET'):
+        self.name         = name
+        self.path         = path
+        self.arguments    = tuple(arguments)
+        self.error        = error or 'Could not call {}.'.format(name)
+        self.ids          = ids
+        self.description  = description
+        self.record_class = record_class
+        self.method       = method
+
+        self.path_args = tuple(_PLACEHOLDER.findall(path)[1:])
+        self.params    = tuple(argument for argument in self.arguments if argument in QUERY_PARAMS)
+        self.options   = tuple(argument for argument in self.arguments if argument not in QUERY_PARAMS)
+
+        # Formatted with the account id and the path arguments on every call
+        self.template = _PLACEHOLDER.sub('{}', path)
+
+    @property
+    def paginated(self):
+        return 'page' in self.arguments
+
+    @property
+    def chunkable(self):
+        return 'chunk' in self.arguments
+
+    def error_message(self, args, params):
+        values = dict(zip(self.path_args, args))
+        values.update(params or {})
+        return self.error.format(**values)
+
+    def docstring(self):
+        labels = {'since': 'start_date', 'until': 'end_date', 'ids': self.ids}
+        lines  = [self.path + ('?' if self.params else '')]
+        lines += ['    {}={{{}}}'.format(param, labels.get(param, param)) for param in self.params]
+        if self.description:
+            lines.append(self.description)
+        return '\n' + '\n'.join('        ' + line for line in lines) + '\n        '
+
+    def source(self):
+        signature = ''.join(
+            ', {}={!r}'.format(argument, DEFAULTS[argument]) if argument in DEFAULTS else ', ' + argument
+            for argument in self.path_args + self.arguments
+        )
+        return _SOURCE.format(
+            name      = self.name,
+            signature = signature,
+            args      = ''.join(arg + ', ' for arg in self.path_args),
+            params    = ', '.join('{0!r}: {0}'.format(param) for param in self.params),
+            options   = ''.join(', {0}={0}'.format(option) for option in self.options)
+        )
+
+    def build(self):
+        """
+        The method for this endpoint, compiled once so each call does no more than format the path
+        """
+        namespace = {'endpoint': self}
+        six.exec_(self.source(), namespace)
+        method = namespace[self.name]
+        method.__doc__ = self.docstring()
+        return method
+
+    def __repr__(self):
+        return '<Endpoint {} {}>'.format(self.method, self.path)
+
+ENDPOINTS = [
+    Endpoint(
+        'get_projects',
+        '/accounts/{account_id}/projects',
+        error       = 'Could not get projects.',
+        description = 'Get all available projects for account'
+    ),
+    Endpoint(
+        'get_project_by_id',
+        '/accounts/{account_id}/projects/{project_id}',
+        error       = 'Could not get project {project_id}.',
+        description = 'Get project properties by id'
+    ),
+
+    # Facebook
+    Endpoint(
+        'get_facebook_profiles_stat_summary',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/stat-summary',
+        SUMMARY,
+        error       = 'Could not get stat summary for project {project_id}.',
+        description = 'Get stat summary for fanpages within a project'
+    ),
+    Endpoint(
+        'get_facebook_profiles_posts',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/{fanpage_id}/posts',
+        LISTING,
+        error        = 'Could not get posts for fanpage {fanpage_id}.',
+        description  = 'Get all posts for a given fanpage and period',
+        record_class = Post
+    ),
+    Endpoint(
+        'get_facebook_profiles_post_interactions',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/posts-interactions/count/date',
+        INTERACTIONS,
+        error       = 'Could not get post interactions for project {project_id}.',
+        ids         = 'posts',
+        description = 'Get post interactions for posts within a project'
+    ),
+    Endpoint(
+        'get_facebook_fans_total_by_country',
+        '/accounts/{account_id}/projects/{project_id}/facebook/fans/total/country',
+        SUMMARY,
+        error = 'Could not get fans by country for profile {project_id}.'
+    ),
+    Endpoint(
+        'get_facebook_fans_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/facebook/fans/count/date',
+        SERIES,
+        error = 'Could not get fans by date for profile {project_id}.'
+    ),
+    Endpoint(
+        'get_facebook_profiles_interactions_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/interactions/count/date',
+        SERIES,
+        error = 'Could not get fans by date for profile {project_id}.'
+    ),
+    Endpoint(
+        'get_facebook_profiles_posts_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/posts/count/date',
+        FILTERED_SERIES,
+        error = 'Could not get post count by date for profile {project_id}.',
+        ids   = 'posts'
+    ),
+    Endpoint(
+        'get_facebook_profiles_postinteractions_by_date',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/posts-interactions/count/date',
+        SERIES,
+        error = 'Could not get post interactions for posts {ids}',
+        ids   = 'posts'
+    ),
+    Endpoint(
+        'get_facebook_profiles_engagementrate_by_date',
+        '/accounts/{account_id}/projects/{project_id}/facebook/profiles/engagement-rate/date',
+        SERIES,
+        error = 'Could not get engagement rate by date for profile {project_id}.'
+    ),
+
+    # Twitter
+    Endpoint(
+        'get_twitter_profiles_stat_summary',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/stat-summary',
+        SUMMARY,
+        error       = 'Could not get Twitter stat summary for project {project_id}.',
+        ids         = 'profiles',
+        description = 'Get stat summary for profiles within a project'
+    ),
+    Endpoint(
+        'get_twitter_profiles_interactions_received_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/interactions-received/count/date',
+        SERIES,
+        error = 'Could not get interactions received count by date for profile {project_id}.',
+        ids   = 'profiles'
+    ),
+    Endpoint(
+        'get_twitter_profiles_interactions_sent_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/interactions-sent/count/date',
+        SERIES,
+        error = 'Could not get interactions sent count by date for profile {project_id}.',
+        ids   = 'profiles'
+    ),
+    Endpoint(
+        'get_twitter_profiles_engagement_rate_by_date',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/engagement-rate/date',
+        SERIES,
+        error = 'Could not get engagement rate by date for profile {project_id}.',
+        ids   = 'profiles'
+    ),
+    Endpoint(
+        'get_twitter_reach_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/twitter/reach/count/date',
+        SERIES,
+        error = 'Could not get reach count by date for profile {project_id}.',
+        ids   = 'posts'
+    ),
+    Endpoint(
+        'get_twitter_profiles_tweets',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/{profile_id}/tweets',
+        LISTING,
+        error        = 'Could not get tweets for profile {profile_id}.',
+        ids          = 'profiles',
+        description  = 'Get all tweets for a given profile and period',
+        record_class = Tweet
+    ),
+    Endpoint(
+        'get_twitter_profiles_tweet_interactions',
+        '/accounts/{account_id}/projects/{project_id}/twitter/profiles/tweet-interactions/count/date',
+        INTERACTIONS,
+        error       = 'Could not get tweet interactions for project {project_id}.',
+        ids         = 'posts',
+        description = 'Get tweet interactions for tweets within a project'
+    ),
+
+    # Instagram
+    Endpoint(
+        'get_instagram_profiles_stat_summary',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/stat-summary',
+        SUMMARY,
+        error       = 'Could not get instagram stat summary for project {project_id}.',
+        description = 'Get stat summary for instagram profiles within a project'
+    ),
+    Endpoint(
+        'get_instagram_profiles_posts',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/{fanpage_id}/posts',
+        LISTING,
+        error        = 'Could not get posts for instagram profile {fanpage_id}.',
+        description  = 'Get all posts for a given instagram profile and period',
+        record_class = Post
+    ),
+    Endpoint(
+        'get_instagram_profiles_post_interactions',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/posts-interactions/count/date',
+        INTERACTIONS,
+        error       = 'Could not get instagram post interactions for project {project_id}.',
+        ids         = 'posts',
+        description = 'Get post interactions for posts within a project'
+    ),
+    Endpoint(
+        'get_instagram_profiles_interactions_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/interactions/count/date',
+        SERIES,
+        error = 'Could not get fans by date for instagram profile {project_id}.'
+    ),
+    Endpoint(
+        'get_instagram_profiles_posts_count_by_date',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/posts/count/date',
+        FILTERED_SERIES,
+        error = 'Could not get post count by date for instagram profile {project_id}.',
+        ids   = 'posts'
+    ),
+    Endpoint(
+        'get_instagram_profiles_postinteractions_by_date',
+        '/accounts/{account_id}/projects/{project_id}/instagram/profiles/posts-interactions/count/date',
+        SERIES,
+        error = 'Could not get instagram post interactions for posts {ids}',
+        ids   = 'posts'
+    ),
+
+    # YouTube
+    Endpoint(
+        'get_youtube_profiles_stat_summary',
+        '/accounts/{account_id}/projects/{project_id}/youtube/profiles/stat-summary',
+        SUMMARY,
+        error       = 'Could not get youtube stat summary for project {project_id}.',
+        description = 'Get stat summary for youtube channels within a project'
+    ),
+    Endpoint(
+        'get_youtube_profiles_videos',
+        '/accounts/{account_id}/projects/{project_id}/youtube/profiles/{fanpage_id}/videos',
+        LISTING,
+        error        = 'Could not get videos for channel {fanpage_id}.',
+        description  = 'Get all videos for a given channel and period',
+        record_class = Video
+    ),
+    Endpoint(
+        'get_youtube_profiles_videointeractions_by_date',
+        '/accounts/{account_id}/projects/{project_id}/youtube/profiles/video-interactions/count/date',
+        SERIES,
+        error = 'Could not get post interactions for posts {ids}',
+        ids   = 'posts'
+    )
+]
+
+def install(cls, endpoints=ENDPOINTS):
+    """
+    Add a generated method to `cls` for each endpoint, and the registry as `cls.endpoints`
+    """
+    cls.endpoints = dict(getattr(cls, 'endpoints', {}))
+    for endpoint in endpoints:
+        cls.endpoints[endpoint.name] = endpoint
+        setattr(cls, endpoint.name, endpoint.build())
+    return cls
@@ -15,3 +15,16 @@ class InternalServerError(QuantumError):
 
 class HTTPError(QuantumPythonError):
     """ Exception for http errors """
+    def __init__(self, message=None, status_code=None, retry_after=None):
+        super(HTTPError, self).__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class RateLimitError(HTTPError):
+    """ Exception for throttled requests (HTTP 429) """
+
+class ServiceUnavailableError(HTTPError):
+    """ Exception for HTTP 503 responses """
+
+class CircuitOpenError(QuantumPythonError):
+    """ Exception raised without a request while the circuit breaker is open """
@@ -0,0 +1,422 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import gzip
+import os
+import six
+import sys
+import threading
+import time
+
+from decimal import Decimal
+from quantumpy.decoding import orjson
+from quantumpy.records import Record
+from six.moves import queue
+
+# Imported by the first ParquetWriter, pyarrow being slow to import
+pyarrow = None
+
+_DONE = object()
+
+class ExportJob(object):
+    """
+    One paginated endpoint method call to export, given by name as in
+    BatchCall; its records are streamed and `fields` added to each one:
+
+        ExportJob('get_facebook_profiles_posts', (project_id, fanpage_id, since, until, [fanpage_id]),
+                  fields={'project_id': project_id})
+    """
+    def __init__(self, method, args=(), kwargs=None, fields=None):
+        self.method = method
+        self.args   = tuple(args)
+        self.kwargs = kwargs or {}
+        self.fields = fields or {}
+
+    def records(self, api):
+        return getattr(api, self.method)(*self.args, stream=True, **self.kwargs)
+
+    def __repr__(self):
+        return 'ExportJob({}, args={!r})'.format(self.method, self.args)
+
+def listing_methods(api):
+    """
+    Paginated endpoint method names by network, from the endpoint registry:
+    {'facebook': ['get_facebook_profiles_posts'], 'twitter': [...], ...}
+    """
+    methods = {}
+    for name, endpoint in sorted(api.endpoints.items()):
+        if endpoint.paginated:
+            methods.setdefault(endpoint.path.split('/')[5], []).append(name)
+    return methods
+
+def project_jobs(api, since, until, profiles, projects=None):
+    """
+    An ExportJob per paginated endpoint for every profile of every project
+    (all those returned by get_projects() unless `projects` is given).
+    `profiles(project)` returns the (network, profile_id) pairs to export
+    for a project dict. Records get project_id, network and profile_id
+    fields.
+    """
+    methods = listing_methods(api)
+    for project in (projects if projects is not None else api.get_projects()):
+        for network, profile_id in profiles(project):
+            for method in methods.get(network, ()):
+                yield ExportJob(
+                    method,
+                    (project['id'], profile_id, since, until, [profile_id]),
+                    fields = {'project_id': project['id'], 'network': network, 'profile_id': profile_id}
+                )
+
+class ExportResult(object):
+    """
+    Outcome of Exporter.run(): record and job counts, the files written,
+    and the (job, exception) pairs of the jobs that failed
+    """
+    def __init__(self, records, jobs, errors, files, seconds):
+        self.records = records
+        self.jobs    = jobs
+        self.errors  = errors
+        self.files   = files
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __repr__(self):
+        return 'ExportResult(records={}, jobs={}, errors={}, files={})'.format(self.records, self.jobs, len(self.errors), len(self.files))
+
+class Exporter(object):
+    """
+    Streams the records of many paginated calls into files through three
+    stages connected by bounded queues:
+
+        fetch      `concurrency` threads, each streaming one job at a time
+        transform  transform(record, job) returns the row to write, or None
+                   to skip it; by default, the record plus job.fields
+        write      a single thread feeding `writer` (NDJSONWriter or ParquetWriter)
+
+    A full queue blocks the stage before it, so memory stays bounded by
+    `queue_size` records per queue whatever the size of the export. A job
+    that fails after its retries is reported in ExportResult.errors (its
+    records streamed before the failure are kept) and the others go on; a
+    failing transform or writer stops the export and is raised by run().
+
+        writer = NDJSONWriter('/data/export', max_records=1000000, compress=True)
+        result = Exporter(q, writer, concurrency=8).run(project_jobs(q, since, until, profiles))
+    """
+    def __init__(self, api, writer, concurrency=4, queue_size=1000, transform=None):
+        self.api         = api
+        self.writer      = writer
+        self.concurrency = concurrency
+        self.queue_size  = queue_size
+        self.transform   = transform or _add_fields
+
+        api._resize_pool(concurrency)
+
+    def run(self, jobs):
+        started     = time.time()
+        self._jobs  = iter(jobs)
+        self._lock  = threading.Lock()
+        self._abort = threading.Event()
+        self._fatal = []
+        self._count = [0, 0]
+        self._error = []
+
+        fetched = queue.Queue(self.queue_size)
+        rows    = queue.Queue(self.queue_size)
+
+        stages = [
+            threading.Thread(target=self._transform, args=(fetched, rows)),
+            threading.Thread(target=self._write, args=(rows,))
+        ]
+        fetchers = [threading.Thread(target=self._fetch, args=(fetched,)) for _ in range(self.concurrency)]
+        for thread in stages + fetchers:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            for thread in fetchers:
+                _join(thread)
+            self._put(fetched, _DONE)
+            for thread in stages:
+                _join(thread)
+        except BaseException:
+            self._abort.set()
+            raise
+        finally:
+            self.writer.close()
+
+        if self._fatal:
+            six.reraise(*self._fatal[0])
+
+        return ExportResult(self._count[1], self._count[0], self._error, list(self.writer.files), time.time() - started)
+
+    def _next_job(self):
+        with self._lock:
+            if self._abort.is_set():
+                return None
+            try:
+                job = next(self._jobs)
+            except StopIteration:
+                return None
+            self._count[0] += 1
+            return job
+
+    def _fetch(self, fetched):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                for record in job.records(self.api):
+                    if not self._put(fetched, (record, job)):
+                        return
+            except Exception as e:
+                with self._lock:
+                    self._error.append((job, e))
+
+    def _transform(self, fetched, rows):
+        try:
+            while True:
+                item = self._get(fetched)
+                if item is _DONE:
+                    break
+                row = self.transform(*item)
+                if row is not None and not self._put(rows, row):
+                    return
+        except BaseException:
+            self._fail()
+        self._put(rows, _DONE)
+
+    def _write(self, rows):
+        try:
+            while True:
+                row = self._get(rows)
+                if row is _DONE:
+                    return
+                self.writer.write(row)
+                self._count[1] += 1
+        except BaseException:
+            self._fail()
+
+    def _fail(self):
+        self._fatal.append(sys.exc_info())
+        self._abort.set()
+
+    def _put(self, q, item):
+        """
+        Put `item`, waiting for room unless the export is aborted; False if it was
+        """
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q):
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+class _RotatingWriter(object):
+    """
+    Base class for writers spreading rows over numbered files
+    {prefix}-00001{suffix}, {prefix}-00002{suffix}... in `directory`,
+    starting a new one every `max_records` rows
+    """
+    suffix = ''
+
+    def __init__(self, directory, prefix='export', max_records=None):
+        self.directory   = directory
+        self.prefix      = prefix
+        self.max_records = max_records
+        self.files       = []
+        self.records     = 0
+        self._current    = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _next_path(self):
+        path = os.path.join(self.directory, '{}-{:05d}{}'.format(self.prefix, len(self.files) + 1, self.suffix))
+        self.files.append(path)
+        self._current = 0
+        return path
+
+    def _full(self):
+        return self.max_records is not None and self._current >= self.max_records
+
+class NDJSONWriter(_RotatingWriter):
+    """
+    Writes rows as newline-delimited JSON, gzip-compressed with `compress`,
+    rotating files every `max_records` rows or `max_bytes` bytes
+    """
+    def __init__(self, directory, prefix='export', max_records=None, max_bytes=None, compress=False):
+        super(NDJSONWriter, self).__init__(directory, prefix, max_records)
+        self.max_bytes = max_bytes
+        self.compress  = compress
+        self.suffix    = '.ndjson.gz' if compress else '.ndjson'
+        self._file     = None
+        self._bytes    = 0
+
+    def write(self, row):
+        if self._file is None or self._full() or (self.max_bytes is not None and self._bytes >= self.max_bytes):
+            self._open()
+
+        line = _dumps(row) + b'\n'
+        self._file.write(line)
+        self._bytes   += len(line)
+        self._current += 1
+        self.records  += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        self.close()
+        path       = self._next_path()
+        self._file = gzip.open(path, 'wb') if self.compress else open(path, 'wb')
+        self._bytes = 0
+
+class ParquetWriter(_RotatingWriter):
+    """
+    Writes rows to Parquet files (requires pyarrow), one row group per
+    `row_group_size` rows. Nested objects and arrays are stored as JSON
+    strings, since their shape varies between records. Columns follow the
+    first row group of each file: later rows missing a column get nulls,
+    and a row group bringing new columns or types starts a new file.
+    """
+    suffix = '.parquet'
+
+    def __init__(self, directory, prefix='export', max_records=None, row_group_size=10000, compression='snappy'):
+        _import_pyarrow()
+
+        super(ParquetWriter, self).__init__(directory, prefix, max_records)
+        self.row_group_size = row_group_size
+        self.compression    = compression
+        self._rows          = []
+        self._file          = None
+
+    def write(self, row):
+        self._rows.append({key: _flatten(value) for key, value in _as_dict(row).items()})
+        self.records += 1
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        rows, self._rows = self._rows, []
+        while rows:
+            if self._file is not None and self._full():
+                self._close_file()
+
+            used        = self._current if self._file is not None else 0
+            room        = self.max_records - used if self.max_records is not None else len(rows)
+            group, rows = rows[:room], rows[room:]
+
+            table = self._conform(_table(group))
+            if self._file is None:
+                self._file = pyarrow.parquet.ParquetWriter(self._next_path(), table.schema, compression=self.compression)
+            self._file.write_table(table)
+            self._current += len(group)
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+    def _conform(self, table):
+        """
+        `table` with the columns of the open file, which is closed if they do not fit
+        """
+        if self._file is None:
+            return table
+
+        schema = self._file.schema
+        if set(table.schema.names) <= set(schema.names):
+            for field in schema:
+                if field.name not in table.schema.names:
+                    table = table.append_column(field.name, pyarrow.nulls(len(table), field.type))
+            try:
+                return table.select(schema.names).cast(schema)
+            except pyarrow.ArrowException:
+                pass
+
+        self._close_file()
+        return table
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def _import_pyarrow():
+    global pyarrow
+    if pyarrow is None:
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('ParquetWriter requires the pyarrow package')
+
+def _table(rows):
+    """
+    Arrow table of `rows`, with a column for every key of any row; a column
+    mixing incompatible types is stored as strings
+    """
+    columns = {}
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns[key] = None
+
+    arrays = []
+    for key in columns:
+        values = [row.get(key) for row in rows]
+        try:
+            arrays.append(pyarrow.array(values))
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            arrays.append(pyarrow.array([None if value is None else six.text_type(value) for value in values], pyarrow.string()))
+
+    return pyarrow.Table.from_arrays(arrays, names=list(columns))
+
+def _add_fields(record, job):
+    row = _as_dict(record)
+    row.update(job.fields)
+    return row
+
+def _as_dict(record):
+    return record.to_dict() if isinstance(record, Record) else dict(record)
+
+def _flatten(value):
+    if isinstance(value, (dict, list)):
+        return _dumps(value).decode('utf-8')
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+def _dumps(value):
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default)
+        except TypeError:
+            pass
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+def _join(thread):
+    # A timeout keeps the main thread responsive to KeyboardInterrupt
+    while thread.is_alive():
+        thread.join(0.5)
@@ -0,0 +1,99 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Interactions method answering for the posts of each paginated method
+INTERACTIONS = {
+    'get_facebook_profiles_posts':  'get_facebook_profiles_post_interactions',
+    'get_twitter_profiles_tweets':  'get_twitter_profiles_tweet_interactions',
+    'get_instagram_profiles_posts': 'get_instagram_profiles_postinteractions_by_date',
+    'get_youtube_profiles_videos':  'get_youtube_profiles_videointeractions_by_date'
+}
+
+def interactions_method(method, interactions=None):
+    if interactions is not None:
+        return interactions
+    try:
+        return INTERACTIONS[method]
+    except KeyError:
+        raise ValueError('No interactions method known for {}; pass interactions='.format(method))
+
+def id_batches(posts, size):
+    """
+    The ids of a page of posts, in lists of at most `size`
+    """
+    ids = [post['id'] for post in posts if post.get('id') is not None]
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+def attach(posts, results, key):
+    """
+    Copies of `posts`, each with `key` set to its entry in the interactions
+    `results` (matched on id), or None when the response has none for it.
+    The posts themselves are left as they are, since they may be cached.
+    """
+    entries = {}
+    for result in results:
+        for entry in (result.get('data') if isinstance(result, dict) else result) or ():
+            if isinstance(entry, dict):
+                entries[entry.get('id')] = entry
+
+    joined = []
+    for post in posts:
+        post      = dict(post)
+        post[key] = entries.get(post.get('id'))
+        joined.append(post)
+    return joined
+
+def page_posts(page):
+    """
+    The posts of a raw page: its `data` list, or the page itself when it is a list
+    """
+    return (page.get('data') if isinstance(page, dict) else page) or []
+
+def check_options(kwargs):
+    if kwargs.get('records') or kwargs.get('stream'):
+        raise ValueError('Posts with interactions are plain dicts; records= and stream= are not supported')
+
+def join_interactions(api, method, project_id, profile_id, since, until, ids, interactions=None, key='interactions',
+                      batch_size=100, concurrency=4, timezone='UTC', retry=3, **kwargs):
+    """
+    Generator behind QuantumAPI.posts_with_interactions: pages of posts are
+    fetched one ahead, each page's ids are requested in batches on a pool
+    of `concurrency` threads as soon as it arrives, and posts are yielded
+    in order once their page's interactions are in. At most about
+    2 x `concurrency` interaction requests are in flight, which bounds how
+    many pages are held.
+    """
+    interactions = getattr(api, interactions_method(method, interactions))
+    window       = 2 * concurrency
+    pending      = deque()
+    in_flight    = 0
+
+    api._resize_pool(concurrency + 1)
+    pages = getattr(api, method)(project_id, profile_id, since, until, ids, page=True, prefetch=1, timezone=timezone, retry=retry, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for page in pages:
+                posts   = page_posts(page)
+                futures = [
+                    executor.submit(interactions, project_id, since, until, batch, timezone=timezone, retry=retry)
+                    for batch in id_batches(posts, batch_size)
+                ]
+                pending.append((posts, futures))
+                in_flight += len(futures)
+
+                while pending and in_flight > window:
+                    posts, futures = pending.popleft()
+                    in_flight -= len(futures)
+                    for post in attach(posts, [future.result() for future in futures], key):
+                        yield post
+
+            while pending:
+                posts, futures = pending.popleft()
+                for post in attach(posts, [future.result() for future in futures], key):
+                    yield post
+        finally:
+            pages.close()
+            for posts, futures in pending:
+                for future in futures:
+                    future.cancel()
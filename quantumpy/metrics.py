@@ -0,0 +1,293 @@
+import re
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_IDS      = {'accounts': '{account_id}', 'projects': '{project_id}'}
+_LISTINGS = ('posts', 'tweets', 'videos')
+_LITERAL  = re.compile(r'^[a-z][a-z-]*$')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS     = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def endpoint_template(path):
+    """
+    The endpoint a request path belongs to, with ids replaced by placeholders:
+    /accounts/{account_id}/projects/{project_id}/facebook/profiles/{profile_id}/posts
+    """
+    parts = path.split('?')[0].split('/')
+    for i in range(1, len(parts)):
+        previous = parts[i - 1]
+        if previous in _IDS:
+            parts[i] = _IDS[previous]
+        elif previous == 'profiles' and i == len(parts) - 2 and parts[-1] in _LISTINGS:
+            parts[i] = '{profile_id}'
+        elif parts[i] and not _LITERAL.match(parts[i]):
+            parts[i] = '{id}'
+    return '/'.join(parts)
+
+class RequestEvent(object):
+    """
+    What happened during one HTTP request, as passed to the `hooks` of
+    QuantumAPI once it is over. Timings are in seconds and None when not
+    measured:
+
+        connect   opening new connections (DNS, TCP, TLS); 0 when reused
+        ttfb      from sending the request to receiving the headers
+        download  reading the body
+        decode    parsing the body
+        total     the whole request
+
+    `attempt` counts from 0 for the first try of a call, `page` from 1 for
+    paginated calls; `error` is the exception raised, if any.
+    """
+    __slots__ = (
+        'method', 'path', 'endpoint', 'attempt', 'page', 'status', 'bytes', 'reused',
+        'connect', 'ttfb', 'download', 'decode', 'total', 'error', 'started'
+    )
+
+    def __init__(self, method, path, attempt=0, page=None):
+        self.method   = method
+        self.path     = path
+        self.endpoint = endpoint_template(path)
+        self.attempt  = attempt
+        self.page     = page
+        self.status   = None
+        self.bytes    = 0
+        self.reused   = None
+        self.connect  = None
+        self.ttfb     = None
+        self.download = None
+        self.decode   = None
+        self.total    = None
+        self.error    = None
+        self.started  = time.time()
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['error'] = type(self.error).__name__ if self.error is not None else None
+        return data
+
+    def __repr__(self):
+        return '<RequestEvent {} {} {}>'.format(self.method, self.endpoint, self.status)
+
+class Histogram(object):
+    """
+    Cumulative histogram with fixed upper bounds, Prometheus style
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts  = [0] * (len(self.buckets) + 1)
+        self.sum     = 0.0
+        self.count   = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum       += value
+        self.count     += 1
+
+    def cumulative(self):
+        total = 0
+        out   = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+    def to_dict(self):
+        return {
+            'buckets': [['+Inf' if bound == float('inf') else bound, count] for bound, count in self.cumulative()],
+            'sum':     self.sum,
+            'count':   self.count
+        }
+
+class MetricsCollector(object):
+    """
+    Hook aggregating RequestEvents per endpoint: request counts by status,
+    errors, retries, bytes, connection reuse and a histogram per timing.
+
+        metrics = MetricsCollector()
+        q = QuantumAPI(api_secret, hooks=[metrics])
+        ...
+        print(metrics.to_prometheus(q.pool_stats()))
+        json.dump(metrics.snapshot(), f)
+    """
+    phases = ('connect', 'ttfb', 'download', 'decode', 'total')
+
+    def __init__(self, duration_buckets=DURATION_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.duration_buckets = duration_buckets
+        self.size_buckets     = size_buckets
+        self._lock            = threading.Lock()
+        self.clear()
+
+    def __call__(self, event):
+        with self._lock:
+            endpoint = self._endpoints.get(event.endpoint)
+            if endpoint is None:
+                endpoint = self._endpoints[event.endpoint] = {
+                    'requests':    {},
+                    'errors':      {},
+                    'retries':     0,
+                    'bytes':       0,
+                    'connections': {'new': 0, 'reused': 0},
+                    'durations':   {phase: Histogram(self.duration_buckets) for phase in self.phases},
+                    'sizes':       Histogram(self.size_buckets)
+                }
+
+            status = str(event.status) if event.status is not None else 'none'
+            endpoint['requests'][status] = endpoint['requests'].get(status, 0) + 1
+            if event.error is not None:
+                name = type(event.error).__name__
+                endpoint['errors'][name] = endpoint['errors'].get(name, 0) + 1
+            if event.attempt:
+                endpoint['retries'] += 1
+            if event.reused is not None:
+                endpoint['connections']['reused' if event.reused else 'new'] += 1
+
+            endpoint['bytes'] += event.bytes
+            endpoint['sizes'].observe(event.bytes)
+            for phase in self.phases:
+                value = getattr(event, phase)
+                if value is not None:
+                    endpoint['durations'][phase].observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def snapshot(self):
+        """
+        All metrics as a JSON-serializable dict keyed by endpoint template
+        """
+        with self._lock:
+            return {
+                name: {
+                    'requests':    dict(endpoint['requests']),
+                    'errors':      dict(endpoint['errors']),
+                    'retries':     endpoint['retries'],
+                    'bytes':       endpoint['bytes'],
+                    'connections': dict(endpoint['connections']),
+                    'durations':   {phase: histogram.to_dict() for phase, histogram in endpoint['durations'].items()},
+                    'sizes':       endpoint['sizes'].to_dict()
+                }
+                for name, endpoint in self._endpoints.items()
+            }
+
+    def to_prometheus(self, pool_stats=None, prefix='quantumpy'):
+        """
+        Metrics in the Prometheus text exposition format, with the gauges
+        of QuantumAPI.pool_stats() when given
+        """
+        lines = []
+
+        def metric(name, kind, help):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        def sample(name, labels, value):
+            label = ','.join('{}="{}"'.format(key, _escape(val)) for key, val in labels)
+            lines.append('{}_{}{{{}}} {}'.format(prefix, name, label, _number(value)))
+
+        def histogram(name, labels, histogram):
+            for bound, count in histogram.cumulative():
+                sample(name + '_bucket', labels + [('le', '+Inf' if bound == float('inf') else _number(bound))], count)
+            sample(name + '_sum', labels, histogram.sum)
+            sample(name + '_count', labels, histogram.count)
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            metric('requests_total', 'counter', 'HTTP requests sent to the Quantum API.')
+            for name, endpoint in endpoints:
+                for status, count in sorted(endpoint['requests'].items()):
+                    sample('requests_total', [('endpoint', name), ('status', status)], count)
+
+            metric('errors_total', 'counter', 'Requests that raised an error, by exception type.')
+            for name, endpoint in endpoints:
+                for error, count in sorted(endpoint['errors'].items()):
+                    sample('errors_total', [('endpoint', name), ('error', error)], count)
+
+            metric('retries_total', 'counter', 'Requests that were retries of an earlier attempt.')
+            for name, endpoint in endpoints:
+                sample('retries_total', [('endpoint', name)], endpoint['retries'])
+
+            metric('connections_total', 'counter', 'Requests by whether they opened a new connection or reused a pooled one.')
+            for name, endpoint in endpoints:
+                for state, count in sorted(endpoint['connections'].items()):
+                    sample('connections_total', [('endpoint', name), ('connection', state)], count)
+
+            metric('response_bytes', 'histogram', 'Size of response bodies.')
+            for name, endpoint in endpoints:
+                histogram('response_bytes', [('endpoint', name)], endpoint['sizes'])
+
+            metric('request_duration_seconds', 'histogram', 'Time spent per request phase.')
+            for name, endpoint in endpoints:
+                for phase in self.phases:
+                    histogram('request_duration_seconds', [('endpoint', name), ('phase', phase)], endpoint['durations'][phase])
+
+        if pool_stats:
+            metric('pool_connections', 'gauge', 'Connection pool state.')
+            for key in sorted(pool_stats):
+                sample('pool_connections', [('state', key)], pool_stats[key])
+
+        return '\n'.join(lines) + '\n'
+
+class _ConnectTimer(threading.local):
+    """
+    Time spent opening connections by the current thread since the last reset
+    """
+    def __init__(self):
+        self.seconds = 0.0
+        self.opened  = 0
+
+    def reset(self):
+        self.seconds = 0.0
+        self.opened  = 0
+
+connect_timer = _ConnectTimer()
+
+class _TimedConnection(object):
+    def connect(self):
+        started = time.time()
+        try:
+            super(_TimedConnection, self).connect()
+        finally:
+            connect_timer.seconds += time.time() - started
+            connect_timer.opened  += 1
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections record how long they take to open in `connect_timer`
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http':  _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,157 @@
+import six
+
+NETWORKS = ('facebook', 'twitter', 'instagram', 'youtube')
+
+# Keys naming the profile of a summary record, by preference
+ID_KEYS = ('id', 'profile_id', 'profileId')
+
+class ProjectOverview(object):
+    """
+    Stat summaries of every network of a project as one table: a row per
+    (network, profile_id), holding the profile's metrics with nested
+    objects flattened to dotted names ('stats.fans'). `columns` is the
+    union of the metric names of all networks; a row lacks the metrics its
+    network does not report. `errors` maps each network whose summary
+    failed to its exception, its profiles being absent from the table.
+
+        overview = q.get_project_overview(project_id, since, until)
+        overview.get('twitter', profile_id)
+        overview.to_frame()      # pandas DataFrame indexed by (network, profile_id)
+    """
+    def __init__(self, rows, errors=None):
+        self.rows   = rows
+        self.errors = errors or {}
+        self._index = {(row['network'], row['profile_id']): row for row in rows}
+
+        columns = []
+        for row in rows:
+            for key in row:
+                if key not in columns and key not in ('network', 'profile_id'):
+                    columns.append(key)
+        self.columns = columns
+
+    @classmethod
+    def from_results(cls, results, aliases=None):
+        """
+        Build the table from (network, result, error) tuples, renaming metrics with `aliases`
+        """
+        rows, errors = [], {}
+        for network, result, error in results:
+            if error is not None:
+                errors[network] = error
+            else:
+                rows.extend(normalize(network, result, aliases))
+        return cls(rows, errors)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def networks(self):
+        return sorted(set(row['network'] for row in self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __repr__(self):
+        return '<ProjectOverview {} profiles, networks: {}{}>'.format(
+            len(self.rows), ', '.join(self.networks), ', errors: ' + ', '.join(sorted(self.errors)) if self.errors else ''
+        )
+
+    def get(self, network, profile_id):
+        """
+        The row of a profile, or None
+        """
+        return self._index.get((network, six.text_type(profile_id)))
+
+    def to_frame(self):
+        """
+        DataFrame with a (network, profile_id) index and a column per metric. Requires pandas.
+        """
+        # Imported here, pandas being slow to import
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('ProjectOverview.to_frame requires the pandas package')
+
+        frame = pd.DataFrame(self.rows, columns=['network', 'profile_id'] + self.columns)
+        return frame.set_index(['network', 'profile_id'])
+
+def project_profiles(project):
+    """
+    Profile ids by network from the properties returned by get_project_by_id:
+    lists, under a `profiles` object or at the top level, keyed by network
+    name, of ids or of objects with an id. Pass `profiles` to
+    get_project_overview when the project is laid out otherwise.
+    """
+    source   = project['profiles'] if isinstance(project.get('profiles'), dict) else project
+    profiles = {}
+    for network in NETWORKS:
+        items = source.get(network)
+        if isinstance(items, list) and items:
+            profiles[network] = [_profile_id(item) if isinstance(item, dict) else item for item in items]
+    return profiles
+
+def summary_methods(api):
+    """
+    Stat summary method names by network, from the endpoint registry
+    """
+    return {
+        endpoint.path.split('/')[5]: name
+        for name, endpoint in api.endpoints.items() if endpoint.path.endswith('/profiles/stat-summary')
+    }
+
+def overview_calls(api, project_id, since, until, profiles, timezone='UTC', retry=3):
+    """
+    (network, method, args, kwargs) of the summary call for each network with profiles
+    """
+    methods = summary_methods(api)
+    return [
+        (network, methods[network], (project_id, since, until, list(ids)), {'timezone': timezone, 'retry': retry})
+        for network, ids in sorted(profiles.items()) if ids and network in methods
+    ]
+
+def normalize(network, result, aliases=None):
+    """
+    Rows of one network's stat summary: every summary record flattened,
+    with `network` and `profile_id` columns and metrics renamed with `aliases`
+    """
+    rows = []
+    for record in _summary_records(result):
+        row = {'network': network, 'profile_id': six.text_type(_profile_id(record))}
+        for key, value in _flatten(record):
+            if key not in ID_KEYS:
+                row[aliases.get(key, key) if aliases else key] = value
+        rows.append(row)
+    return rows
+
+def _summary_records(result):
+    """
+    The per-profile records of a summary response: its `data` list, the
+    response itself when it is a list, or the values of an object keyed by id
+    """
+    if isinstance(result, dict) and isinstance(result.get('data'), list):
+        return result['data']
+    if isinstance(result, list):
+        return result
+    if isinstance(result, dict):
+        return [dict(value, id=key) for key, value in result.items() if isinstance(value, dict)]
+    return []
+
+def _profile_id(record):
+    for key in ID_KEYS:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+def _flatten(record, prefix=''):
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for item in _flatten(value, prefix + key + '.'):
+                yield item
+        else:
+            yield prefix + key, value
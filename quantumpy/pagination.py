@@ -0,0 +1,231 @@
+import threading
+import time
+
+from six.moves import queue
+from quantumpy.exceptions import *
+from quantumpy.records import RecordPage
+
+_DONE = object()
+
+def prefetch_pages(pages, depth=1):
+    """
+    Iterate `pages` on a background thread, keeping up to `depth` pages
+    buffered ahead of the consumer. Network time for the next pages
+    overlaps with processing of the current one, while memory stays capped
+    at `depth` buffered pages plus the one being fetched.
+
+    Errors raised while fetching are re-raised in the consumer at the point
+    the failed page would have been yielded. Closing the generator stops
+    the background fetch.
+    """
+    buffer  = queue.Queue(maxsize=max(1, depth))
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+        else:
+            put((_DONE, None))
+
+    worker = threading.Thread(target=fetch)
+    worker.daemon = True
+    worker.start()
+
+    try:
+        while True:
+            page, error = buffer.get()
+            if error is not None:
+                raise error
+            if page is _DONE:
+                return
+            yield page
+    finally:
+        stopped.set()
+
+class PageIterator(object):
+    """
+    Iterator over the pages of a paginated endpoint, following paging.next.
+
+    A page that fails with a QuantumPythonError is retried in place up to
+    `retry` times before the error is raised. After each page, `cursor`
+    holds the paging.next URL of the page that comes after it (None once
+    the last page has been consumed), so a long export can checkpoint it
+    and later resume by passing it back as `cursor=` to the same method:
+
+        pages = q.get_facebook_profiles_posts(..., page=True)
+        for posts in pages:
+            save(posts)
+            checkpoint(pages.cursor)
+
+    With `prefetch`, pages are fetched ahead on a background thread; the
+    cursor still tracks the pages handed to the caller, not the ones
+    buffered. With a `record_class`, pages are RecordPages of it.
+    """
+    def __init__(self, api, method, path, params, retry=0, cursor=None, prefetch=0, record_class=None):
+        self.api          = api
+        self.method       = method
+        self.retry        = retry
+        self.cursor       = cursor
+        self.record_class = record_class
+        self.pages        = 0
+        self.done         = False
+
+        if cursor is not None:
+            path, params = api._split_cursor(cursor, params)
+
+        fetched = self._fetch(path, params)
+        self._pages = prefetch_pages(fetched, prefetch) if prefetch else fetched
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            page, self.cursor = next(self._pages)
+        except StopIteration:
+            self.done = True
+            raise
+        self.pages += 1
+        return page
+
+    next = __next__
+
+    def close(self):
+        self._pages.close()
+
+    def _fetch(self, path, params):
+        page = 0
+        while path:
+            page += 1
+            result, next_url = self.api._retry_request(self.method, path, params, self.retry, page)
+            if self.record_class is not None:
+                result = RecordPage.from_result(result, self.record_class)
+
+            yield result, next_url
+
+            if next_url:
+                path, params = self.api._split_cursor(next_url, params)
+            else:
+                path = None
+
+class RecordIterator(object):
+    """
+    Iterator over the individual records of a paginated endpoint, across
+    all its pages. Each page is parsed incrementally as it is read off the
+    connection, so memory stays flat whatever the page size:
+
+        for post in q.get_facebook_profiles_posts(..., stream=True):
+            save(post)
+
+    `cursor` holds the paging.next URL once a page has been read to the
+    end, and can be passed back as `cursor=` to resume after that page. A
+    page failing midway with a transient error is requested again as
+    allowed by `retry`, skipping the records already yielded. With a
+    `record_class`, records are instances of it instead of dicts.
+    """
+    def __init__(self, api, method, path, params, retry=0, cursor=None, key='data', record_class=None):
+        self.api          = api
+        self.method       = method
+        self.retry        = retry
+        self.cursor       = cursor
+        self.key          = key
+        self.record_class = record_class
+        self.pages        = 0
+        self.records      = 0
+        self.done         = False
+
+        if cursor is not None:
+            path, params = api._split_cursor(cursor, params)
+
+        self._rest    = {}
+        self._records = self._fetch(path, params)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            record = next(self._records)
+        except StopIteration:
+            self.done = True
+            raise
+        self.records += 1
+        return record
+
+    next = __next__
+
+    def close(self):
+        self._records.close()
+
+    def _fetch(self, path, params):
+        while path:
+            for record in self._page(path, params, self.pages + 1):
+                yield record if self.record_class is None else self.record_class.from_dict(record)
+
+            try:
+                self.cursor = self._rest['paging']['next']
+            except (KeyError, TypeError):
+                self.cursor = None
+            self.pages += 1
+
+            if self.cursor:
+                path, params = self.api._split_cursor(self.cursor, params)
+            else:
+                path = None
+
+    def _page(self, path, params, page):
+        """
+        Stream the records of one page, retrying like QuantumAPI._retry_request
+        """
+        policy  = self.api.retry_policy
+        attempt = 0
+        relogin = True
+        sent    = 0
+        tries   = 0
+        probe   = False
+
+        try:
+            while True:
+                if not probe:
+                    probe = policy.before_request()
+                parser = self.api._stream_parser(self.key)
+                try:
+                    tries += 1
+                    for i, record in enumerate(self.api._stream(self.method, path, params, parser, tries - 1, page)):
+                        if i >= sent:
+                            sent += 1
+                            yield record
+                except AuthenticationError:
+                    if not relogin:
+                        raise
+                    relogin = False
+                    self.api._ensure_token(force=True)
+                except QuantumPythonError as e:
+                    probe = False
+                    policy.record_failure(e)
+                    delay = policy.delay(attempt, e) if attempt < self.retry and policy.is_retryable(e) else None
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    time.sleep(delay)
+                else:
+                    probe = False
+                    policy.record_success()
+                    self._rest = parser.rest
+                    return
+        finally:
+            if probe:
+                policy.release_probe()
@@ -4,20 +4,123 @@ except ImportError:
     import json
 import requests
 import six
-
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from quantumpy.auth import jwt_expiry
+from quantumpy.batch import BatchExecutor
+from quantumpy.coalesce import SingleFlight, request_key
+from quantumpy.columnar import ColumnarSeries
+from quantumpy.decoding import get_decoder, parse_float
+from quantumpy.endpoints import install as install_endpoints
 from quantumpy.exceptions import *
-from decimal import Decimal
-from urlparse import urlparse, parse_qsl
+from quantumpy.join import check_options, interactions_method, join_interactions
+from quantumpy.metrics import RequestEvent, TimedHTTPAdapter, connect_timer
+from quantumpy.overview import ProjectOverview, overview_calls, project_profiles
+from quantumpy.pagination import PageIterator, RecordIterator
+from quantumpy.records import RecordPage
+from quantumpy.retry import RetryPolicy, parse_retry_after
+from quantumpy.series import date_windows, merge_results
+from quantumpy.streaming import StreamParser
+from quantumpy.validators import ValidatorStore
+from six.moves.urllib.parse import urlparse, parse_qsl, urlencode, quote_plus
+
+_compact_json = json.JSONEncoder(separators=(',', ':'))
 
 class QuantumAPI(object):
-    def __init__(self, secret, baseurl='https://quantum.socialmetrix.com/api', version='v1', timeout=None):
-        self.secret     = secret
-        self.baseurl    = baseurl.strip('/')
-        self.url        = baseurl.strip('/') + '/' + version.strip('/')
-        self.session    = requests.Session()
-        self.timeout    = timeout
-        self.jwt, self.account_id = self.authenticate()
-        self.headers    = {'X-Auth-Token': self.jwt}
+    stream_chunk_size = 65536
+
+    def __init__(self, secret, baseurl='https://quantum.socialmetrix.com/api', version='v1', timeout=None, pool_size=10, cache=None, max_workers=8, max_url_length=4000, ids_batch_size=None, token_cache=None, refresh_margin=60, retry_policy=None, rate_limiter=None, decoder='fast', hooks=None, coalesce=True, validators=None, warehouse=None):
+        self._configure(secret, baseurl, version, timeout, cache, max_url_length, ids_batch_size, token_cache, refresh_margin, retry_policy, rate_limiter, decoder, hooks, validators, warehouse)
+        self.session     = requests.Session()
+        self.max_workers = max_workers
+        self.pool_size   = 0
+        self._resize_pool(max(pool_size, max_workers))
+        self.coalesce    = SingleFlight() if coalesce is True else coalesce or None
+        self._auth_lock  = threading.Lock()
+
+    def _configure(self, secret, baseurl, version, timeout, cache, max_url_length, ids_batch_size, token_cache, refresh_margin, retry_policy, rate_limiter, decoder, hooks, validators, warehouse):
+        """
+        Settings shared with AsyncQuantumAPI, which brings its own session and coalescing
+        """
+        self.secret  = secret
+        self.baseurl = baseurl.strip('/')
+        self.url     = baseurl.strip('/') + '/' + version.strip('/')
+        self.timeout = timeout
+        self.cache   = cache
+
+        self.max_url_length = max_url_length
+        self.ids_batch_size = ids_batch_size
+        self.retry_policy   = retry_policy or RetryPolicy()
+        self.rate_limiter   = rate_limiter
+        self.decoder        = get_decoder(decoder)
+        self.hooks          = list(hooks or [])
+        self.validators     = ValidatorStore() if validators is True else validators or None
+        self.warehouse      = warehouse
+
+        # Authentication is deferred until the first request needs the token
+        self.token_cache    = token_cache
+        self.refresh_margin = refresh_margin
+        self._jwt           = None
+        self._account_id    = None
+        self._refresh_at    = None
+
+    @property
+    def jwt(self):
+        self._ensure_token()
+        return self._jwt
+
+    @property
+    def account_id(self):
+        self._ensure_token()
+        return self._account_id
+
+    @property
+    def headers(self):
+        return {'X-Auth-Token': self.jwt}
+
+    def _ensure_token(self, force=False):
+        """
+        Log in if there is no token yet, it expires within `refresh_margin`
+        seconds, or `force` is set (the server rejected it). A token from
+        the token cache is used instead of logging in when still valid.
+        """
+        if not force and not self._token_expiring():
+            return
+
+        with self._auth_lock:
+            if not force and not self._token_expiring():
+                return
+
+            stale = self._jwt
+            key   = self.token_cache.key(self.url, self.secret) if self.token_cache is not None else None
+
+            if key is not None:
+                cached = self.token_cache.load(key)
+                if cached is not None and cached[0] != stale:
+                    self._set_token(*cached)
+                    if not self._token_expiring():
+                        return
+
+            self._set_token(*self.authenticate())
+            if key is not None:
+                self.token_cache.store(key, self._jwt, self._account_id)
+
+    def _set_token(self, jwt, account_id):
+        now     = time.time()
+        expires = jwt_expiry(jwt)
+
+        self._jwt        = jwt
+        self._account_id = account_id
+
+        # Short-lived tokens are refreshed halfway through their lifetime at the latest
+        self._refresh_at = expires - min(self.refresh_margin, (expires - now) / 2) if expires is not None else None
+
+    def _token_expiring(self):
+        if self._jwt is None:
+            return True
+        return self._refresh_at is not None and self._refresh_at <= time.time()
 
     def authenticate(self):
         data = {'method': 'API-SECRET', 'secret': self.secret}
@@ -31,682 +134,540 @@ class QuantumAPI(object):
             else:
                 return response.json()['jwt'], response.json()['user']['accountId']
 
-    def get_projects(self, retry=3):
-        """
-        /accounts/{account_id}/projects
-        Get all available projects for account
+    def batch(self, calls, max_workers=8, ordered=True):
         """
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects'.format(self.account_id),
-            retry  = retry
-        )
+        Run several endpoint method calls concurrently over this client's session.
+        Each call is a BatchCall, a method name or a (method, args[, kwargs]) tuple:
 
-        if response is False:
-            raise QuantumError('Could not get projects.')
-
-        return response
+            q.batch([
+                ('get_facebook_profiles_stat_summary', (project_id, since, until, ids)),
+                ('get_twitter_profiles_stat_summary', (project_id, since, until, ids)),
+            ])
 
-    def get_project_by_id(self, project_id, retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}
-        Get project properties by id
+        Returns a list of BatchResult in call order, or, when ordered is False,
+        an iterator yielding them as they complete. Failed calls carry their
+        exception in BatchResult.error instead of raising.
         """
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}'.format(self.account_id, project_id)
-        )
-
-        if response is False:
-            raise QuantumError('Could not get project {}.'.format(project_id))
+        if ordered:
+            with BatchExecutor(self, max_workers) as executor:
+                return list(executor.map(calls))
+        return self._batch_as_completed(calls, max_workers)
 
-        return response
-
-    def get_facebook_profiles_stat_summary(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/stat-summary?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        Get stat summary for fanpages within a project
+    def get_project_overview(self, project_id, since, until, profiles=None, timezone='UTC', retry=3, aliases=None):
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/stat-summary'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get stat summary for project {}.'.format(project_id))
+        Stat summaries of every network of a project, requested concurrently
+        and returned as one ProjectOverview table keyed by network and profile.
 
-        return response
+        `profiles` gives the profile ids by network ({'facebook': [...], ...});
+        by default they are read from get_project_by_id() with project_profiles,
+        or with `profiles(project)` when it is a function. A network whose
+        summary fails is reported in ProjectOverview.errors.
 
-    def get_facebook_profiles_posts(self, project_id, fanpage_id, since, until, ids, owner=None, type=None, page=False, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/{fanpage_id}/posts?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            owner={owner}
-            type={type}
-            timezone={timezone}
-        Get all posts for a given fanpage and period
+            overview = q.get_project_overview(project_id, since, until)
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/{}/posts'.format(self.account_id, project_id, fanpage_id),
-            params = params,
-            retry  = retry,
-            page   = page
-        )
+        if not isinstance(profiles, dict):
+            profiles = (profiles or project_profiles)(self.get_project_by_id(project_id, retry=retry))
 
-        if response is False:
-            raise QuantumError('Could not get posts for fanpage {}.'.format(fanpage_id))
-
-        return response
-
-    def get_facebook_profiles_post_interactions(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/posts-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
-        Get post interactions for posts within a project
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/posts-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
+        calls   = overview_calls(self, project_id, since, until, profiles, timezone, retry)
+        results = self.batch([call[1:] for call in calls], max_workers=len(calls)) if calls else []
+        return ProjectOverview.from_results(
+            [(call[0], result.result, result.error) for call, result in zip(calls, results)], aliases
         )
 
-        if response is False:
-            raise QuantumError('Could not get post interactions for project {}.'.format(project_id))
-
-        return response
-
-    def get_facebook_fans_total_by_country(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def posts_with_interactions(self, method, project_id, profile_id, since, until, ids, interactions=None, key='interactions', batch_size=100, concurrency=4, timezone='UTC', retry=3, **kwargs):
         """
-        /accounts/{account_id}/projects/{project_id}/facebook/fans/total/country?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/fans/total/country'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        Stream the posts of a paginated `method` (get_facebook_profiles_posts,
+        get_instagram_profiles_posts, get_youtube_profiles_videos...), each one
+        with its interactions series for [since, until] under `key`.
 
-        if response is False:
-            raise QuantumError('Could not get fans by country for profile {}.'.format(project_id))
+        The interactions of every page are requested as soon as the page
+        arrives, `batch_size` ids per call and up to `concurrency` calls at a
+        time, while the next page of posts is being fetched; posts keep their
+        order. `interactions` overrides the interactions method paired with
+        `method` in quantumpy.join.INTERACTIONS.
 
-        return response
-
-    def get_facebook_fans_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
+            for post in q.posts_with_interactions('get_facebook_profiles_posts', project_id, fanpage_id, since, until, ids):
+                post['interactions']
         """
-        /accounts/{account_id}/projects/{project_id}/facebook/fans/count/date?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/fans/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
+        check_options(kwargs)
+        return join_interactions(
+            self, method, project_id, profile_id, since, until, ids, interactions_method(method, interactions), key, batch_size, concurrency, timezone, retry, **kwargs
         )
 
-        if response is False:
-            raise QuantumError('Could not get fans by date for profile {}.'.format(project_id))
-
-        return response
+    def _batch_as_completed(self, calls, max_workers):
+        with BatchExecutor(self, max_workers) as executor:
+            for result in executor.map(calls, ordered=False):
+                yield result
 
-    def get_facebook_profiles_interactions_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def _resize_pool(self, size):
         """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
+        Grow the session's connection pool so `size` threads can hold a connection at once
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        if size <= self.pool_size:
+            return
 
-        if response is False:
-            raise QuantumError('Could not get fans by date for profile {}.'.format(project_id))
+        adapter = TimedHTTPAdapter(pool_connections=size, pool_maxsize=size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.pool_size = size
 
-        return response
-
-    def get_facebook_profiles_posts_count_by_date(self, project_id, since, until, ids, owner=None, type=None, timezone='UTC', retry=3):
+    def pool_stats(self):
         """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/posts/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            owner={owner}
-            type={type}
-            timezone={timezone}
+        Connection pool state: pooled connections created so far, requests
+        sent through the pools, idle connections and the pools' capacity.
+        Whether each request actually reused an open socket is reported by
+        RequestEvent.reused.
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/posts/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        stats = {'pools': 0, 'opened': 0, 'requests': 0, 'idle': 0, 'maxsize': 0}
 
-        if response is False:
-            raise QuantumError('Could not get post count by date for profile {}.'.format(project_id))
+        for adapter in set(self.session.adapters.values()):
+            manager = getattr(adapter, 'poolmanager', None)
+            if manager is None:
+                continue
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                stats['pools']    += 1
+                stats['opened']   += pool.num_connections
+                stats['requests'] += pool.num_requests
+                if pool.pool is not None:
+                    # The queue is filled with None placeholders for connections not opened yet
+                    stats['idle']    += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                    stats['maxsize'] += pool.pool.maxsize
 
-        return response
+        return stats
 
-    def get_facebook_profiles_postinteractions_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def _call(self, endpoint, args, params, retry=0, records=False, **options):
         """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/posts-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
+        Run the call of a generated endpoint method (see quantumpy.endpoints)
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
+        # Columnar results are built after the raw response has been stored
+        store    = self.warehouse is not None and endpoint.chunkable
+        columnar = store and options.pop('columnar', False)
         response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/posts-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
+            endpoint.method,
+            endpoint.template.format(self.account_id, *args),
+            params,
+            retry,
+            records = endpoint.record_class if records else None,
+            **options
         )
 
         if response is False:
-            raise QuantumError('Could not get post interactions for posts {}'.format(ids))
+            raise QuantumError(endpoint.error_message(args, params))
 
-        return response
-
-    def get_facebook_profiles_engagementrate_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/engagement-rate/date?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/facebook/profiles/engagement-rate/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get engagement rate by date for profile {}.'.format(project_id))
-
-        return response
-
-    def get_twitter_profiles_stat_summary(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/twitter/profiles/stat-summary?
-            since={start_date}
-            until={end_date}
-            ids={profiles}
-            timezone={timezone}
-        Get stat summary for fanpages within a project
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/stat-summary'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get Twitter stat summary for project {}.'.format(project_id))
-
-        return response
-
-    def get_twitter_profiles_interactions_received_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/twitter/profiles/interactions-received/count/date?
-            since={start_date}
-            until={end_date}
-            ids={profiles}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/interactions-received/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get interactions received count by date for profile {}.'.format(project_id))
-
-        return response
-
-    def get_twitter_profiles_interactions_sent_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/twitter/profiles/interactions-sent/count/date?
-            since={start_date}
-            until={end_date}
-            ids={profiles}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/interactions-sent/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get interactions sent count by date for profile {}.'.format(project_id))
+        if store:
+            return self._stored(endpoint, args, params, response, columnar)
 
         return response
 
-    def get_twitter_profiles_engagement_rate_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def _stored(self, endpoint, args, params, response, columnar=False):
         """
-        /accounts/{account_id}/projects/{project_id}/twitter/profiles/engagement-rate/date?
-            since={start_date}
-            until={end_date}
-            ids={profiles}
-            timezone={timezone}
+        Store a by-date response in the warehouse, then make it columnar if asked to
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/engagement-rate/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        # Filtered series only hold part of the metric
+        if isinstance(response, (dict, list)) and params.get('owner') is None and params.get('type') is None:
+            self.warehouse.store(endpoint.name, args[0], response, params.get('timezone') or 'UTC', params.get('since'), params.get('until'), params.get('ids'))
 
-        if response is False:
-            raise QuantumError('Could not get engagement rate by date for profile {}.'.format(project_id))
+        return ColumnarSeries.from_result(response) if columnar else response
 
-        return response
+    def _query(self, method, path, params=None, retry=0, page=False, prefetch=0, cursor=None, chunk=None, columnar=False, stream=False, records=None):
+        if columnar:
+            return ColumnarSeries.from_result(self._query(method, path, params, retry, chunk=chunk))
 
-    def get_twitter_reach_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/twitter/reach/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/reach/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        path, params = self._prepare(path, params)
 
-        if response is False:
-            raise QuantumError('Could not get reach count by date for profile {}.'.format(project_id))
+        if stream:
+            return RecordIterator(self, method, path, params, retry=retry, cursor=cursor, record_class=records)
 
-        return response
+        if page:
+            return PageIterator(self, method, path, params, retry=retry, cursor=cursor, prefetch=prefetch, record_class=records)
 
-    def get_twitter_profiles_tweets(self, project_id, profile_id, since, until, ids, owner=None, type=None, page=False, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/facebook/profiles/{profile_id}/tweets?
-            since={start_date}
-            until={end_date}
-            ids={profiles}
-            owner={owner}
-            type={type}
-            timezone={timezone}
-        Get all tweets for a given profile and period
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/{}/tweets'.format(self.account_id, project_id, profile_id),
-            params = params,
-            retry  = retry,
-            page   = page
-        )
+        if records is not None:
+            return RecordPage.from_result(self._query(method, path, params, retry), records)
 
-        if response is False:
-            raise QuantumError('Could not get tweets for profile {}.'.format(profile_id))
-
-        return response
-
-    def get_twitter_profiles_tweet_interactions(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/twitter/profiles/tweet-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
-        Get post interactions for posts within a project
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/twitter/profiles/tweet-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        if chunk is not None:
+            return self._chunked_query(method, path, params, retry, chunk)
 
-        if response is False:
-            raise QuantumError('Could not get tweet interactions for project {}.'.format(project_id))
+        batches = self._split_ids(path, params)
+        if len(batches) > 1:
+            return merge_results(self._parallel(
+                lambda ids: self._query(method, path, dict(params, ids=ids), retry),
+                batches
+            ))
 
-        return response
+        if self.coalesce is None:
+            return self._fetch(method, path, params, retry)
 
-    def get_instagram_profiles_stat_summary(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/stat-summary?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        Get stat summary for instagram profiles within a project
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/stat-summary'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
+        # Identical calls made while this one is in flight wait for its result
+        return self.coalesce.do(
+            request_key(method, self.url + path, params),
+            lambda: self._fetch(method, path, params, retry)
         )
 
-        if response is False:
-            raise QuantumError('Could not get instagram stat summary for project {}.'.format(project_id))
-
-        return response
-
-    def get_instagram_profiles_posts(self, project_id, fanpage_id, since, until, ids, owner=None, type=None, page=False, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/{fanpage_id}/posts?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            owner={owner}
-            type={type}
-            timezone={timezone}
-        Get all posts for a given intagram profile and period
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/{}/posts'.format(self.account_id, project_id, fanpage_id),
-            params = params,
-            retry  = retry,
-            page   = page
-        )
+    def _fetch(self, method, path, params, retry):
+        if self.cache is None:
+            return self._retry_request(method, path, params, retry)[0]
+
+        key    = self.cache.key(method, self.url + path, params)
+        result = self.cache.get(key)
+        if result is None:
+            ttl    = self.cache.ttl(params)
+            result = self._retry_request(method, path, params, retry)[0]
+            self.cache.set(key, result, ttl)
+
+        return result
+
+    def _chunked_query(self, method, path, params, retry, chunk):
+        """
+        Split the since/until range into `chunk` sized windows, fetch them
+        concurrently and merge the per-window responses into one
+        """
+        windows = date_windows(params['since'], params['until'], chunk)
+        if len(windows) == 1:
+            return self._query(method, path, params, retry)
+
+        return merge_results(self._parallel(
+            lambda window: self._query(method, path, dict(params, since=window[0], until=window[1]), retry),
+            windows
+        ))
+
+    def _split_ids(self, path, params):
+        """
+        Split a list `ids` param into batches of at most `ids_batch_size`
+        ids whose request URL stays under `max_url_length` characters
+        """
+        ids = (params or {}).get('ids')
+        if not isinstance(ids, (list, tuple, set)):
+            return [ids]
+
+        # Percent-encoding at most triples the length of each byte, so most calls need no exact measure
+        if self.ids_batch_size is None or len(ids) <= self.ids_batch_size:
+            bound = len(self.url) + len(path) + 1
+            for key, value in self._encode_params(params).items():
+                if isinstance(value, six.text_type):
+                    value = value.encode('utf-8')
+                elif not isinstance(value, bytes):
+                    value = str(value)
+                bound += len(key) + 2 + 3 * len(value)
+            if bound <= self.max_url_length:
+                return [ids]
+
+        others = {key: value for key, value in params.items() if key != 'ids'}
+        base   = len(self.url + path + '?' + urlencode(self._encode_params(others), doseq=True) + '&ids=%5B%5D')
+
+        batches, batch, length = [], [], base
+        for id in ids:
+            size = len(quote_plus(json.dumps(id))) + len('%2C')
+            if batch and (length + size > self.max_url_length or len(batch) == self.ids_batch_size):
+                batches.append(batch)
+                batch, length = [], base
+            batch.append(id)
+            length += size
+
+        batches.append(batch)
+        return batches
+
+    def _parallel(self, function, items):
+        if len(items) == 1:
+            return [function(items[0])]
+
+        with ThreadPoolExecutor(max_workers=min(len(items), self.max_workers)) as executor:
+            return list(executor.map(function, items))
+
+    def _prepare(self, path, params):
+        if not path.startswith('/'):
+            if six.PY2:
+                path = '/' + six.text_type(path.decode('utf-8'))
+            else:
+                path = '/' + path
 
-        if response is False:
-            raise QuantumError('Could not get posts for instagram profile {}.'.format(fanpage_id))
+        params = {param: params[param] for param in params if params[param] is not None} if params is not None else None
 
-        return response
+        return path, params
 
-    def get_instagram_profiles_post_interactions(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def _split_cursor(self, cursor, params):
         """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/posts-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
-        Get post interactions for posts within a project
+        Turn a paging.next URL into the (path, params) to request it with.
+        Params are kept from the previous page when the URL has no query.
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/posts-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        url  = urlparse(cursor)
+        path = url[2]
 
-        if response is False:
-            raise QuantumError('Could not get instagram post interactions for project {}.'.format(project_id))
+        if url[1]:
+            base = urlparse(self.url)[2]
+            if path.startswith(base + '/'):
+                path = path[len(base):]
 
-        return response
+        if url[4] != '':
+            params = dict(parse_qsl(url[4]))
 
-    def get_instagram_profiles_interactions_count_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        return path, params
 
-        if response is False:
-            raise QuantumError('Could not get fans by date for instagram profile {}.'.format(project_id))
-
-        return response
-
-    def get_instagram_profiles_posts_count_by_date(self, project_id, since, until, ids, owner=None, type=None, timezone='UTC', retry=3):
+    def _retry_request(self, method, path, params, retry, page=None):
         """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/posts/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            owner={owner}
-            type={type}
-            timezone={timezone}
+        Send a request, retrying transient errors up to `retry` times as
+        dictated by the retry policy, and logging in again once if the
+        token is rejected
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/posts/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        policy  = self.retry_policy
+        attempt = 0
+        relogin = True
+        tries   = 0
+        probe   = False
 
-        if response is False:
-            raise QuantumError('Could not get post count by date for instagram profile {}.'.format(project_id))
-
-        return response
-
-    def get_instagram_profiles_postinteractions_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/instagram/profiles/posts-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/instagram/profiles/posts-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+        try:
+            while True:
+                if not probe:
+                    probe = policy.before_request()
+                try:
+                    tries += 1
+                    result = self._request(method, path, params, tries - 1, page)
+                except AuthenticationError:
+                    if not relogin:
+                        raise
+                    relogin = False
+                    self._ensure_token(force=True)
+                except QuantumPythonError as e:
+                    probe = False
+                    policy.record_failure(e)
+                    delay = policy.delay(attempt, e) if attempt < retry and policy.is_retryable(e) else None
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    time.sleep(delay)
+                else:
+                    probe = False
+                    policy.record_success()
+                    return result
+        finally:
+            if probe:
+                policy.release_probe()
+
+    def _encode_params(self, params):
+        """
+        JSON-encode list, tuple, set and dict param values, as the API expects them
+        """
+        if not params:
+            return params
+
+        encoded = {}
+        for key, value in params.items():
+            if isinstance(value, (list, dict)):
+                value = _compact_json.encode(value)
+            elif isinstance(value, (tuple, set)):
+                value = _compact_json.encode(list(value))
+            encoded[key] = value
+        return encoded
+
+    def _request(self, method, path, params, attempt=0, page=None):
+        params = self._encode_params(params)
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.account_id, path)
+
+        event = RequestEvent(method, path, attempt, page) if self.hooks else None
+        try:
+            result = self._send(method, path, params, event)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                self._emit(event)
 
-        if response is False:
-            raise QuantumError('Could not get instagram post interactions for posts {}'.format(ids))
+        try:
+            next_url = result['paging']['next']
+        except(KeyError, TypeError):
+            next_url = None
 
-        return response
+        return result, next_url
 
-    def get_youtube_profiles_stat_summary(self, project_id, since, until, ids, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/youtube/profiles/stat-summary?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            timezone={timezone}
-        Get stat summary for instagram profiles within a project
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/youtube/profiles/stat-summary'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
+    def _send(self, method, path, params, event=None):
+        key, entry, headers = self._conditional(method, path, params)
 
-        if response is False:
-            raise QuantumError('Could not get youtube stat summary for project {}.'.format(project_id))
+        connect_timer.reset()
+        started = time.time()
 
-        return response
+        try:
+            if method == 'GET':
+                response = self.session.request(
+                    method,
+                    self.url + path,
+                    params          = params,
+                    allow_redirects = True,
+                    timeout         = self.timeout,
+                    headers         = headers,
+                    stream          = True
+                )
+            if method in ['POST', 'PUT', 'DELETE']:
+                raise NotImplementedError(
+                    'Quantum API does not yet support {} requests'.format(method)
+                )
 
-    def get_youtube_profiles_videos(self, project_id, fanpage_id, since, until, ids, owner=None, type=None, page=False, timezone='UTC', retry=3):
-        """
-        /accounts/{account_id}/projects/{project_id}/youtube/profiles/{fanpage_id}/videos?
-            since={start_date}
-            until={end_date}
-            ids={fanpages}
-            owner={owner}
-            type={type}
-            timezone={timezone}
-        Get all posts for a given channel and period
-        """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'owner', 'type', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/youtube/profiles/{}/videos'.format(self.account_id, project_id, fanpage_id),
-            params = params,
-            retry  = retry,
-            page   = page
-        )
+            headers_at = time.time()
+            content    = response.content
+        except requests.RequestException as e:
+            raise HTTPError(e)
+        finally:
+            if event is not None:
+                self._time_connect(event)
+
+        if event is None:
+            return self._handle_response(key, entry, response.status_code, response.headers, content)
+
+        downloaded     = time.time()
+        event.status   = response.status_code
+        event.bytes    = len(content)
+        event.ttfb     = headers_at - started
+        event.download = downloaded - headers_at
+        try:
+            return self._handle_response(key, entry, response.status_code, response.headers, content)
+        finally:
+            event.decode = time.time() - downloaded
+            event.total  = time.time() - started
 
-        if response is False:
-            raise QuantumError('Could not get videos for channel {}.'.format(fanpage_id))
+    def _time_connect(self, event):
+        event.connect = connect_timer.seconds
+        event.reused  = connect_timer.opened == 0
+        event.total   = time.time() - event.started
 
-        return response
+    def _emit(self, event):
+        for hook in self.hooks:
+            hook(event)
 
-    def get_youtube_profiles_videointeractions_by_date(self, project_id, since, until, ids, timezone='UTC', retry=3):
+    def _stream(self, method, path, params, parser, attempt=0, page=None):
         """
-        /accounts/{account_id}/projects/{project_id}/youtube/profiles/video-interactions/count/date?
-            since={start_date}
-            until={end_date}
-            ids={posts}
-            timezone={timezone}
+        Send a request and yield the records of its body as `parser` reads
+        them off the connection; the other members of the body are left in
+        `parser.rest`
         """
-        args = locals()
-        params = {param: args[param] for param in ['since', 'until', 'ids', 'timezone']}
-        response = self._query(
-            method = 'GET',
-            path   = '/accounts/{}/projects/{}/youtube/profiles/video-interactions/count/date'.format(self.account_id, project_id),
-            params = params,
-            retry  = retry
-        )
-
-        if response is False:
-            raise QuantumError('Could not get post interactions for posts {}'.format(ids))
-
-        return response
-
-    def _query(self, method, path, params=None, retry=0, page=False):
-        if not path.startswith('/'):
-            if six.PY2:
-                path = '/' + six.text_type(path.decode('utf-8'))
-            else:
-                path = '/' + path
-
-        params = {param: params[param] for param in params if params[param] is not None} if params is not None else None
-
-        try:
-            if page:
-                return self._paginate(method, path, params)
-            else:
-                return self._request(method, path, params)[0]
-        except QuantumPythonError:
-            if retry:
-                return self._query(method, path, params, retry - 1)
-            else:
-                raise
-
-    def _paginate(self, method, path, params):
-        while path:
-            if urlparse(path)[4] != '':
-                params = dict(parse_qsl(urlparse(path)[4]))
-                path = urlparse(path)[2]
+        if method != 'GET':
+            raise NotImplementedError(
+                'Quantum API does not yet support {} requests'.format(method)
+            )
 
-            result, path = self._request(method, path, params)
+        params = self._encode_params(params)
 
-            yield result
-
-    def _request(self, method, path, params):
-        if params:
-            for key in params:
-                value = params[key]
-            if isinstance(value, (list, dict, set)):
-                params[key] = json.dumps(value)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.account_id, path)
 
+        event = RequestEvent(method, path, attempt, page) if self.hooks else None
         try:
-            if method == 'GET':
+            connect_timer.reset()
+            try:
                 response = self.session.request(
                     method,
                     self.url + path,
                     params          = params,
                     allow_redirects = True,
                     timeout         = self.timeout,
-                    headers         = self.headers
-                )
-            if method in ['POST', 'PUT', 'DELETE']:
-                raise NotImplementedError(
-                    'Quantum API does not yet support {} requests'.format(method)
+                    headers         = self.headers,
+                    stream          = True
                 )
+            except requests.RequestException as e:
+                raise HTTPError(e)
+            finally:
+                if event is not None:
+                    self._time_connect(event)
+                    event.ttfb = event.total
+
+            if event is not None:
+                event.status = response.status_code
+
+            try:
+                if response.status_code != 200:
+                    records = parser.load(self._parse_page(response.status_code, response.headers, response.content))
+                else:
+                    records = self._stream_records(response, parser, event)
+
+                for record in records:
+                    yield record
+            finally:
+                response.close()
+
+            self._check(parser.rest)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                event.total    = time.time() - event.started
+                event.download = event.total - event.ttfb if event.ttfb is not None else None
+                self._emit(event)
+
+    def _stream_records(self, response, parser, event=None):
+        try:
+            for chunk in response.iter_content(self.stream_chunk_size):
+                if event is not None:
+                    event.bytes += len(chunk)
+                for record in parser.feed(chunk):
+                    yield record
         except requests.RequestException as e:
             raise HTTPError(e)
 
-        result = self._parse(response.content)
+        for record in parser.close():
+            yield record
 
-        try:
-            next_url = result['paging']['next']
-        except(KeyError, TypeError):
-            next_url = None
+    def _stream_parser(self, key='data'):
+        return StreamParser(key, parse_float(self.decoder))
 
-        return result, next_url
+    def _conditional(self, method, path, params):
+        """
+        Key and stored response of a GET request when revalidating with
+        `validators`, and the headers to send the request with
+        """
+        if self.validators is None or method != 'GET':
+            return None, None, self.headers
+
+        key   = request_key(method, self.url + path, params)
+        entry = self.validators.get(key)
+        if entry is None:
+            return key, None, self.headers
+        return key, entry, dict(self.headers, **entry.headers())
+
+    def _handle_response(self, key, entry, status_code, headers, content):
+        if key is None:
+            return self._parse_response(status_code, headers, content)
+        return self.validators.revalidate(key, entry, status_code, headers, content, lambda content: self._parse_response(status_code, headers, content))
+
+    def _parse_response(self, status_code, headers, content):
+        if status_code in (429, 503):
+            error = RateLimitError if status_code == 429 else ServiceUnavailableError
+            raise error(
+                'HTTP {} from Quantum API'.format(status_code),
+                status_code = status_code,
+                retry_after = parse_retry_after(headers.get('Retry-After'))
+            )
+
+        try:
+            return self._parse(content)
+        except ValueError:
+            if status_code >= 400:
+                raise HTTPError('HTTP {} from Quantum API'.format(status_code), status_code=status_code)
+            raise
+
+    def _parse_page(self, status_code, headers, content):
+        """
+        Parse a page that was not streamed, raising HTTPError for an error
+        status whose body _check does not recognize, rather than reading it
+        as a page without records
+        """
+        data = self._parse_response(status_code, headers, content)
+        if status_code >= 400:
+            message = data.get('message') if isinstance(data, dict) else None
+            raise HTTPError('HTTP {} from Quantum API{}'.format(status_code, ': {}'.format(message) if message else ''), status_code=status_code)
+        return data
 
     def _parse(self, data):
-        if type(data) == type(bytes()):
-            data = data.decode('utf-8')
-        data = json.loads(data, parse_float=Decimal)
+        data = self.decoder(data)
+        self._check(data)
+        return data
 
+    def _check(self, data):
         if type(data) is dict:
             if 'code' in data:
                 if data['code'] == 'authentication':
@@ -717,4 +678,4 @@ class QuantumAPI(object):
                 elif 'Internal server error' in data['message']:
                     raise InternalServerError(data['message'])
 
-        return data
+install_endpoints(QuantumAPI)
@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+import time
+
+class TokenBucket(object):
+    """
+    In-process token bucket refilled at `rate` tokens per second, holding at
+    most `capacity` tokens (the allowed burst).
+
+    reserve() always takes a token, letting the bucket go into debt, and
+    returns how long the caller must wait before using it. Concurrent
+    callers are thus queued fairly instead of polling. `clock` returns the
+    current time in seconds.
+    """
+    def __init__(self, rate, capacity=None, clock=time.time):
+        self.rate     = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self.clock    = clock
+        self.tokens   = self.capacity
+        self.updated  = clock()
+        self._lock    = threading.Lock()
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            now = self.clock()
+            self.tokens, self.updated = _take(self.tokens, self.updated, now, self.rate, self.capacity, tokens)
+            return max(0.0, -self.tokens / self.rate)
+
+class SQLiteTokenBucket(object):
+    """
+    Token bucket whose state lives in a SQLite file, so every process using
+    the same `path` and `name` draws from one shared budget.
+    """
+    def __init__(self, path, name, rate, capacity=None, clock=time.time):
+        self.path     = path
+        self.name     = name
+        self.rate     = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self.clock    = clock
+        self._local   = threading.local()
+
+        db = self._connection()
+        db.execute('CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def reserve(self, tokens=1):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            now = self.clock()
+            row = db.execute('SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)).fetchone()
+            level, updated = row if row is not None else (self.capacity, now)
+            level, updated = _take(level, updated, now, self.rate, self.capacity, tokens)
+            db.execute('INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)', (self.name, level, updated))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return max(0.0, -level / self.rate)
+
+class RateLimiter(object):
+    """
+    Client-side rate limiting for QuantumAPI requests: an account-wide
+    bucket plus optional per endpoint family buckets (facebook, twitter,
+    instagram, youtube). Rates are in requests per second, given either as
+    a number or as a (rate, burst) tuple:
+
+        limiter = RateLimiter(rate=20, families={'facebook': 10, 'twitter': (5, 10)})
+        q = QuantumAPI(api_secret, rate_limiter=limiter)
+
+    With `path`, the buckets are kept in that SQLite file and shared by all
+    processes using it; otherwise they are local to this limiter, which can
+    still be shared by several clients and threads. `clock` is given to the
+    buckets.
+    """
+    def __init__(self, rate=None, families=None, path=None, clock=time.time):
+        self.rate     = rate
+        self.families = families or {}
+        self.path     = path
+        self.clock    = clock
+        self._buckets = {}
+        self._lock    = threading.Lock()
+
+    def reserve(self, account_id, path):
+        """
+        Take a token for a request to `path`, returning the seconds to wait before sending it
+        """
+        wait = 0.0
+        if self.rate is not None:
+            wait = self._bucket('account:{}'.format(account_id), self.rate).reserve()
+
+        family = _family(path)
+        if family in self.families:
+            wait = max(wait, self._bucket('account:{}:{}'.format(account_id, family), self.families[family]).reserve())
+
+        return wait
+
+    def acquire(self, account_id, path):
+        """
+        Block until a request to `path` may be sent
+        """
+        wait = self.reserve(account_id, path)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _bucket(self, name, rate):
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                rate, capacity = rate if isinstance(rate, (tuple, list)) else (rate, None)
+                if self.path is not None:
+                    bucket = SQLiteTokenBucket(self.path, name, rate, capacity, self.clock)
+                else:
+                    bucket = TokenBucket(rate, capacity, self.clock)
+                self._buckets[name] = bucket
+            return bucket
+
+def _take(level, updated, now, rate, capacity, tokens):
+    level = min(capacity, level + max(0.0, now - updated) * rate)
+    return level - tokens, now
+
+def _family(path):
+    # /accounts/{account_id}/projects/{project_id}/{family}/...
+    parts = path.split('/')
+    return parts[5] if len(parts) > 5 else None
@@ -0,0 +1,227 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import keyword
+import re
+import six
+import threading
+
+from quantumpy.decoding import loads_fast, orjson
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class _Packed(bytes):
+    """
+    JSON encoding of a nested value, decoded on first access
+    """
+    __slots__ = ()
+
+class _Lazy(object):
+    """
+    Descriptor decoding a nested field from its raw slot on first access
+    """
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        value = self.slot.__get__(record, owner)
+        if isinstance(value, _Packed):
+            value = loads_fast(bytes(value))
+            self.slot.__set__(record, value)
+        return value
+
+class Record(object):
+    """
+    Compact read-only record for a post, tweet or video.
+
+    Every distinct set of fields gets its own subclass with one `__slots__`
+    entry per field, so a record carries no per-instance dict and fields
+    read as plain attributes. Nested objects and arrays are kept as compact
+    JSON bytes and only decoded the first time they are accessed. Fields
+    whose name is not a valid attribute are read as items:
+
+        post.id, post['message'], post.get('reactions', {})
+    """
+    __slots__ = ()
+
+    _fields  = ()
+    _attrs   = {}
+    _setters = ()
+    _base    = None
+    _lock    = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data):
+        values = [_pack(value) for value in data.values()]
+        schema = cls._schema(tuple(data), tuple(isinstance(value, _Packed) for value in values))
+        record = object.__new__(schema)
+        for setter, value in zip(schema._setters, values):
+            setter(record, value)
+        return record
+
+    @classmethod
+    def _schema(cls, fields, nested):
+        base    = cls._base or cls
+        classes = base.__dict__.get('_classes')
+        if classes is None:
+            with Record._lock:
+                classes = base.__dict__.get('_classes')
+                if classes is None:
+                    classes = {}
+                    setattr(base, '_classes', classes)
+
+        schema = classes.get((fields, nested))
+        if schema is None:
+            schema = classes[(fields, nested)] = _record_class(base, fields, nested)
+        return schema
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, self._attrs[name])
+        except (KeyError, AttributeError):
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self._attrs
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<{} {}>'.format((self._base or type(self)).__name__, self.get('id'))
+
+    def __reduce__(self):
+        return _restore, (self._base or type(self), self.to_dict())
+
+    def get(self, name, default=None):
+        return getattr(self, self._attrs[name]) if name in self._attrs else default
+
+    def keys(self):
+        return list(self._fields)
+
+    def to_dict(self):
+        return {name: getattr(self, self._attrs[name]) for name in self._fields}
+
+class Post(Record):
+    """
+    Facebook or Instagram post
+    """
+    __slots__ = ()
+
+class Tweet(Record):
+    __slots__ = ()
+
+class Video(Record):
+    """
+    YouTube video
+    """
+    __slots__ = ()
+
+class RecordPage(object):
+    """
+    A page of records: a list of `record_class` instances built from the
+    page's records, plus the other members of the response (such as
+    paging) in `rest`. page['data'] returns the page itself so code written
+    for raw pages keeps working.
+    """
+    def __init__(self, records, rest=None, key='data'):
+        self.records = records
+        self.rest    = rest or {}
+        self.key     = key
+
+    @classmethod
+    def from_result(cls, result, record_class, key='data'):
+        """
+        Build from a parsed page: {"data": [...], ...} or a bare list of records
+        """
+        if isinstance(result, dict):
+            records = result.get(key) or []
+            rest    = {member: value for member, value in result.items() if member != key}
+        else:
+            records = result or []
+            rest    = {}
+
+        return cls([record_class.from_dict(data) for data in records], rest, key)
+
+    @property
+    def next_url(self):
+        try:
+            return self.rest['paging']['next']
+        except (KeyError, TypeError):
+            return None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, index):
+        if index == self.key:
+            return self
+        if isinstance(index, six.string_types):
+            return self.rest[index]
+        return self.records[index]
+
+    def __repr__(self):
+        return '<RecordPage of {} records>'.format(len(self))
+
+def _record_class(base, fields, nested):
+    """
+    Subclass of `base` with a slot per field; nested fields get a raw slot behind a _Lazy descriptor
+    """
+    attrs = {}
+    slots = []
+    for i, name in enumerate(fields):
+        safe = _IDENTIFIER.match(name) and not keyword.iskeyword(name) and not name.startswith('_') and not hasattr(base, name)
+        attr = str(name) if safe else '_f{}'.format(i)
+        attrs[name] = attr
+        slots.append('_raw_' + attr if nested[i] else attr)
+
+    schema = type(base.__name__, (base,), {
+        '__slots__': tuple(slots),
+        '_fields':   fields,
+        '_attrs':    attrs,
+        '_base':     base
+    })
+    for i, name in enumerate(fields):
+        if nested[i]:
+            setattr(schema, attrs[name], _Lazy(getattr(schema, slots[i])))
+
+    schema._setters = tuple(getattr(schema, slot).__set__ for slot in slots)
+    return schema
+
+def _restore(record_class, data):
+    return record_class.from_dict(data)
+
+def _pack(value):
+    """
+    Nested objects and arrays are stored as JSON bytes until accessed
+    """
+    if not isinstance(value, (dict, list)) or not value:
+        return value
+    try:
+        if orjson is not None:
+            return _Packed(orjson.dumps(value))
+        return _Packed(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+    except TypeError:
+        # e.g. Decimal values, which cannot be re-encoded losslessly
+        return value
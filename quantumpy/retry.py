@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+
+from email.utils import parsedate_tz, mktime_tz
+from quantumpy.exceptions import *
+
+class CircuitBreaker(object):
+    """
+    Fails fast after `threshold` consecutive failures. While open, requests
+    raise CircuitOpenError without reaching the API; after `reset_timeout`
+    seconds a single probe request is let through, closing the circuit on
+    success or opening it again on failure. A probe that ends without
+    either (e.g. an unparseable response, or a stream closed early) must
+    be given back with release_probe() so that another one can be sent.
+    """
+    def __init__(self, threshold=10, reset_timeout=30):
+        self.threshold     = threshold
+        self.reset_timeout = reset_timeout
+        self.failures      = 0
+        self.opened_at     = None
+        self._probing      = False
+        self._lock         = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self._probing or time.time() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_request(self):
+        """
+        Raise CircuitOpenError if the request may not be sent; True if it is the half-open probe
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if self._probing or time.time() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError('Circuit open after {} consecutive failures'.format(self.failures))
+            self._probing = True
+            return True
+
+    def release_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures  = 0
+            self.opened_at = None
+            self._probing  = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.time()
+            self._probing = False
+
+class RetryPolicy(object):
+    """
+    Decides which errors are retried and how long to wait in between.
+
+    Waits grow exponentially from `backoff` seconds up to `max_backoff`,
+    with full jitter so that many clients do not retry in lockstep. A
+    Retry-After sent with a 429 or 503 response is honored instead, unless
+    it exceeds `max_retry_after`, in which case the error is raised.
+    Only transient errors are retried and counted by the circuit breaker:
+    `retryable` exceptions, unless they carry a 4xx status other than 429
+    (connection errors have none). Pass breaker=None to disable it.
+    """
+    retryable = (HTTPError, InternalServerError)
+
+    def __init__(self, backoff=0.5, max_backoff=30, max_retry_after=120, jitter=True, breaker=True, retryable=None):
+        self.backoff         = backoff
+        self.max_backoff     = max_backoff
+        self.max_retry_after = max_retry_after
+        self.jitter          = jitter
+        self.breaker         = CircuitBreaker() if breaker is True else breaker
+
+        if retryable is not None:
+            self.retryable = tuple(retryable)
+
+    def is_retryable(self, error):
+        if not isinstance(error, self.retryable):
+            return False
+        status_code = getattr(error, 'status_code', None)
+        return status_code is None or status_code >= 500 or status_code == 429
+
+    def delay(self, attempt, error):
+        """
+        Seconds to wait before retry number `attempt` (starting at 0), or None to give up
+        """
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def before_request(self):
+        """
+        True if the request is the circuit breaker's half-open probe, to be
+        ended with record_success / record_failure or release_probe
+        """
+        if self.breaker is not None:
+            return self.breaker.before_request()
+        return False
+
+    def release_probe(self):
+        if self.breaker is not None:
+            self.breaker.release_probe()
+
+    def record_success(self):
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def record_failure(self, error):
+        if self.breaker is None:
+            return
+
+        # Errors that are not transient still prove the API is answering
+        if self.is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, given either as seconds or as an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, mktime_tz(parsed) - time.time())
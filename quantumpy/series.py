@@ -0,0 +1,261 @@
+import numbers
+import six
+
+from datetime import date, datetime, timedelta
+
+WINDOWS = {
+    'day':   timedelta(days=1),
+    'week':  timedelta(weeks=1),
+    'month': 'month',
+    'year':  'year'
+}
+
+def parse_date(value):
+    """
+    Parse a since/until value (date, datetime or 'YYYY-MM-DD...' string) into a date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, six.string_types):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    raise ValueError('Unsupported date value: {!r}'.format(value))
+
+def format_date(value, like):
+    """
+    Format a date the same way as `like`, the caller's original since/until value
+    """
+    if isinstance(like, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(like, date):
+        return value
+    return value.strftime('%Y-%m-%d')
+
+def date_windows(since, until, window, overlap=True):
+    """
+    Split [since, until] into consecutive windows of `window`, which is one
+    of 'day', 'week', 'month', 'year', a number of days or a timedelta.
+
+    Consecutive windows share their boundary date, so nothing is lost
+    whether the API treats `until` as inclusive or exclusive; merge_results
+    drops the duplicated points. With `overlap` False, each window ends the
+    day before the next one starts, for callers that cannot drop duplicates.
+    """
+    first, end = parse_date(since), parse_date(until)
+    step = WINDOWS.get(window, window)
+    if isinstance(step, six.integer_types):
+        step = timedelta(days=step)
+    if step not in ('month', 'year') and not (isinstance(step, timedelta) and step.days > 0):
+        raise ValueError('Invalid window: {!r}'.format(window))
+
+    windows = []
+    start   = first
+    while True:
+        n = len(windows) + 1
+        if step == 'month':
+            stop = _add_months(first, n)
+        elif step == 'year':
+            stop = _add_months(first, 12 * n)
+        else:
+            stop = first + step * n
+
+        if stop > end or overlap and stop == end:
+            windows.append((format_date(start, since), until))
+            return windows
+
+        windows.append((format_date(start, since), format_date(stop if overlap else stop - timedelta(days=1), until)))
+        start = stop
+
+def merge_results(results, overwrite=False):
+    """
+    Merge responses for the same endpoint into one of the same shape.
+
+    Dicts are merged key by key, lists of {'id': ...} records are merged
+    per id, and date series (lists of {'date': ...} points or
+    [date, value] pairs) are combined with repeated dates dropped: the
+    first occurrence is kept, or the last one when `overwrite` is set, so
+    newer results can replace stale points. Other lists are concatenated.
+    Numbers that aggregate a date series in every result, such as a
+    `total` equal to the sum or the count of its points or an average
+    equal to their mean, are computed again over the merged series. Other
+    numbers next to a date series must be equal in every result, or
+    ValueError is raised; other values are taken from the last result.
+    The inputs are not modified.
+    """
+    merged = results[0]
+    for result in results[1:]:
+        merged = _merge(merged, result, overwrite)
+    return merged
+
+def slice_result(result, since, until):
+    """
+    Copy of `result` with every date series restricted to [since, until],
+    and the numbers aggregating a series computed again over its slice
+    """
+    since, until = parse_date(since), parse_date(until)
+
+    def walk(value):
+        if isinstance(value, dict):
+            return _reaggregate({key: walk(item) for key, item in value.items()}, [value])
+        if isinstance(value, list):
+            key = _series_key(value)
+            if key is not None:
+                return [item for item in value if since <= point_date(key(item)) <= until]
+            return [walk(item) for item in value]
+        return value
+
+    return walk(result)
+
+def point_date(value):
+    """
+    Date of a series point's date field: a date string or an epoch timestamp (seconds or milliseconds)
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.utcfromtimestamp(value / 1000.0 if value > 1e11 else value).date()
+    return parse_date(value)
+
+def _series_key(items):
+    sample = items[0] if items else None
+    if isinstance(sample, dict) and 'date' in sample:
+        return lambda item: item.get('date')
+    if isinstance(sample, list) and sample and not isinstance(sample[0], (dict, list)):
+        return lambda item: item[0]
+    return None
+
+def _merge(a, b, overwrite=False):
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = dict(a)
+        for key, value in b.items():
+            out[key] = _merge(a[key], value, overwrite) if key in a else value
+        return _reaggregate(out, [a, b])
+
+    if isinstance(a, list) and isinstance(b, list):
+        return _merge_lists(a, b, overwrite)
+
+    return b
+
+def _merge_lists(a, b, overwrite):
+    sample = (a or b or [None])[0]
+
+    if isinstance(sample, dict) and 'id' in sample and 'date' not in sample:
+        return _merge_records(a, b, overwrite)
+
+    key = _series_key(a or b)
+    if key is None:
+        return a + b
+
+    if not overwrite:
+        seen = set(key(item) for item in a)
+        return a + [item for item in b if key(item) not in seen]
+
+    seen   = set(key(item) for item in b)
+    merged = [item for item in a if key(item) not in seen] + b
+    try:
+        merged.sort(key=lambda item: point_date(key(item)))
+    except (TypeError, ValueError):
+        pass
+    return merged
+
+def _merge_records(a, b, overwrite):
+    out   = list(a)
+    index = {record.get('id'): i for i, record in enumerate(out)}
+
+    for record in b:
+        i = index.get(record.get('id'))
+        if i is None:
+            index[record.get('id')] = len(out)
+            out.append(record)
+        else:
+            out[i] = _merge(out[i], record, overwrite)
+
+    return out
+
+def _reaggregate(out, sources):
+    """
+    Recompute the numbers of `out` that aggregate one of its date series in
+    every one of `sources` (the dicts it was merged or sliced from), so that
+    they match its series instead of holding the value of one source. When
+    merging, a number differing between sources that is no such aggregate
+    (e.g. a rate over the whole range) cannot be recomputed: ValueError.
+    """
+    names = [name for name, value in out.items() if isinstance(value, list) and value and _series_key(value) is not None]
+    if not names:
+        return out
+
+    for key, value in list(out.items()):
+        if not _is_number(value) or not all(_is_number(source.get(key)) for source in sources):
+            continue
+        for name in names:
+            if not all(isinstance(source.get(name), list) for source in sources):
+                continue
+            aggregate = next((
+                candidate for candidate in _aggregates(out[name])
+                if all(_close(_aggregate(source[name], *candidate), source[key]) for source in sources)
+            ), None)
+            if aggregate is not None:
+                out[key] = _aggregate(out[name], *aggregate)
+                break
+        else:
+            if not all(_close(source[key], sources[0][key]) for source in sources[1:]):
+                raise ValueError(
+                    'Cannot merge {!r} ({}): it is not a count, sum, mean, first, last, min or max of a series; '
+                    'request the range in one call instead'.format(key, ', '.join(str(source[key]) for source in sources))
+                )
+
+    return out
+
+def _aggregates(series):
+    """
+    (kind, field) of the aggregates a number may hold over `series`: its
+    count, and the sum, last, max, min, first or mean value of each numeric field
+    """
+    sample = series[0]
+    if isinstance(sample, dict):
+        fields = sorted(field for field, value in sample.items() if field != 'date' and _is_number(value))
+    else:
+        fields = [i for i in range(1, len(sample)) if _is_number(sample[i])]
+    return [('count', None)] + [(kind, field) for field in fields for kind in ('sum', 'last', 'max', 'min', 'first', 'mean')]
+
+def _aggregate(series, kind, field):
+    if kind == 'count':
+        return len(series)
+
+    points = [point for point in series if _is_number(_field(point, field))]
+    if kind == 'sum':
+        return sum(_field(point, field) for point in points)
+    if not points:
+        return None
+    if kind == 'mean':
+        return sum(_field(point, field) for point in points) / float(len(points))
+    if kind in ('max', 'min'):
+        return (max if kind == 'max' else min)(_field(point, field) for point in points)
+
+    key = _series_key(points)
+    return _field((max if kind == 'last' else min)(points, key=key), field)
+
+def _field(point, field):
+    if isinstance(point, dict):
+        return point.get(field)
+    return point[field] if len(point) > field else None
+
+def _is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+def _close(a, b):
+    if a is None or b is None:
+        return False
+    a, b = float(a), float(b)
+    return a == b or abs(a - b) <= 1e-9 * max(abs(a), abs(b))
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year  = value.year + month // 12
+    month = month % 12 + 1
+    day   = value.day
+
+    while True:
+        try:
+            return date(year, month, day)
+        except ValueError:
+            day -= 1
@@ -0,0 +1,317 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+
+from six.moves import cPickle as pickle
+from quantumpy.exceptions import QuantumPythonError
+from quantumpy.export import Exporter, ExportResult, NDJSONWriter, project_jobs
+from quantumpy.series import date_windows
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE    = 'done'
+FAILED  = 'failed'
+
+class WorkUnit(object):
+    """
+    A claimed row of a WorkQueue: its id, ExportJob and attempt number
+    """
+    def __init__(self, id, job, attempts):
+        self.id       = id
+        self.job      = job
+        self.attempts = attempts
+
+    @property
+    def prefix(self):
+        return 'unit-{:06d}'.format(self.id)
+
+    def __repr__(self):
+        return 'WorkUnit({}, {!r}, attempts={})'.format(self.id, self.job, self.attempts)
+
+class WorkQueue(object):
+    """
+    Persistent queue of ExportJobs in a SQLite file shared by the processes
+    of a ShardedExporter. Every unit goes pending -> running -> done, or back
+    to pending when its attempt fails, until `max_attempts` attempts have
+    failed and it is marked failed. Adding a job that is already queued
+    (same method and arguments) does nothing, so a run can enumerate its
+    units again without redoing the completed ones.
+    """
+    def __init__(self, path, max_attempts=3):
+        self.path         = path
+        self.max_attempts = max_attempts
+        self._local       = threading.local()
+
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, key TEXT UNIQUE, job BLOB, status TEXT, '
+                'attempts INTEGER, worker TEXT, records INTEGER, files TEXT, error TEXT, updated REAL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS units_status ON units (status, id)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def add(self, jobs):
+        """
+        Queue `jobs`, skipping those already queued; returns the number added
+        """
+        now   = time.time()
+        added = 0
+        with self._connection() as db:
+            for job in jobs:
+                cursor = db.execute(
+                    'INSERT OR IGNORE INTO units (key, job, status, attempts, records, updated) VALUES (?, ?, ?, 0, 0, ?)',
+                    (_job_key(job), sqlite3.Binary(pickle.dumps(job, pickle.HIGHEST_PROTOCOL)), PENDING, now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def claim(self, worker):
+        """
+        Mark the first pending unit as run by `worker` and return it, or None if there is none left
+        """
+        with self._connection() as db:
+            # A single UPDATE is atomic, so two workers can never claim the same unit
+            cursor = db.execute(
+                'UPDATE units SET status = ?, worker = ?, attempts = attempts + 1, error = NULL, updated = ? '
+                'WHERE id = (SELECT id FROM units WHERE status = ? ORDER BY id LIMIT 1)',
+                (RUNNING, worker, time.time(), PENDING)
+            )
+            if not cursor.rowcount:
+                return None
+            row = db.execute(
+                'SELECT id, job, attempts FROM units WHERE status = ? AND worker = ?',
+                (RUNNING, worker)
+            ).fetchone()
+        return WorkUnit(row[0], pickle.loads(bytes(row[1])), row[2])
+
+    def complete(self, id, records, files):
+        with self._connection() as db:
+            db.execute(
+                'UPDATE units SET status = ?, records = ?, files = ?, updated = ? WHERE id = ?',
+                (DONE, records, json.dumps(files), time.time(), id)
+            )
+
+    def fail(self, id, error):
+        """
+        Record a failed attempt: the unit is pending again unless it has used up its attempts
+        """
+        with self._connection() as db:
+            db.execute(
+                'UPDATE units SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, error = ?, updated = ? WHERE id = ?',
+                (self.max_attempts, PENDING, FAILED, error, time.time(), id)
+            )
+
+    def release(self, worker=None, error='worker exited'):
+        """
+        Fail the units left running by `worker` (by every worker if None),
+        e.g. after its process crashed; returns their number
+        """
+        query  = 'UPDATE units SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, error = ?, updated = ? WHERE status = ?'
+        params = (self.max_attempts, PENDING, FAILED, error, time.time(), RUNNING)
+        if worker is not None:
+            query  += ' AND worker = ?'
+            params += (worker,)
+        with self._connection() as db:
+            return db.execute(query, params).rowcount
+
+    def retry_failed(self):
+        """
+        Give the failed units a new set of attempts
+        """
+        with self._connection() as db:
+            return db.execute(
+                'UPDATE units SET status = ?, attempts = 0, updated = ? WHERE status = ?', (PENDING, time.time(), FAILED)
+            ).rowcount
+
+    def counts(self):
+        """
+        Number of units by status: {'pending': 10, 'running': 4, 'done': 120, 'failed': 1}
+        """
+        counts = dict.fromkeys((PENDING, RUNNING, DONE, FAILED), 0)
+        with self._connection() as db:
+            counts.update(db.execute('SELECT status, COUNT(*) FROM units GROUP BY status').fetchall())
+        return counts
+
+    def units(self, status=None):
+        """
+        (id, job, status, attempts, records, files, error) of every unit, or of those with `status`
+        """
+        query, params = 'SELECT id, job, status, attempts, records, files, error FROM units', ()
+        if status is not None:
+            query, params = query + ' WHERE status = ?', (status,)
+        with self._connection() as db:
+            rows = db.execute(query + ' ORDER BY id', params).fetchall()
+        return [
+            (id, pickle.loads(bytes(job)), status, attempts, records, json.loads(files) if files else [], error)
+            for id, job, status, attempts, records, files, error in rows
+        ]
+
+class ShardedExporter(object):
+    """
+    Runs an export over several processes, so that parsing is not bound to
+    one core. Jobs (see project_units) are queued in a WorkQueue at `path`;
+    each of `processes` workers builds its own client with `factory()`,
+    claims one unit at a time and streams it through an Exporter into its
+    own files under `directory`, written by `writer(directory, prefix)`
+    (NDJSONWriter by default, e.g. functools.partial(ParquetWriter,
+    max_records=1000000) for Parquet).
+
+    Unit status is kept in the queue: a worker that crashes is replaced and
+    its unit retried (files from an interrupted attempt are removed first),
+    a unit failing `max_attempts` times is reported in the result, and
+    running again with the same `path` only processes the units that are not
+    done. Only one ShardedExporter may run on a queue at a time.
+
+        factory  = functools.partial(QuantumAPI, secret, token_cache=FileTokenCache())
+        exporter = ShardedExporter(factory, '/data/export/queue.db', '/data/export', processes=8)
+        result   = exporter.run(project_units(QuantumAPI(secret), '2017-01-01', '2017-12-31', profiles))
+
+    `factory`, `writer` and `transform` are sent to the worker processes and
+    must be picklable (module level functions, classes or partials of them).
+    """
+    def __init__(self, factory, path, directory, processes=None, writer=None, transform=None, max_attempts=3, poll_interval=0.2):
+        self.factory       = factory
+        self.directory     = directory
+        self.processes     = processes or multiprocessing.cpu_count()
+        self.writer        = writer or NDJSONWriter
+        self.transform     = transform
+        self.poll_interval = poll_interval
+        self.queue         = WorkQueue(path, max_attempts)
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def add(self, jobs):
+        return self.queue.add(jobs)
+
+    def run(self, jobs=None):
+        """
+        Queue `jobs` if given, process every pending unit and return an
+        ExportResult merging all the units done so far in the queue; its
+        errors are (job, message) pairs of the failed units
+        """
+        started = time.time()
+        if jobs is not None:
+            self.queue.add(jobs)
+
+        # Units still running belong to a previous run that did not finish
+        self.queue.release(error='export interrupted')
+
+        workers = {}
+        try:
+            while True:
+                for worker, process in list(workers.items()):
+                    if not process.is_alive():
+                        process.join()
+                        del workers[worker]
+                        if process.exitcode != 0 and not self.queue.release(worker, 'worker exited with code {}'.format(process.exitcode)):
+                            # It died outside of a unit (e.g. factory() failed): starting another would not help
+                            raise QuantumPythonError('Export worker exited with code {}'.format(process.exitcode))
+
+                pending = self.queue.counts()[PENDING]
+                while pending > len(workers) and len(workers) < self.processes:
+                    worker, process = self._start()
+                    workers[worker] = process
+
+                if not workers:
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            for process in workers.values():
+                process.terminate()
+                process.join()
+
+        return self.result(time.time() - started)
+
+    def result(self, seconds=None):
+        """
+        ExportResult of the units in the queue: records and files of the done ones, errors of the failed ones
+        """
+        records, files, errors, jobs = 0, [], [], 0
+        for id, job, status, attempts, count, unit_files, error in self.queue.units():
+            jobs += 1
+            if status == DONE:
+                records += count
+                files.extend(unit_files)
+            elif status == FAILED:
+                errors.append((job, error))
+        return ExportResult(records, jobs, errors, files, seconds)
+
+    def _start(self):
+        process = multiprocessing.Process(
+            target = _work,
+            args   = (self.queue.path, self.queue.max_attempts, self.factory, self.directory, self.writer, self.transform)
+        )
+        process.daemon = True
+        process.start()
+        return _worker_name(process.pid), process
+
+def project_units(api, since, until, profiles, window='month', projects=None):
+    """
+    Export units for every profile of every project, one per paginated
+    endpoint and date `window` (see date_windows; None for a single one).
+    Projects are those of get_projects() unless `projects` is given, and
+    `profiles(project)` returns the (network, profile_id) pairs to export
+    from the project's get_project_by_id() properties. Windows do not
+    overlap: each one starts the day after the previous one ends.
+    """
+    windows = date_windows(since, until, window, overlap=False) if window is not None else [(since, until)]
+    details = []
+    for project in (projects if projects is not None else api.get_projects()):
+        detail = dict(project)
+        detail.update(api.get_project_by_id(project['id']))
+        details.append(detail)
+
+    for window_since, window_until in windows:
+        for job in project_jobs(api, window_since, window_until, profiles, details):
+            yield job
+
+def _work(path, max_attempts, factory, directory, writer, transform):
+    queue  = WorkQueue(path, max_attempts)
+    api    = factory()
+    worker = _worker_name(os.getpid())
+
+    while True:
+        unit = queue.claim(worker)
+        if unit is None:
+            return
+
+        _remove_files(directory, unit.prefix)
+        try:
+            result = Exporter(api, writer(directory, unit.prefix), concurrency=1, transform=transform).run([unit.job])
+        except Exception:
+            error = traceback.format_exc()
+        else:
+            if not result.errors:
+                queue.complete(unit.id, result.records, result.files)
+                continue
+            error = ''.join(traceback.format_exception_only(type(result.errors[0][1]), result.errors[0][1]))
+
+        _remove_files(directory, unit.prefix)
+        queue.fail(unit.id, error.strip())
+
+def _worker_name(pid):
+    return '{}:{}'.format(socket.gethostname(), pid)
+
+def _remove_files(directory, prefix):
+    for name in os.listdir(directory):
+        if name.startswith(prefix + '-'):
+            os.remove(os.path.join(directory, name))
+
+def _job_key(job):
+    return json.dumps([job.method, job.args, job.kwargs, job.fields], sort_keys=True, default=str)
@@ -0,0 +1,134 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import codecs
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class StreamParser(object):
+    """
+    Incremental parser for a response whose records are in one large array:
+    either the `key` member of the top-level object, e.g. the "data" of
+    {"data": [...], "paging": {...}}, or the top-level array itself.
+
+    feed() takes the body chunk by chunk and returns the records completed
+    so far, so only one record and the unparsed tail of the last chunk are
+    held at a time. Every other top-level member ends up in `rest` once
+    close() has been called. Invalid JSON raises ValueError.
+    """
+    def __init__(self, key='data', parse_float=None):
+        self.key      = key
+        self.rest     = {}
+        self._json    = json.JSONDecoder(parse_float=parse_float)
+        self._text    = codecs.getincrementaldecoder('utf-8')()
+        self._buffer  = ''
+        self._state   = 'start'
+        self._member  = None
+
+    def feed(self, chunk):
+        self._buffer += self._text.decode(chunk)
+        return self._parse(False)
+
+    def close(self):
+        self._buffer += self._text.decode(b'', True)
+        records = self._parse(True)
+        if self._state != 'end':
+            raise ValueError('Truncated JSON response')
+        return records
+
+    def load(self, result):
+        """
+        Split an already decoded response into its records, keeping the other members in `rest`
+        """
+        self._state = 'end'
+        if isinstance(result, list):
+            return result
+        if isinstance(result, dict):
+            self.rest = {member: value for member, value in result.items() if member != self.key}
+            return result.get(self.key) or []
+        return []
+
+    def _parse(self, eof):
+        records = []
+        buffer  = self._buffer
+        pos     = 0
+
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char  = buffer[pos]
+            state = self._state
+
+            if state == 'start':
+                if char not in '{[':
+                    raise ValueError('Expected a JSON object or array at the top level')
+                self._state = 'members' if char == '{' else 'first'
+                pos += 1
+            elif state in ('members', 'next member'):
+                if char == '}':
+                    self._state = 'end'
+                    pos += 1
+                elif char == ',' and state == 'next member':
+                    self._state = 'members'
+                    pos += 1
+                else:
+                    value, end = self._decode(buffer, pos, eof)
+                    if end is None:
+                        break
+                    self._member, self._state, pos = value, 'colon', end
+            elif state == 'colon':
+                if char != ':':
+                    raise ValueError('Expected ":" after object member name')
+                self._state = 'value'
+                pos += 1
+            elif state == 'value':
+                if self._member == self.key and char == '[':
+                    self._state = 'first'
+                    pos += 1
+                else:
+                    value, end = self._decode(buffer, pos, eof)
+                    if end is None:
+                        break
+                    self.rest[self._member] = value
+                    self._state, pos = 'next member', end
+            elif state in ('first', 'items'):
+                if char == ']':
+                    self._state = 'next member' if self._member is not None else 'end'
+                    pos += 1
+                elif char == ',' and state == 'items':
+                    self._state = 'item'
+                    pos += 1
+                elif state == 'items':
+                    raise ValueError('Expected "," or "]" in records array')
+                else:
+                    self._state = 'item'
+            elif state == 'item':
+                value, end = self._decode(buffer, pos, eof)
+                if end is None:
+                    break
+                records.append(value)
+                self._state, pos = 'items', end
+            else:
+                raise ValueError('Extra data after JSON response')
+
+        self._buffer = buffer[pos:]
+        return records
+
+    def _decode(self, buffer, pos, eof):
+        """
+        Decode the value at `pos`, returning (value, end), or (None, None) if more input is needed
+        """
+        try:
+            value, end = self._json.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            return None, None
+
+        # A number cut at the end of a chunk may continue in the next one
+        if not eof and (end == len(buffer) or buffer[end] in '.eE+-'):
+            return None, None
+        return value, end
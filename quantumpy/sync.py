@@ -0,0 +1,120 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+import sqlite3
+import threading
+import time
+
+from datetime import datetime, timedelta
+from six.moves import cPickle as pickle
+from quantumpy.series import parse_date, format_date, merge_results, slice_result
+
+class SeriesSync(object):
+    """
+    Incremental fetching of by-date series. For every (endpoint, project,
+    ids, timezone) it keeps the merged series fetched so far and the date
+    range it covers; later calls only request the dates not held yet plus
+    the last `mutable_days` days, which the API may still revise, and
+    merge them into the stored series.
+
+        sync = SeriesSync(q, path='/var/lib/quantum/series.db')
+        fans = sync.get('get_facebook_fans_count_by_date', project_id, since, until, ids)
+
+    Without `path` the series are kept in memory only. Totals and other
+    numbers aggregating a series are computed over the returned series;
+    other non-series values are those of the latest request.
+    """
+    def __init__(self, api, path=None, mutable_days=2):
+        self.api          = api
+        self.path         = path
+        self.mutable_days = mutable_days
+        self.requests     = 0
+        self._memory      = {}
+        self._lock        = threading.Lock()
+        self._local       = threading.local()
+
+        if path is not None:
+            with self._connection() as db:
+                db.execute('CREATE TABLE IF NOT EXISTS series (key TEXT PRIMARY KEY, since TEXT, until TEXT, result BLOB, updated REAL)')
+
+    def get(self, method, project_id, since, until, ids, timezone='UTC', **kwargs):
+        """
+        Return the response of `method` for [since, until], fetching only the missing or mutable dates
+        """
+        key    = self.key(method, project_id, ids, timezone)
+        start  = parse_date(since)
+        end    = parse_date(until)
+        stored = self._load(key)
+
+        if stored is None:
+            result = self._fetch(method, project_id, since, until, ids, timezone, kwargs)
+            self._save(key, start, end, result)
+            return result
+
+        held_since, held_until, result = stored
+        fetched = []
+
+        if start < held_since:
+            fetched.append(self._fetch(method, project_id, since, format_date(held_since, since), ids, timezone, kwargs))
+
+        settled = datetime.utcnow().date() - timedelta(days=self.mutable_days)
+        refresh = max(held_since, min(held_until, settled))
+        if end > refresh:
+            fetched.append(self._fetch(method, project_id, format_date(refresh, since), until, ids, timezone, kwargs))
+
+        if fetched:
+            result = merge_results([result] + fetched, overwrite=True)
+            self._save(key, min(start, held_since), max(end, held_until), result)
+
+        return slice_result(result, start, end)
+
+    def key(self, method, project_id, ids, timezone):
+        if isinstance(ids, (list, tuple, set)):
+            ids = sorted(ids)
+        return json.dumps([method, project_id, ids, timezone], default=str)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path is not None:
+            with self._connection() as db:
+                db.execute('DELETE FROM series')
+
+    def _fetch(self, method, project_id, since, until, ids, timezone, kwargs):
+        self.requests += 1
+        return getattr(self.api, method)(project_id, since, until, ids, timezone=timezone, **kwargs)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            self._local.db = db
+        return db
+
+    def _load(self, key):
+        if self.path is None:
+            with self._lock:
+                stored = self._memory.get(key)
+            if stored is None:
+                return None
+            return stored[0], stored[1], pickle.loads(stored[2])
+
+        with self._connection() as db:
+            row = db.execute('SELECT since, until, result FROM series WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return parse_date(row[0]), parse_date(row[1]), pickle.loads(bytes(row[2]))
+
+    def _save(self, key, since, until, result):
+        if self.path is None:
+            # Pickled like in SQLite, so that callers never hold the stored objects
+            with self._lock:
+                self._memory[key] = (since, until, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+            return
+
+        with self._connection() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO series (key, since, until, result, updated) VALUES (?, ?, ?, ?, ?)',
+                (key, since.isoformat(), until.isoformat(), sqlite3.Binary(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)), time.time())
+            )
@@ -0,0 +1,97 @@
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+class Validated(object):
+    """
+    What is kept of a response to revalidate it: its ETag and Last-Modified
+    headers, a digest of its body and the parsed result
+    """
+    __slots__ = ('etag', 'last_modified', 'digest', 'result')
+
+    def __init__(self, etag, last_modified, digest, result):
+        self.etag          = etag
+        self.last_modified = last_modified
+        self.digest        = digest
+        self.result        = result
+
+    def headers(self):
+        """
+        Conditional request headers for this response's validators
+        """
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ValidatorStore(object):
+    """
+    In-process LRU store of the last response to up to `maxsize` GET requests,
+    used by QuantumAPI (validators= constructor parameter) to revalidate
+    instead of downloading and parsing again:
+
+    - when the response had an ETag or Last-Modified header, the next request
+      sends If-None-Match / If-Modified-Since, and a 304 is answered with
+      the stored result;
+    - otherwise, or when the server answers 200 anyway, a body whose digest
+      matches the stored one is not decoded again.
+
+    Stored results are shared between callers and must not be mutated.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize      = maxsize
+        self.not_modified = 0
+        self.unchanged    = 0
+        self.changed      = 0
+        self._entries     = OrderedDict()
+        self._lock        = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def revalidate(self, key, entry, status_code, headers, content, parse):
+        """
+        Result of a GET response given the stored `entry` (or None): the
+        stored result for a 304 or an identical body, else parse(content).
+        Successful responses are stored under `key`.
+        """
+        if status_code == 304 and entry is not None:
+            self.not_modified += 1
+            return entry.result
+
+        if status_code != 200:
+            return parse(content)
+
+        digest = hashlib.sha1(content).digest()
+        if entry is not None and entry.digest == digest:
+            self.unchanged += 1
+            result = entry.result
+        else:
+            self.changed += 1
+            result = parse(content)
+
+        self.set(key, Validated(headers.get('ETag'), headers.get('Last-Modified'), digest, result))
+        return result
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {'not_modified': self.not_modified, 'unchanged': self.unchanged, 'changed': self.changed, 'size': size}
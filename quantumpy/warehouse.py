@@ -0,0 +1,318 @@
+import numbers
+import six
+import sqlite3
+import threading
+import time
+
+from datetime import datetime, timedelta
+from quantumpy.series import parse_date, format_date, point_date, _series_key
+
+# SQL expression of the first date of the bucket holding `date`
+BUCKETS = {
+    'day':   'date',
+    'week':  "date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')",
+    'month': "substr(date, 1, 7) || '-01'",
+    'year':  "substr(date, 1, 4) || '-01-01'"
+}
+
+AGGREGATES = {
+    'sum':   sum,
+    'avg':   lambda values: sum(values) / float(len(values)),
+    'min':   min,
+    'max':   max,
+    'count': len,
+    'first': lambda values: values[0],
+    'last':  lambda values: values[-1]
+}
+
+class Warehouse(object):
+    """
+    Local SQLite store of by-date metrics, one row per point keyed by
+    (network, metric, project, profile, timezone, field, date), with the
+    date ranges held for every profile. Given to QuantumAPI as
+    `warehouse=`, it upserts every by-date response (except those filtered
+    by owner or type); load() fetches only the ranges it
+    does not hold yet, and query() answers any slice of them, rolled up
+    into weeks, months, years or N-day buckets, without calling the API:
+
+        q = QuantumAPI(api_secret, warehouse=Warehouse('/var/lib/quantum/metrics.db'))
+        q.warehouse.load(q, 'get_facebook_fans_count_by_date', project_id, '2016-01-01', '2017-12-31', ids)
+        q.warehouse.query('get_facebook_fans_count_by_date', project_id, '2017-01-01', '2017-06-30', ids[:5], bucket='month', aggregate='last')
+
+    Metrics are named after their method: network 'facebook' and metric
+    'fans_count_by_date' for get_facebook_fans_count_by_date. Points from
+    the last `mutable_days` days are not considered held by load(), since
+    the API may still revise them.
+    """
+    def __init__(self, path, mutable_days=2):
+        self.path         = path
+        self.mutable_days = mutable_days
+        self._local       = threading.local()
+
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS points (network TEXT, metric TEXT, project_id TEXT, timezone TEXT, profile_id TEXT, '
+                'field TEXT, date TEXT, value REAL, updated REAL, '
+                'PRIMARY KEY (network, metric, project_id, timezone, profile_id, field, date)) WITHOUT ROWID'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS points_date ON points (network, metric, project_id, timezone, date)')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS coverage (network TEXT, metric TEXT, project_id TEXT, timezone TEXT, profile_id TEXT, '
+                'since TEXT, until TEXT)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS coverage_profile ON coverage (network, metric, project_id, timezone, profile_id)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def store(self, method, project_id, result, timezone='UTC', since=None, until=None, ids=None):
+        """
+        Upsert the points of a by-date response of `method`. With since and
+        until, [since, until] is recorded as held for `ids` (by default the
+        ids present in the response). Returns the number of points stored.
+        """
+        network, metric = metric_key(method)
+        key    = (network, metric, six.text_type(project_id), timezone)
+        now    = time.time()
+        points = [key + point + (now,) for point in series_points(result)]
+
+        with self._connection() as db:
+            db.executemany('INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', points)
+
+            if since is not None and until is not None:
+                self._cover(db, key, since, until, set(point[4] for point in points) if ids is None else ids)
+
+        return len(points)
+
+    def cover(self, method, project_id, since, until, ids, timezone='UTC'):
+        """
+        Record [since, until] as held for `ids`, e.g. once their points have been stored
+        """
+        network, metric = metric_key(method)
+        with self._connection() as db:
+            self._cover(db, (network, metric, six.text_type(project_id), timezone), since, until, ids)
+
+    def _cover(self, db, key, since, until, ids):
+        if isinstance(ids, (six.string_types, six.integer_types)):
+            ids = [ids]
+        for profile_id in ids:
+            self._cover_profile(db, key + (six.text_type(profile_id),), parse_date(since), parse_date(until))
+
+    def _cover_profile(self, db, key, since, until):
+        where  = 'network = ? AND metric = ? AND project_id = ? AND timezone = ? AND profile_id = ?'
+        ranges = [(parse_date(a), parse_date(b)) for a, b in db.execute('SELECT since, until FROM coverage WHERE ' + where, key)]
+        merged = _merge_ranges(ranges + [(since, until)])
+
+        db.execute('DELETE FROM coverage WHERE ' + where, key)
+        db.executemany(
+            'INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [key + (a.isoformat(), b.isoformat()) for a, b in merged]
+        )
+
+    def held(self, method, project_id, profile_id, timezone='UTC'):
+        """
+        The (since, until) date ranges held for a profile
+        """
+        network, metric = metric_key(method)
+        with self._connection() as db:
+            rows = db.execute(
+                'SELECT since, until FROM coverage WHERE network = ? AND metric = ? AND project_id = ? AND timezone = ? AND profile_id = ? '
+                'ORDER BY since',
+                (network, metric, six.text_type(project_id), timezone, six.text_type(profile_id))
+            ).fetchall()
+        return [(parse_date(a), parse_date(b)) for a, b in rows]
+
+    def missing(self, method, project_id, since, until, ids, timezone='UTC'):
+        """
+        The ranges of [since, until] not held (or still mutable) for each id: {id: [(since, until), ...]}
+        """
+        start, end = parse_date(since), parse_date(until)
+        settled    = datetime.utcnow().date() - timedelta(days=self.mutable_days)
+
+        missing = {}
+        for id in ids:
+            gaps, cursor = [], start
+            for a, b in self.held(method, project_id, id, timezone):
+                b = min(b, settled)
+                if b < cursor or a > end:
+                    continue
+                if a > cursor:
+                    gaps.append((cursor, a - timedelta(days=1)))
+                cursor = b + timedelta(days=1)
+            if cursor <= end:
+                gaps.append((cursor, end))
+            if gaps:
+                missing[id] = gaps
+        return missing
+
+    def load(self, api, method, project_id, since, until, ids, timezone='UTC', **kwargs):
+        """
+        Fetch and store the ranges of [since, until] not held yet for `ids`,
+        ids missing the same ranges being requested together. Returns the
+        number of API calls made. When `api` already stores its responses
+        here, only the ranges are recorded as held.
+        """
+        groups = {}
+        for id, gaps in self.missing(method, project_id, since, until, ids, timezone).items():
+            groups.setdefault(tuple(gaps), []).append(id)
+
+        calls = 0
+        for gaps, group in groups.items():
+            for a, b in gaps:
+                gap_since, gap_until = format_date(a, since), format_date(b, until)
+                result = getattr(api, method)(project_id, gap_since, gap_until, group, timezone=timezone, **kwargs)
+                if getattr(api, 'warehouse', None) is self:
+                    self.cover(method, project_id, gap_since, gap_until, group, timezone)
+                else:
+                    self.store(method, project_id, result, timezone, gap_since, gap_until, group)
+                calls += 1
+        return calls
+
+    def query(self, method, project_id, since=None, until=None, ids=None, timezone='UTC', field=None, bucket=None, aggregate='sum'):
+        """
+        Points held for `method`, as (profile_id, field, date, value) tuples
+        sorted by profile, field and date, optionally restricted to a date
+        range, to some profile `ids` and to one `field` (e.g. 'count').
+
+        With a `bucket` ('week', 'month', 'year', a number of days or a
+        timedelta counted from `since`, or a function mapping a date to its
+        bucket's date), points are aggregated per bucket with `aggregate`:
+        'sum', 'avg', 'min', 'max', 'count', or 'first' / 'last' (the
+        value at the earliest / latest date, for cumulative metrics such as
+        fan counts). Dates are then those of the buckets' first day.
+        """
+        network, metric = metric_key(method)
+        if aggregate not in AGGREGATES:
+            raise ValueError('Invalid aggregate: {!r}'.format(aggregate))
+
+        where  = ['network = ?', 'metric = ?', 'project_id = ?', 'timezone = ?']
+        params = [network, metric, six.text_type(project_id), timezone]
+        if since is not None:
+            where.append('date >= ?')
+            params.append(parse_date(since).isoformat())
+        if until is not None:
+            where.append('date <= ?')
+            params.append(parse_date(until).isoformat())
+        if ids is not None:
+            ids = [six.text_type(id) for id in ids]
+            where.append('profile_id IN ({})'.format(', '.join('?' * len(ids))))
+            params.extend(ids)
+        if field is not None:
+            where.append('field = ?')
+            params.append(field)
+        where = ' AND '.join(where)
+
+        if bucket is None or callable(bucket):
+            rows = self._select('SELECT profile_id, field, date, value FROM points WHERE {} ORDER BY profile_id, field, date'.format(where), params)
+            return rows if bucket is None else _rollup(rows, bucket, aggregate)
+
+        expression, bucket_params = _bucket_expression(bucket, since)
+        if aggregate in ('first', 'last'):
+            # SQLite takes bare columns from the row holding the MIN() / MAX()
+            select = 'value, {}(date)'.format('MIN' if aggregate == 'first' else 'MAX')
+        else:
+            select = '{}(value)'.format(aggregate.upper())
+
+        rows = self._select(
+            'SELECT profile_id, field, {} AS bucket, {} FROM points WHERE {} GROUP BY profile_id, field, bucket ORDER BY profile_id, field, bucket'
+            .format(expression, select, where),
+            bucket_params + params
+        )
+        return [row[:4] for row in rows]
+
+    def profiles(self, method, project_id, timezone='UTC'):
+        """
+        Ids of the profiles with points held for `method`
+        """
+        network, metric = metric_key(method)
+        rows = self._select(
+            'SELECT DISTINCT profile_id FROM points WHERE network = ? AND metric = ? AND project_id = ? AND timezone = ? ORDER BY profile_id',
+            [network, metric, six.text_type(project_id), timezone]
+        )
+        return [row[0] for row in rows]
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute('DELETE FROM points')
+            db.execute('DELETE FROM coverage')
+
+    def _select(self, query, params):
+        with self._connection() as db:
+            return db.execute(query, params).fetchall()
+
+def metric_key(method):
+    """
+    (network, metric) of a by-date method: ('facebook', 'fans_count_by_date') for get_facebook_fans_count_by_date
+    """
+    name = method[4:] if method.startswith('get_') else method
+    network, _, metric = name.partition('_')
+    return network, metric
+
+def series_points(result):
+    """
+    (profile_id, field, date, value) of every numeric point of a by-date
+    response. Fields are those of the points ('count'), prefixed with the
+    name of their series unless it is 'data'; [date, value] points take
+    the name of their series.
+    """
+    entries = result.get('data') if isinstance(result, dict) else result
+    for entry in entries or ():
+        if not isinstance(entry, dict) or entry.get('id') is None:
+            continue
+
+        profile_id = six.text_type(entry['id'])
+        for name, series in entry.items():
+            if not isinstance(series, list) or not series:
+                continue
+            key = _series_key(series)
+            if key is None:
+                continue
+
+            prefix = '' if name == 'data' else name + '.'
+            for point in series:
+                date = point_date(key(point)).isoformat()
+                if isinstance(point, dict):
+                    for field, value in point.items():
+                        if field != 'date' and _is_number(value):
+                            yield profile_id, prefix + field, date, float(value)
+                elif len(point) > 1 and _is_number(point[1]):
+                    yield profile_id, name, date, float(point[1])
+
+def _is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+def _merge_ranges(ranges):
+    merged = []
+    for a, b in sorted(ranges):
+        if merged and a <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+def _bucket_expression(bucket, since):
+    """
+    SQL expression and params mapping `date` to the first day of its bucket
+    """
+    if bucket in BUCKETS:
+        return BUCKETS[bucket], []
+
+    days = bucket.days if isinstance(bucket, timedelta) else bucket
+    if not isinstance(days, six.integer_types) or days <= 0:
+        raise ValueError('Invalid bucket: {!r}'.format(bucket))
+
+    origin = parse_date(since).isoformat() if since is not None else '1970-01-01'
+    return 'date(julianday(?) + CAST((julianday(date) - julianday(?)) / ? AS INTEGER) * ?)', [origin, origin, days, days]
+
+def _rollup(rows, bucket, aggregate):
+    groups = {}
+    for profile_id, field, date, value in rows:
+        start = bucket(parse_date(date))
+        start = start.isoformat() if hasattr(start, 'isoformat') else start
+        groups.setdefault((profile_id, field, start), []).append(value)
+    return sorted(key + (AGGREGATES[aggregate](values),) for key, values in groups.items())
@@ -11,7 +11,13 @@ setup(
     author_email = 'info@socialmetrix.com',
     url = 'https://github.com/socialmetrix/quantumpy',
     packages = ['quantumpy'],
-    install_requires = ['requests >= 0.8', 'six >= 1.6'],
+    install_requires = ['requests >= 0.8', 'six >= 1.6', 'futures; python_version < "3"'],
+    extras_require = {
+        'async':    ['aiohttp >= 3.0'],
+        'fast':     ['orjson; python_version >= "3.6"'],
+        'columnar': ['numpy'],
+        'parquet':  ['pyarrow']
+    },
     classifiers = [
 		'Development Status :: 2 - Pre-Alpha',
 		'Intended Audience :: Developers',
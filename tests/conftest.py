@@ -0,0 +1,44 @@
+import collections
+import pytest
+
+from benchmarks.server import MockQuantumAPI, MockServer
+from quantumpy import QuantumAPI, RetryPolicy
+
+class ScriptedAPI(object):
+    """
+    MockQuantumAPI answering the next requests with queued raw responses first
+    """
+    def __init__(self, **settings):
+        self.mock      = MockQuantumAPI(**settings)
+        self.responses = collections.deque()
+        self.requests  = []
+        self.queries   = []
+
+    def push(self, status, body, content_type='application/json'):
+        self.responses.append((status, body, content_type))
+
+    def __call__(self, environ, start_response):
+        self.requests.append(environ['PATH_INFO'])
+        self.queries.append(environ.get('QUERY_STRING', ''))
+        if not self.responses or environ['PATH_INFO'].startswith('/_mock/'):
+            return self.mock(environ, start_response)
+
+        # The request body must be read for the connection to be reused
+        environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        status, body, content_type = self.responses.popleft()
+        start_response(status, [('Content-Type', content_type), ('Content-Length', str(len(body)))])
+        return [body]
+
+@pytest.fixture
+def server():
+    with MockServer(ScriptedAPI(latency=0.0)) as server:
+        yield server
+
+@pytest.fixture
+def client(server):
+    def client(**options):
+        options.setdefault('retry_policy', RetryPolicy(backoff=0, jitter=False))
+        api = QuantumAPI('test', baseurl=server.url, **options)
+        api.account_id
+        return api
+    return client
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+
+from quantumpy import BatchCall, MemoryCache, RetryPolicy, Warehouse
+
+aiohttp = pytest.importorskip('aiohttp')
+from quantumpy.async_api import AsyncQuantumAPI
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+IDS     = ['1', '2']
+
+def run(server, test, **options):
+    async def main():
+        async with AsyncQuantumAPI('test', baseurl=server.url, retry_policy=RetryPolicy(backoff=0, jitter=False), **options) as api:
+            return await test(api)
+    return asyncio.run(main())
+
+def summary(api, **kwargs):
+    return api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, IDS, **kwargs)
+
+def test_cache_is_used(server):
+    cache = MemoryCache()
+
+    async def test(api):
+        first  = await summary(api)
+        second = await summary(api)
+        return first, second
+
+    first, second = run(server, test, cache=cache)
+    assert first == second
+    assert cache.hits == 1
+    assert server.app.requests.count(server.app.requests[-1]) == 1
+
+def test_batch(server):
+    async def test(api):
+        return await api.batch([
+            ('get_facebook_profiles_stat_summary', (PROJECT, SINCE, UNTIL, IDS)),
+            BatchCall('get_facebook_profiles_posts', PROJECT, '1', SINCE, UNTIL, IDS, page=True),
+            'get_unknown',
+        ])
+
+    results = run(server, test)
+    assert [result.index for result in results] == [0, 1, 2]
+    assert results[0].ok and results[0].result['data']
+    assert results[1].ok and isinstance(results[1].result, list)
+    assert isinstance(results[2].error, AttributeError)
+
+def test_batch_as_completed(server):
+    async def test(api):
+        return [result async for result in api.batch(['get_projects', 'get_projects'], max_workers=1, ordered=False)]
+
+    results = run(server, test)
+    assert sorted(result.index for result in results) == [0, 1]
+    assert all(result.ok for result in results)
+
+def test_pool_stats(server):
+    async def test(api):
+        for _ in range(3):
+            await api.get_projects()
+        return api.pool_stats()
+
+    stats = run(server, test, limit=5)
+    assert (stats['pools'], stats['maxsize'], stats['idle']) == (1, 5, 1)
+    assert stats['opened'] == 1
+    assert stats['requests'] == stats['opened'] + stats['reused'] == 4
+
+def test_warehouse_stores_responses(server, tmpdir):
+    warehouse = Warehouse(str(tmpdir.join('metrics.db')))
+
+    async def test(api):
+        return await api.get_facebook_fans_count_by_date(PROJECT, SINCE, UNTIL, IDS)
+
+    result = run(server, test, warehouse=warehouse)
+    assert len(warehouse.query('get_facebook_fans_count_by_date', PROJECT)) == sum(len(entry['data']) for entry in result['data'])
+    assert warehouse.missing('get_facebook_fans_count_by_date', PROJECT, SINCE, UNTIL, IDS) == {}
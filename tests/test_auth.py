@@ -0,0 +1,83 @@
+import base64
+import json
+import os
+import pytest
+import time
+
+from quantumpy import FileTokenCache, QuantumPythonError
+from quantumpy.auth import jwt_expiry
+
+def token(expires):
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': expires}).encode('ascii')).decode('ascii').rstrip('=')
+    return 'eyJhbGciOiJIUzI1NiJ9.{}.c2lnbmF0dXJl'.format(payload)
+
+def logins(server):
+    return server.app.requests.count('/api/v1/login')
+
+def login_response(jwt):
+    return json.dumps({'jwt': jwt, 'user': {'accountId': 1}}).encode()
+
+def test_jwt_expiry():
+    assert jwt_expiry(token(1500000000)) == 1500000000
+    assert jwt_expiry('not a token') is None
+
+def test_expiring_token_is_refreshed(server, client):
+    server.app.push('200 OK', login_response(token(time.time() + 0.5)))
+    api = client(refresh_margin=60)
+    api.get_projects()
+    assert logins(server) == 1
+
+    time.sleep(0.3)
+    api.get_projects()
+    assert logins(server) == 2
+    assert jwt_expiry(api.jwt) > time.time() + 3600
+
+def test_rejected_token_logs_in_again(server, client):
+    api = client()
+    server.app.push('401 Unauthorized', b'{"code": "authentication", "message": "Token expired"}')
+
+    assert api.get_projects()
+    assert logins(server) == 2
+
+def test_token_cache_is_shared_between_clients(server, client, tmpdir):
+    cache = FileTokenCache(str(tmpdir.join('tokens')))
+    first = client(token_cache=cache)
+    assert cache.load(cache.key(first.url, first.secret)) == (first.jwt, first.account_id)
+
+    client(token_cache=cache).get_projects()
+    assert logins(server) == 1
+
+def test_token_cache_round_trip(tmpdir):
+    cache = FileTokenCache(str(tmpdir.join('tokens')))
+    key   = cache.key('https://quantum/api/v1', 'secret')
+
+    assert cache.load(key) is None
+    cache.store(key, 'a.b.c', 7)
+    cache.store(key, 'd.e.f', 7)
+
+    assert cache.load(key) == ('d.e.f', 7)
+    assert os.listdir(cache.directory) == [key]
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+    assert os.stat(os.path.join(cache.directory, key)).st_mode & 0o777 == 0o600
+
+def test_token_cache_defaults_to_user_cache(monkeypatch, tmpdir):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir))
+    assert FileTokenCache().directory == os.path.join(str(tmpdir), 'quantumpy', 'tokens')
+
+def test_token_cache_refuses_shared_directory(tmpdir):
+    directory = tmpdir.mkdir('tokens')
+    directory.chmod(0o777)
+    cache = FileTokenCache(str(directory))
+
+    with pytest.raises(QuantumPythonError):
+        cache.store('key', 'a.b.c', 7)
+    with pytest.raises(QuantumPythonError):
+        cache.load('key')
+
+def test_token_cache_refuses_symlinked_directory(tmpdir):
+    target = tmpdir.mkdir('target')
+    target.chmod(0o700)
+    os.symlink(str(target), str(tmpdir.join('tokens')))
+
+    with pytest.raises(QuantumPythonError):
+        FileTokenCache(str(tmpdir.join('tokens'))).store('key', 'a.b.c', 7)
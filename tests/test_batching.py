@@ -0,0 +1,31 @@
+import pytest
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+IDS     = ['{:015d}'.format(i) for i in range(200)]
+
+def summary(api, ids):
+    return api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, ids)
+
+def summary_urls(server):
+    return [
+        server.address + path + '?' + query
+        for path, query in zip(server.app.requests, server.app.queries) if path.endswith('/stat-summary')
+    ]
+
+@pytest.mark.parametrize('options', [{'max_url_length': 1000}, {'max_url_length': 4000, 'ids_batch_size': 30}])
+def test_ids_are_split_under_url_limit(server, client, options):
+    whole  = summary(client(max_url_length=100000), IDS)
+    start  = len(summary_urls(server))
+    result = summary(client(**options), IDS)
+    urls   = summary_urls(server)[start:]
+
+    assert len(urls) > 1
+    assert max(len(url) for url in urls) <= options['max_url_length']
+    assert result == whole
+    assert [record['id'] for record in result['data']] == IDS
+
+def test_short_id_lists_are_sent_at_once(server, client):
+    summary(client(), IDS[:10])
+    assert len(summary_urls(server)) == 1
@@ -0,0 +1,63 @@
+import time
+import pytest
+
+from datetime import date, timedelta
+from quantumpy import MemoryCache, SQLiteCache, TieredCache
+
+URL = 'https://quantum/api/v1/accounts/1/projects'
+
+@pytest.fixture(params=['memory', 'sqlite', 'tiered'])
+def cache(request, tmpdir):
+    if request.param == 'memory':
+        return MemoryCache(maxsize=2)
+    if request.param == 'sqlite':
+        return SQLiteCache(str(tmpdir.join('cache.db')))
+    return TieredCache(MemoryCache(maxsize=2), SQLiteCache(str(tmpdir.join('cache.db'))))
+
+def test_key_depends_on_params_not_their_order():
+    cache = MemoryCache()
+    assert cache.key('GET', URL, {'since': '2017-01-01', 'until': '2017-01-31'}) == \
+           cache.key('GET', URL, {'until': '2017-01-31', 'since': '2017-01-01'})
+    assert cache.key('GET', URL, {'since': '2017-01-01'}) != cache.key('GET', URL, {'since': '2017-01-02'})
+    assert cache.key('GET', URL, {}) != cache.key('GET', URL + '/1', {})
+
+def test_ttl_depends_on_until():
+    cache = MemoryCache(recent_ttl=60, settled_ttl=3600, settle_days=2)
+    assert cache.ttl({'until': '2017-01-31'}) == 3600
+    assert cache.ttl({'until': date.today().isoformat()}) == 60
+    assert cache.ttl({'until': (date.today() - timedelta(days=1)).isoformat()}) == 60
+    assert cache.ttl({}) == 60
+
+def test_entries_expire(cache):
+    cache.set('a', {'data': [1]}, 0.2)
+    assert cache.get('a') == {'data': [1]}
+
+    time.sleep(0.25)
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 60)
+    cache.get('a')
+    cache.set('c', 3, 60)
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    assert cache.stats()['evictions'] == 1
+
+def test_sqlite_cache_evicts_down_to_max_bytes(tmpdir):
+    cache = SQLiteCache(str(tmpdir.join('cache.db')), max_bytes=2500)
+    for key in 'abc':
+        cache.set(key, 'x' * 1000, 60)
+
+    assert cache.get('a') is None and cache.get('c') == 'x' * 1000
+    assert cache.stats()['evictions'] == 1
+
+def test_client_caches_by_params(server, client):
+    api = client(cache=MemoryCache())
+    for since in ('2017-01-01', '2017-01-01', '2017-01-02'):
+        api.get_facebook_profiles_stat_summary(1, since, '2017-01-31', ['1001'])
+
+    assert len([path for path in server.app.requests if path.endswith('/stat-summary')]) == 2
+    assert api.cache.stats()['hits'] == 1
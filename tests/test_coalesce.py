@@ -0,0 +1,33 @@
+import threading
+import time
+
+from quantumpy import SingleFlight
+
+def test_waiting_callers_get_copies():
+    flight  = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def call():
+        started.set()
+        release.wait(5)
+        return {'data': [{'id': '1'}]}
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', call)))
+    leader.start()
+    started.wait(5)
+
+    followers = [threading.Thread(target=lambda: results.append(flight.do('key', call))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()['coalesced'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert flight.stats()['calls'] == 1
+    assert all(result == {'data': [{'id': '1'}]} for result in results)
+    assert len(set(id(result) for result in results)) == 4
+    assert len(set(id(result['data'][0]) for result in results)) == 4
@@ -0,0 +1,34 @@
+import json
+import pytest
+
+from decimal import Decimal
+from quantumpy.decoding import get_decoder, loads_decimal, loads_fast, parse_float
+
+BODY = b'{"data": [{"id": "1", "engagement": 0.1, "fans": 12, "name": "\\u00e9t\\u00e9"}], "paging": null}'
+
+def test_fast_decoder_matches_json():
+    assert loads_fast(BODY) == json.loads(BODY.decode('utf-8'))
+    assert loads_fast(BODY.decode('utf-8')) == loads_fast(BODY)
+
+def test_decimal_decoder_keeps_exact_values():
+    record = loads_decimal(BODY)['data'][0]
+    assert record['engagement'] == Decimal('0.1')
+    assert record['fans'] == 12 and isinstance(record['fans'], int)
+
+def test_get_decoder():
+    assert get_decoder('fast') is loads_fast
+    assert get_decoder('decimal') is loads_decimal
+    assert get_decoder(json.loads) is json.loads
+    assert parse_float(loads_decimal) is Decimal and parse_float(loads_fast) is None
+    with pytest.raises(ValueError):
+        get_decoder('slow')
+
+@pytest.mark.parametrize('decoder', ['fast', 'decimal'])
+def test_client_decodes_responses(client, decoder):
+    summary = client(decoder=decoder).get_facebook_profiles_stat_summary(1, '2017-01-01', '2017-01-31', ['1001'])
+    assert summary['data'][0]['engagement'] == (Decimal('0.25') if decoder == 'decimal' else 0.25)
+
+def test_streamed_records_use_decimal_decoder(server, client):
+    server.app.mock.configure(page_size=2, pages=1)
+    posts = list(client(decoder='decimal').get_facebook_profiles_posts(1, '1001', '2017-01-01', '2017-01-31', ['1001'], stream=True))
+    assert all(isinstance(post['engagement'], Decimal) for post in posts)
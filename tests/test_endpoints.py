@@ -0,0 +1,68 @@
+import inspect
+import pytest
+
+from six.moves.urllib.parse import parse_qsl
+from quantumpy import QuantumAPI, QuantumError
+from quantumpy.endpoints import ENDPOINTS, Endpoint, SERIES, install
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+
+def test_every_endpoint_is_installed():
+    for endpoint in ENDPOINTS:
+        assert QuantumAPI.endpoints[endpoint.name] is endpoint
+        assert getattr(QuantumAPI, endpoint.name).__doc__.strip().startswith(endpoint.path)
+
+def test_signature_follows_arguments():
+    parameters = inspect.signature(QuantumAPI.get_facebook_profiles_posts).parameters
+
+    assert list(parameters) == [
+        'self', 'project_id', 'fanpage_id', 'since', 'until', 'ids', 'owner', 'type',
+        'page', 'timezone', 'retry', 'prefetch', 'cursor', 'stream', 'records'
+    ]
+    assert parameters['since'].default is inspect.Parameter.empty
+    assert parameters['timezone'].default == 'UTC'
+    assert parameters['retry'].default == 3
+
+def test_properties():
+    endpoint = QuantumAPI.endpoints['get_facebook_profiles_posts']
+    assert endpoint.path_args == ('project_id', 'fanpage_id')
+    assert endpoint.params == ('since', 'until', 'ids', 'owner', 'type', 'timezone')
+    assert endpoint.paginated and not endpoint.chunkable
+
+    series = QuantumAPI.endpoints['get_facebook_fans_count_by_date']
+    assert series.chunkable and not series.paginated
+
+@pytest.mark.parametrize('call', [
+    lambda api: api.get_facebook_fans_count_by_date(PROJECT, SINCE, UNTIL, ['1001'], 'America/Lima'),
+    lambda api: api.get_facebook_fans_count_by_date(PROJECT, SINCE, UNTIL, ids=['1001'], timezone='America/Lima')
+])
+def test_call_fills_path_and_params(server, client, call):
+    api    = client()
+    result = call(api)
+
+    assert [(row['id'], row['total']) for row in result['data']] == [('1001', 31)]
+    assert server.app.requests[-1] == '/api/v1/accounts/{}/projects/1/facebook/fans/count/date'.format(api.account_id)
+    assert dict(parse_qsl(server.app.queries[-1])) == {
+        'since': SINCE, 'until': UNTIL, 'ids': '["1001"]', 'timezone': 'America/Lima'
+    }
+
+def test_error_message(monkeypatch, client):
+    api = client()
+    monkeypatch.setattr(api, '_query', lambda *args, **kwargs: False)
+
+    with pytest.raises(QuantumError) as error:
+        api.get_facebook_profiles_posts(PROJECT, '42', SINCE, UNTIL, None)
+    assert str(error.value) == 'Could not get posts for fanpage 42.'
+
+def test_install_adds_endpoints():
+    class API(QuantumAPI):
+        pass
+
+    install(API, [Endpoint('get_custom_by_date', '/accounts/{account_id}/projects/{project_id}/custom/{metric}/date', SERIES)])
+
+    assert 'get_custom_by_date' in API.endpoints
+    assert 'get_projects' in API.endpoints
+    assert not hasattr(QuantumAPI, 'get_custom_by_date')
+    assert list(inspect.signature(API.get_custom_by_date).parameters)[:4] == ['self', 'project_id', 'metric', 'since']
@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import pytest
+
+from quantumpy import Exporter, ExportJob, NDJSONWriter, ParquetWriter
+from quantumpy.export import project_jobs
+
+PROFILES = [('facebook', '1001'), ('twitter', '1002')]
+
+def read_ndjson(path):
+    with (gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')) as f:
+        return [json.loads(line.decode('utf-8')) for line in f]
+
+def export(server, client, writer):
+    server.app.mock.configure(page_size=5, pages=3)
+    jobs = project_jobs(client(), '2017-01-01', '2017-01-31', lambda project: PROFILES, projects=[{'id': 1}])
+    return Exporter(client(), writer, concurrency=2, queue_size=4).run(jobs)
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_ndjson_files_rotate(server, client, tmpdir, compress):
+    writer = NDJSONWriter(str(tmpdir), max_records=7, compress=compress)
+    result = export(server, client, writer)
+    suffix = '.ndjson.gz' if compress else '.ndjson'
+
+    assert result.ok and result.jobs == 2 and result.records == 30
+    assert [os.path.basename(path) for path in result.files] == ['export-{:05d}{}'.format(n, suffix) for n in range(1, 6)]
+
+    rows = [read_ndjson(path) for path in result.files]
+    assert [len(part) for part in rows] == [7, 7, 7, 7, 2]
+    keys = sorted((row['profile_id'], row['id']) for part in rows for row in part)
+    assert len(set(keys)) == 30
+    assert all(row['project_id'] == 1 for part in rows for row in part)
+
+def test_ndjson_rotates_on_bytes(tmpdir):
+    writer = NDJSONWriter(str(tmpdir), max_bytes=20)
+    for n in range(5):
+        writer.write({'id': n, 'name': 'record'})
+    writer.close()
+
+    assert len(writer.files) == 5
+    assert [read_ndjson(path) for path in writer.files] == [[{'id': n, 'name': 'record'}] for n in range(5)]
+
+def test_parquet_files_rotate(server, client, tmpdir):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    writer  = ParquetWriter(str(tmpdir), max_records=7, row_group_size=4)
+    result  = export(server, client, writer)
+
+    assert result.ok and result.records == 30
+    tables = [parquet.read_table(path) for path in result.files]
+    assert [table.num_rows for table in tables] == [7, 7, 7, 7, 2]
+    keys = set(
+        key for table in tables
+        for key in zip(table.column('profile_id').to_pylist(), table.column('id').to_pylist())
+    )
+    assert len(keys) == 30
+    assert isinstance(tables[0].column('reactions').to_pylist()[0], str)
+
+def test_parquet_new_columns_start_a_file(tmpdir):
+    pytest.importorskip('pyarrow.parquet')
+    writer = ParquetWriter(str(tmpdir), row_group_size=2)
+    for row in [{'id': 1}, {'id': 2}, {'id': 3, 'extra': 'x'}, {'id': 4, 'extra': 'y'}, {'id': 5}]:
+        writer.write(row)
+    writer.close()
+
+    assert len(writer.files) == 2 and writer.records == 5
+
+def test_failed_jobs_are_reported(server, client, tmpdir):
+    writer = NDJSONWriter(str(tmpdir))
+    jobs   = [ExportJob('get_facebook_profiles_posts', (1, '1001', '2017-01-01', '2017-01-31', ['1001'])), ExportJob('get_unknown')]
+    result = Exporter(client(), writer).run(jobs)
+
+    assert not result.ok and result.jobs == 2
+    assert [(job.method, type(error)) for job, error in result.errors] == [('get_unknown', AttributeError)]
+    assert result.records == len(read_ndjson(result.files[0])) > 0
@@ -0,0 +1,9 @@
+import subprocess
+import sys
+
+def test_optional_packages_are_imported_on_first_use():
+    code = (
+        'import sys, quantumpy\n'
+        'print(",".join(name for name in ("aiohttp", "numpy", "pandas", "pyarrow") if name in sys.modules))\n'
+    )
+    assert subprocess.check_output([sys.executable, '-c', code]).decode().strip() == ''
@@ -0,0 +1,26 @@
+import pytest
+
+from quantumpy.join import attach
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+
+def test_attach_copies_posts():
+    posts  = [{'id': '1'}, {'id': '2'}]
+    joined = attach(posts, [{'data': [{'id': '1', 'data': [[SINCE, 3]]}]}], 'interactions')
+
+    assert joined == [{'id': '1', 'interactions': {'id': '1', 'data': [[SINCE, 3]]}}, {'id': '2', 'interactions': None}]
+    assert posts == [{'id': '1'}, {'id': '2'}]
+
+def test_posts_with_interactions(server, client):
+    server.app.mock.configure(page_size=5, pages=2)
+    api   = client()
+    posts = list(api.posts_with_interactions('get_facebook_profiles_posts', PROJECT, '1001', SINCE, UNTIL, ['1001'], batch_size=2))
+
+    assert len(posts) == 10
+    assert all('interactions' in post for post in posts)
+
+def test_posts_with_interactions_rejects_records(server, client):
+    with pytest.raises(ValueError):
+        client().posts_with_interactions('get_facebook_profiles_posts', PROJECT, '1001', SINCE, UNTIL, ['1001'], records=True)
@@ -0,0 +1,30 @@
+from quantumpy import MetricsCollector
+
+def test_pool_stats_count_open_connections(client):
+    api = client()
+    api.get_projects()
+    stats = api.pool_stats()
+
+    assert stats['opened'] == 1
+    assert stats['idle'] == 1
+    assert stats['maxsize'] >= 10
+
+def test_metrics_collector(server, client):
+    metrics = MetricsCollector()
+    api     = client(hooks=[metrics])
+    server.app.push('500 Internal Server Error', b'{"message": "Internal server error"}')
+
+    for _ in range(3):
+        api.get_facebook_profiles_stat_summary(1, '2017-01-01', '2017-01-31', ['1001'], retry=1)
+
+    endpoint = metrics.snapshot()['/accounts/{account_id}/projects/{project_id}/facebook/profiles/stat-summary']
+    assert endpoint['requests'] == {'500': 1, '200': 3}
+    assert endpoint['errors'] == {'InternalServerError': 1}
+    assert endpoint['retries'] == 1
+    assert endpoint['connections']['new'] + endpoint['connections']['reused'] == 4
+    assert endpoint['sizes']['count'] == 4 and endpoint['bytes'] > 0
+    assert endpoint['durations']['total']['count'] == 4
+
+    text = metrics.to_prometheus(api.pool_stats())
+    assert 'quantumpy_requests_total{endpoint="/accounts/{account_id}/projects/{project_id}/facebook/profiles/stat-summary",status="200"} 3' in text
+    assert 'quantumpy_pool_connections{state="opened"} 1' in text
@@ -0,0 +1,64 @@
+import pytest
+
+from quantumpy import ProjectOverview
+from quantumpy.overview import normalize, project_profiles
+
+SINCE = '2017-01-01'
+UNTIL = '2017-01-31'
+
+def test_project_profiles():
+    assert project_profiles({'profiles': {'facebook': ['1', '2'], 'twitter': [{'id': '3'}], 'youtube': []}}) == {
+        'facebook': ['1', '2'], 'twitter': ['3']
+    }
+    assert project_profiles({'instagram': [{'profile_id': 4}], 'name': 'Project'}) == {'instagram': [4]}
+
+def test_normalize_flattens_and_renames():
+    rows = normalize('twitter', {'data': [{'profileId': 7, 'stats': {'fans': 10, 'growth': {'fans': 2}}}]}, {'stats.fans': 'followers'})
+    assert rows == [{'network': 'twitter', 'profile_id': '7', 'followers': 10, 'stats.growth.fans': 2}]
+
+    assert normalize('facebook', {'1': {'fans': 5}, 'paging': None}) == [{'network': 'facebook', 'profile_id': '1', 'fans': 5}]
+
+def test_from_results():
+    error    = ValueError('failed')
+    overview = ProjectOverview.from_results([
+        ('facebook', [{'id': '1', 'fans': 5}, {'id': '2', 'fans': 6}], None),
+        ('twitter', {'data': [{'id': '3', 'followers': 7}]}, None),
+        ('youtube', None, error)
+    ])
+
+    assert len(overview) == 3 and not overview.ok
+    assert overview.errors == {'youtube': error}
+    assert overview.networks == ['facebook', 'twitter']
+    assert overview.columns == ['fans', 'followers']
+    assert overview.get('twitter', 3) == {'network': 'twitter', 'profile_id': '3', 'followers': 7}
+    assert overview.get('youtube', 3) is None
+
+def test_get_project_overview(server, client):
+    overview = client().get_project_overview(1, SINCE, UNTIL)
+
+    assert overview.ok and len(overview) == 20
+    assert overview.networks == ['facebook', 'instagram', 'twitter', 'youtube']
+    assert overview.columns == ['fans', 'interactions', 'posts', 'engagement']
+    assert overview.get('instagram', 1004)['fans'] == 10000
+    assert sorted(path.rsplit('/', 3)[1] for path in server.app.requests if path.endswith('/stat-summary')) == [
+        'facebook', 'instagram', 'twitter', 'youtube'
+    ]
+
+def test_failed_network_is_reported(server, client):
+    api = client()
+    server.app.push('500 Internal Server Error', b'{"message": "Internal server error"}')
+    overview = api.get_project_overview(1, SINCE, UNTIL, profiles={'facebook': ['1001'], 'twitter': ['1002', '1003']}, retry=0)
+
+    assert list(overview.errors) in (['facebook'], ['twitter'])
+    assert len(overview) == (2 if 'facebook' in overview.errors else 1)
+
+def test_to_frame():
+    overview = ProjectOverview.from_results([('facebook', [{'id': '1', 'fans': 5}], None)])
+    try:
+        import pandas
+    except ImportError:
+        with pytest.raises(ImportError):
+            overview.to_frame()
+    else:
+        frame = overview.to_frame()
+        assert frame.loc[('facebook', '1'), 'fans'] == 5
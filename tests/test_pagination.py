@@ -0,0 +1,51 @@
+import itertools
+
+from quantumpy import HTTPError
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+
+def posts(api, **kwargs):
+    return api.get_facebook_profiles_posts(PROJECT, '1001', SINCE, UNTIL, ['1001'], stream=True, **kwargs)
+
+def fail_once(api, page, after):
+    """
+    Make the first request for the `page`-th page fail once `after` of its records have been read
+    """
+    stream, failed = api._stream, []
+
+    def flaky(method, path, params, parser, attempt=0, number=None):
+        for i, record in enumerate(stream(method, path, params, parser, attempt, number)):
+            if number == page and i == after and not failed:
+                failed.append(path)
+                raise HTTPError('Connection reset')
+            yield record
+
+    api._stream = flaky
+    return failed
+
+def test_page_failing_midway_is_resumed(server, client):
+    server.app.mock.configure(page_size=5, pages=3)
+    api      = client()
+    expected = [post['id'] for post in posts(api)]
+
+    failed  = fail_once(api, page=2, after=3)
+    records = [post['id'] for post in posts(api, retry=1)]
+
+    assert failed
+    assert records == expected
+    assert len(records) == 15 and len(set(records)) == 15
+
+def test_resume_from_cursor(server, client):
+    server.app.mock.configure(page_size=5, pages=3)
+    api      = client()
+    expected = [post['id'] for post in posts(api)]
+
+    iterator = posts(api)
+    first    = [post['id'] for post in itertools.islice(iterator, 7)]
+    assert iterator.pages == 1
+    iterator.close()
+
+    resumed = [post['id'] for post in posts(api, cursor=iterator.cursor)]
+    assert first[:5] + resumed == expected
@@ -0,0 +1,56 @@
+import pytest
+
+from quantumpy import RateLimiter, SQLiteTokenBucket, TokenBucket
+
+PATH = '/accounts/1/projects/1/facebook/profiles/stat-summary'
+
+class Clock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def bucket(request, tmpdir):
+    def bucket(rate, capacity, clock, name='test'):
+        if request.param == 'memory':
+            return TokenBucket(rate, capacity, clock)
+        return SQLiteTokenBucket(str(tmpdir.join('buckets.db')), name, rate, capacity, clock)
+    return bucket
+
+def test_burst_then_rate(bucket):
+    clock  = Clock()
+    tokens = bucket(2, 4, clock)
+
+    assert [tokens.reserve() for _ in range(4)] == [0.0] * 4
+    assert [tokens.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+    clock.now += 1.5
+    assert tokens.reserve() == 0.5
+
+def test_refill_is_capped_at_capacity(bucket):
+    clock  = Clock()
+    tokens = bucket(1, 2, clock)
+    tokens.reserve()
+
+    clock.now += 3600
+    assert [tokens.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+def test_sqlite_buckets_share_their_budget(tmpdir):
+    clock = Clock()
+    path  = str(tmpdir.join('buckets.db'))
+    a, b  = SQLiteTokenBucket(path, 'account:1', 1, 1, clock), SQLiteTokenBucket(path, 'account:1', 1, 1, clock)
+
+    assert a.reserve() == 0.0
+    assert b.reserve() == 1.0
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_rate_limiter_families(tmpdir, shared):
+    clock   = Clock()
+    limiter = RateLimiter(rate=(10, 10), families={'facebook': (1, 1)}, path=str(tmpdir.join('buckets.db')) if shared else None, clock=clock)
+
+    assert limiter.reserve(1, PATH) == 0.0
+    assert limiter.reserve(1, PATH) == 1.0
+    assert limiter.reserve(1, PATH.replace('facebook', 'twitter')) == 0.0
+    assert limiter.reserve(2, PATH) == 0.0
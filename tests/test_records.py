@@ -0,0 +1,50 @@
+import pickle
+import pytest
+
+from quantumpy import Post, RecordPage, Tweet
+
+DATA = {'id': '1_1', 'message': 'Hello', 'class': 'photo', 'reactions': {'like': 3}, 'tags': [], 'from-page': True}
+
+def test_fields_read_as_attributes_and_items():
+    post = Post.from_dict(DATA)
+
+    assert (post.id, post.message, post['class'], post['from-page']) == ('1_1', 'Hello', 'photo', True)
+    assert post.reactions == {'like': 3} and post['tags'] == []
+    assert post.get('missing', 0) == 0 and 'message' in post and 'missing' not in post
+    assert post.keys() == list(DATA) and len(post) == len(DATA)
+    assert post == DATA and post.to_dict() == DATA
+    with pytest.raises(KeyError):
+        post['missing']
+
+def test_records_are_slotted_and_share_their_class():
+    a, b = Post.from_dict(DATA), Post.from_dict(dict(DATA, id='1_2'))
+
+    assert type(a) is type(b) and isinstance(a, Post)
+    assert not hasattr(a, '__dict__')
+    with pytest.raises(AttributeError):
+        a.extra = 1
+    assert type(Tweet.from_dict(DATA)) is not type(a)
+    assert type(Post.from_dict({'id': '1'})) is not type(a)
+
+def test_nested_values_are_decoded_once():
+    post = Post.from_dict(DATA)
+    assert post.reactions is post.reactions
+
+def test_records_pickle():
+    post = Post.from_dict(DATA)
+    assert pickle.loads(pickle.dumps(post)) == post
+
+def test_record_page():
+    page = RecordPage.from_result({'data': [DATA, dict(DATA, id='1_2')], 'paging': {'next': '/posts?cursor=1'}}, Post)
+
+    assert len(page) == 2 and [post.id for post in page] == ['1_1', '1_2']
+    assert page['data'] is page and page[1].id == '1_2'
+    assert page.next_url == '/posts?cursor=1'
+    assert RecordPage.from_result([DATA], Post).next_url is None
+
+def test_client_records(server, client):
+    server.app.mock.configure(page_size=3, pages=2)
+    posts = list(client().get_facebook_profiles_posts(1, '1001', '2017-01-01', '2017-01-31', ['1001'], stream=True, records=True))
+
+    assert len(posts) == 6 and all(isinstance(post, Post) for post in posts)
+    assert posts[0].reactions['like'] >= 0
@@ -0,0 +1,135 @@
+import asyncio
+import time
+import pytest
+
+from quantumpy import CircuitBreaker, CircuitOpenError, HTTPError, InternalServerError, RateLimitError, RetryPolicy
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+IDS     = ['1001']
+
+def summary(api, **kwargs):
+    return api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, IDS, **kwargs)
+
+def breaker_policy():
+    return RetryPolicy(backoff=0, jitter=False, breaker=CircuitBreaker(threshold=1, reset_timeout=0.2))
+
+def half_open(server, api):
+    """
+    Open the circuit with a failure, then wait until a probe may be sent
+    """
+    server.app.push('500 Internal Server Error', b'{"message": "Internal server error"}')
+    with pytest.raises(InternalServerError):
+        summary(api, retry=0)
+
+    breaker = api.retry_policy.breaker
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        summary(api)
+
+    time.sleep(0.25)
+    assert breaker.state == 'half-open'
+    return breaker
+
+def test_breaker_closes_after_successful_probe(server, client):
+    api     = client(retry_policy=breaker_policy())
+    breaker = half_open(server, api)
+
+    summary(api)
+    assert breaker.state == 'closed'
+
+def test_breaker_reopens_after_failed_probe(server, client):
+    api     = client(retry_policy=breaker_policy())
+    breaker = half_open(server, api)
+
+    server.app.push('500 Internal Server Error', b'{"message": "Internal server error"}')
+    with pytest.raises(InternalServerError):
+        summary(api, retry=0)
+    assert breaker.state == 'open'
+
+def test_probe_released_after_unparseable_response(server, client):
+    api     = client(retry_policy=breaker_policy())
+    breaker = half_open(server, api)
+
+    server.app.push('200 OK', b'<html>maintenance</html>', 'text/html')
+    with pytest.raises(ValueError):
+        summary(api)
+    assert breaker.state == 'half-open'
+
+    summary(api)
+    assert breaker.state == 'closed'
+
+def test_probe_released_when_stream_closed_early(server, client):
+    api     = client(retry_policy=breaker_policy())
+    breaker = half_open(server, api)
+
+    records = api.get_facebook_profiles_posts(PROJECT, IDS[0], SINCE, UNTIL, IDS, stream=True)
+    next(records)
+    records.close()
+    assert breaker.state == 'half-open'
+
+    summary(api)
+    assert breaker.state == 'closed'
+
+def test_probe_kept_across_relogin(server, client):
+    api     = client(retry_policy=breaker_policy())
+    breaker = half_open(server, api)
+
+    server.app.push('200 OK', b'{"code": "authentication", "message": "Token expired"}')
+    assert summary(api)['data'][0]['id'] == IDS[0]
+    assert breaker.state == 'closed'
+
+def test_async_probe_kept_across_relogin(server):
+    pytest.importorskip('aiohttp')
+    from quantumpy.async_api import AsyncQuantumAPI
+
+    async def run():
+        async with AsyncQuantumAPI('test', baseurl=server.url, retry_policy=breaker_policy()) as api:
+            await api.get_projects()
+            breaker = api.retry_policy.breaker
+
+            server.app.push('500 Internal Server Error', b'{"message": "Internal server error"}')
+            with pytest.raises(InternalServerError):
+                await summary(api, retry=0)
+            await asyncio.sleep(0.25)
+
+            server.app.push('200 OK', b'{"code": "authentication", "message": "Token expired"}')
+            await summary(api)
+            return breaker.state
+
+    assert asyncio.run(run()) == 'closed'
+
+def test_client_errors_are_not_retried(server, client):
+    api = client(retry_policy=breaker_policy())
+    server.app.push('404 Not Found', b'Not found', 'text/plain')
+
+    with pytest.raises(HTTPError) as error:
+        summary(api, retry=3)
+
+    assert error.value.status_code == 404
+    assert len([path for path in server.app.requests if path.endswith('/stat-summary')]) == 1
+    assert api.retry_policy.breaker.failures == 0
+    assert api.retry_policy.breaker.state == 'closed'
+
+def test_server_errors_are_retried(server, client):
+    api = client(retry_policy=RetryPolicy(backoff=0, jitter=False, breaker=None))
+    server.app.push('502 Bad Gateway', b'Bad gateway', 'text/plain')
+
+    assert summary(api, retry=3)['data']
+    assert len([path for path in server.app.requests if path.endswith('/stat-summary')]) == 2
+
+@pytest.mark.parametrize('error, retryable', [
+    (HTTPError('connection reset'), True),
+    (HTTPError('HTTP 500', status_code=500), True),
+    (HTTPError('HTTP 502', status_code=502), True),
+    (RateLimitError('HTTP 429', status_code=429), True),
+    (HTTPError('HTTP 400', status_code=400), False),
+    (HTTPError('HTTP 401', status_code=401), False),
+    (HTTPError('HTTP 403', status_code=403), False),
+    (HTTPError('HTTP 404', status_code=404), False),
+    (InternalServerError('Internal server error'), True),
+    (ValueError('not JSON'), False)
+])
+def test_retryable_errors(error, retryable):
+    assert RetryPolicy().is_retryable(error) is retryable
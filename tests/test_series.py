@@ -0,0 +1,77 @@
+import pytest
+
+from quantumpy.series import date_windows, merge_results, slice_result
+
+PROJECT = 1
+IDS     = ['1001', '1002']
+
+def series(since, days, start=0):
+    points = [{'date': '2017-01-{:02d}'.format(since + i), 'count': start + i} for i in range(days)]
+    return {'id': '1001', 'total': sum(point['count'] for point in points), 'points': len(points), 'data': points}
+
+@pytest.mark.parametrize('chunk', ['month', 'week', 10])
+def test_chunked_call_matches_unchunked(client, chunk):
+    api = client()
+
+    whole   = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-03-31', IDS)
+    chunked = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-03-31', IDS, chunk=chunk)
+
+    assert [record['total'] for record in whole['data']] == [90, 90]
+    assert [record['total'] for record in chunked['data']] == [90, 90]
+    assert [[point['date'] for point in record['data']] for record in chunked['data']] == \
+           [[point['date'] for point in record['data']] for record in whole['data']]
+
+def test_merge_recomputes_totals():
+    merged = merge_results([series(1, 5), series(5, 5, start=4)])
+
+    assert [point['date'] for point in merged['data']] == ['2017-01-{:02d}'.format(day) for day in range(1, 10)]
+    assert merged['total'] == sum(point['count'] for point in merged['data'])
+    assert merged['points'] == 9
+
+def test_merge_keeps_unrelated_values():
+    a, b = dict(series(1, 5), name='A', rate=0.5), dict(series(6, 5), name='B', rate=0.5)
+
+    merged = merge_results([a, b])
+    assert merged['name'] == 'B'
+    assert merged['rate'] == 0.5
+
+def test_merge_recomputes_means():
+    a, b = series(1, 4), series(5, 2, start=10)
+    a['average'], b['average'] = 1.5, 10.5
+
+    assert merge_results([a, b])['average'] == 4.5
+
+def test_merge_rejects_values_it_cannot_recompute():
+    a, b = dict(series(1, 5), rate=0.2), dict(series(6, 5), rate=0.9)
+
+    with pytest.raises(ValueError):
+        merge_results([a, b])
+
+def test_overwrite_merge_recomputes_totals():
+    merged = merge_results([series(1, 5), series(4, 3, start=100)], overwrite=True)
+
+    assert [point['count'] for point in merged['data']] == [0, 1, 2, 100, 101, 102]
+    assert merged['total'] == 306
+
+def test_slice_recomputes_totals():
+    sliced = slice_result(series(1, 10), '2017-01-03', '2017-01-05')
+
+    assert [point['count'] for point in sliced['data']] == [2, 3, 4]
+    assert sliced['total'] == 9
+    assert sliced['points'] == 3
+
+def test_merge_does_not_modify_inputs():
+    a, b = series(1, 5), series(6, 5)
+    merge_results([a, b])
+    assert a == series(1, 5) and b == series(6, 5)
+
+def test_date_windows_cover_range():
+    assert date_windows('2017-01-01', '2017-03-15', 'month') == [
+        ('2017-01-01', '2017-02-01'), ('2017-02-01', '2017-03-01'), ('2017-03-01', '2017-03-15')
+    ]
+
+def test_date_windows_without_overlap():
+    assert date_windows('2017-01-01', '2017-03-01', 'month', overlap=False) == [
+        ('2017-01-01', '2017-01-31'), ('2017-02-01', '2017-02-28'), ('2017-03-01', '2017-03-01')
+    ]
+    assert date_windows('2017-01-01', '2017-01-14', 7, overlap=False) == [('2017-01-01', '2017-01-07'), ('2017-01-08', '2017-01-14')]
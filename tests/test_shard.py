@@ -0,0 +1,65 @@
+import os
+import pytest
+
+from quantumpy import ExportJob, WorkQueue
+from quantumpy.shard import DONE, FAILED, PENDING, RUNNING, project_units
+
+def job(id):
+    return ExportJob('get_facebook_profiles_posts', (1, id, '2017-01-01', '2017-01-31', [id]))
+
+@pytest.fixture
+def queue(tmpdir):
+    return WorkQueue(os.path.join(str(tmpdir), 'queue.db'), max_attempts=2)
+
+def test_add_skips_queued_jobs(queue):
+    assert queue.add([job('1'), job('2')]) == 2
+    assert queue.add([job('2'), job('3')]) == 1
+    assert queue.counts()[PENDING] == 3
+
+def test_claim(queue):
+    queue.add([job('1'), job('2')])
+    first, second = queue.claim('a'), queue.claim('b')
+
+    assert (first.job.args[1], first.attempts) == ('1', 1)
+    assert second.job.args[1] == '2'
+    assert queue.claim('c') is None
+    assert queue.counts()[RUNNING] == 2
+
+def test_complete(queue):
+    queue.add([job('1')])
+    queue.complete(queue.claim('a').id, 10, ['unit-000001-00001.ndjson'])
+
+    assert queue.counts()[DONE] == 1
+    assert queue.units()[0][4:] == (10, ['unit-000001-00001.ndjson'], None)
+
+def test_fail_until_attempts_run_out(queue):
+    queue.add([job('1')])
+    queue.fail(queue.claim('a').id, 'timeout')
+    assert queue.counts()[PENDING] == 1
+
+    unit = queue.claim('a')
+    assert unit.attempts == 2
+    queue.fail(unit.id, 'timeout')
+    assert queue.counts()[FAILED] == 1
+    assert queue.claim('a') is None
+
+    assert queue.retry_failed() == 1
+    assert queue.claim('a').attempts == 1
+
+def test_release(queue):
+    queue.add([job('1'), job('2')])
+    queue.claim('a')
+    queue.claim('b')
+
+    assert queue.release('a') == 1
+    assert queue.counts() == {PENDING: 1, RUNNING: 1, DONE: 0, FAILED: 0}
+    assert queue.units(PENDING)[0][6] == 'worker exited'
+    assert queue.release() == 1
+    assert queue.counts()[PENDING] == 2
+
+def test_project_units_do_not_overlap(client):
+    api   = client()
+    units = list(project_units(api, '2017-01-01', '2017-03-15', lambda project: [('facebook', '1001')], projects=[{'id': 1}]))
+    dates = sorted(set(unit.args[2:4] for unit in units))
+
+    assert dates == [('2017-01-01', '2017-01-31'), ('2017-02-01', '2017-02-28'), ('2017-03-01', '2017-03-15')]
@@ -0,0 +1,73 @@
+import json
+import pytest
+
+from quantumpy import Exporter, ExportJob, HTTPError, NDJSONWriter
+from quantumpy.streaming import StreamParser
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+
+BODIES = [
+    {'data': [{'id': '1', 'message': 'say "hi" \\ \u00e9t\u00e9 \U0001f600 \n\t', 'tags': ['a', {'b': [1, 2.5, None]}]},
+              {'id': '2', 'nested': {'deep': {'er': [[], {}, [{}]]}}, 'ok': True, 'n': -1.5e3}],
+     'paging': {'next': '/posts?cursor=2', 'previous': None}},
+    {'paging': {'next': None}, 'count': 0, 'data': []},
+    [{'id': 'x', 'text': ']}{["'}, {'id': 'y'}],
+]
+
+def posts(api, **kwargs):
+    return api.get_facebook_profiles_posts(PROJECT, '1001', SINCE, UNTIL, ['1001'], stream=True, **kwargs)
+
+def test_stream_raises_on_error_status(server, client):
+    api = client()
+    server.app.push('403 Forbidden', b'{"message": "Forbidden"}')
+
+    with pytest.raises(HTTPError) as error:
+        list(posts(api))
+    assert error.value.status_code == 403
+    assert 'Forbidden' in str(error.value)
+
+def test_export_reports_error_status(server, client, tmpdir):
+    api = client()
+    server.app.push('404 Not Found', b'{"message": "No such profile"}')
+
+    result = Exporter(api, NDJSONWriter(str(tmpdir)), concurrency=1).run([
+        ExportJob('get_facebook_profiles_posts', (PROJECT, '1001', SINCE, UNTIL, ['1001']))
+    ])
+    assert result.records == 0
+    assert [error.status_code for job, error in result.errors] == [404]
+
+def parse(body, split):
+    parser  = StreamParser()
+    records = parser.feed(body[:split]) + parser.feed(body[split:]) + parser.close()
+    return records, parser.rest
+
+@pytest.mark.parametrize('ascii', [True, False])
+@pytest.mark.parametrize('data', BODIES)
+def test_parser_matches_json_at_every_split(data, ascii):
+    # Escaped (\\uXXXX) or raw multi-byte UTF-8 characters get split too
+    body     = json.dumps(data, ensure_ascii=ascii).encode('utf-8')
+    expected = json.loads(body.decode('utf-8'))
+    records  = expected if isinstance(expected, list) else expected['data']
+    rest     = {} if isinstance(expected, list) else {key: value for key, value in expected.items() if key != 'data'}
+
+    for split in range(len(body) + 1):
+        assert parse(body, split) == (records, rest), split
+
+def test_parser_byte_by_byte():
+    body   = json.dumps(BODIES[0]).encode('utf-8')
+    parser = StreamParser()
+    records = []
+    for i in range(len(body)):
+        records.extend(parser.feed(body[i:i + 1]))
+    records.extend(parser.close())
+
+    assert records == BODIES[0]['data']
+    assert parser.rest == {'paging': BODIES[0]['paging']}
+
+def test_parser_rejects_truncated_body():
+    parser = StreamParser()
+    parser.feed(json.dumps(BODIES[0]).encode('utf-8')[:-5])
+    with pytest.raises(ValueError):
+        parser.close()
@@ -0,0 +1,49 @@
+import pytest
+
+from quantumpy import SeriesSync
+
+PROJECT = 1
+IDS     = ['1001', '1002']
+METHOD  = 'get_facebook_fans_count_by_date'
+
+def dates(result):
+    return [[point['date'] for point in record['data']] for record in result['data']]
+
+@pytest.mark.parametrize('path', [None, 'file'])
+def test_synced_result_matches_full_fetch(client, tmpdir, path):
+    api  = client()
+    sync = SeriesSync(api, path=str(tmpdir.join('series.db')) if path else None)
+
+    sync.get(METHOD, PROJECT, '2017-01-01', '2017-01-30', IDS)
+    synced = sync.get(METHOD, PROJECT, '2017-01-01', '2017-02-28', IDS)
+    fresh  = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-02-28', IDS)
+
+    assert sync.requests == 2
+    assert dates(synced) == dates(fresh)
+    assert [record['total'] for record in synced['data']] == [record['total'] for record in fresh['data']] == [59, 59]
+
+def test_synced_slice_matches_fetch(client):
+    api  = client()
+    sync = SeriesSync(api)
+
+    sync.get(METHOD, PROJECT, '2017-01-01', '2017-02-28', IDS)
+    sliced = sync.get(METHOD, PROJECT, '2017-01-10', '2017-01-20', IDS)
+    fresh  = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-10', '2017-01-20', IDS)
+
+    assert sync.requests == 1
+    assert dates(sliced) == dates(fresh)
+    assert [record['total'] for record in sliced['data']] == [11, 11]
+
+def test_returned_results_are_copies(client):
+    sync  = SeriesSync(client())
+    first = sync.get(METHOD, PROJECT, '2017-01-01', '2017-01-30', IDS)
+
+    first['data'][0]['data'][0]['count'] = -1
+    first['data'][0]['total'] = -1
+
+    again = sync.get(METHOD, PROJECT, '2017-01-01', '2017-01-30', IDS)
+    assert again['data'][0]['data'][0]['count'] != -1
+    assert again['data'][0]['total'] == 30
+
+    again['data'][0]['data'][0]['count'] = -2
+    assert sync.get(METHOD, PROJECT, '2017-01-01', '2017-01-30', IDS)['data'][0]['data'][0]['count'] != -2
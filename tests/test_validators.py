@@ -0,0 +1,44 @@
+import json
+
+from quantumpy import ValidatorStore
+
+PROJECT = 1
+SINCE   = '2017-01-01'
+UNTIL   = '2017-01-31'
+IDS     = ['1001']
+
+def summary(api):
+    return api.get_facebook_profiles_stat_summary(PROJECT, SINCE, UNTIL, IDS)
+
+def test_not_modified_returns_stored_result(server, client):
+    server.app.mock.configure(etags=True)
+    api = client(validators=True, coalesce=False)
+
+    first, second = summary(api), summary(api)
+    assert second == first
+    assert server.app.mock.stats['not_modified'] == 1
+    assert api.validators.stats() == {'not_modified': 1, 'unchanged': 0, 'changed': 1, 'size': 1}
+
+def test_unchanged_body_is_not_decoded_again(server, client):
+    api = client(validators=True)
+    decoded = []
+    decoder = api.decoder
+    api.decoder = lambda content: decoded.append(content) or decoder(content)
+
+    first, second = summary(api), summary(api)
+    assert second is first
+    assert len(decoded) == 1
+    assert api.validators.stats()['unchanged'] == 1
+
+def test_changed_body_replaces_stored_result(server, client):
+    validators = ValidatorStore()
+    api        = client(validators=validators)
+    summary(api)
+
+    changed = {'data': [{'id': '1001', 'fans': 1}]}
+    server.app.push('200 OK', json.dumps(changed).encode())
+    assert summary(api) == changed
+    assert summary(api)['data'][0]['fans'] == 10000
+    assert summary(api)['data'][0]['fans'] == 10000
+
+    assert validators.stats() == {'not_modified': 0, 'unchanged': 1, 'changed': 3, 'size': 1}
@@ -0,0 +1,54 @@
+import json
+import os
+import pytest
+
+from quantumpy import Warehouse
+
+METHOD  = 'get_facebook_fans_count_by_date'
+PROJECT = 1
+IDS     = ['1', '2']
+
+@pytest.fixture
+def warehouse(tmpdir):
+    return Warehouse(os.path.join(str(tmpdir), 'metrics.db'))
+
+def metric_requests(server):
+    return [path for path in server.app.requests if path.endswith('/fans/count/date')]
+
+def test_second_load_makes_no_calls(server, client, warehouse):
+    api = client(warehouse=warehouse)
+    assert warehouse.load(api, METHOD, PROJECT, '2017-01-01', '2017-03-31', IDS) == 1
+    assert warehouse.load(api, METHOD, PROJECT, '2017-01-01', '2017-03-31', IDS) == 0
+    assert warehouse.load(api, METHOD, PROJECT, '2017-02-01', '2017-04-30', IDS) == 1
+    assert len(metric_requests(server)) == 2
+    assert warehouse.held(METHOD, PROJECT, '1') == warehouse.held(METHOD, PROJECT, '2')
+    assert [(a.isoformat(), b.isoformat()) for a, b in warehouse.held(METHOD, PROJECT, '1')] == [('2017-01-01', '2017-04-30')]
+
+def test_list_responses_are_stored(server, client, warehouse):
+    api  = client(warehouse=warehouse)
+    body = [{'id': '1', 'data': [{'date': '2017-01-01', 'count': 10}, {'date': '2017-01-02', 'count': 12}]}]
+    server.app.push('200 OK', json.dumps(body).encode())
+
+    assert warehouse.load(api, METHOD, PROJECT, '2017-01-01', '2017-01-02', ['1']) == 1
+    assert warehouse.load(api, METHOD, PROJECT, '2017-01-01', '2017-01-02', ['1']) == 0
+    assert len(metric_requests(server)) == 1
+    assert warehouse.query(METHOD, PROJECT) == [('1', 'count', '2017-01-01', 10.0), ('1', 'count', '2017-01-02', 12.0)]
+
+def test_columnar_responses_are_stored(server, client, warehouse):
+    pytest.importorskip('numpy')
+    api    = client(warehouse=warehouse)
+    series = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-01-10', IDS, columnar=True)
+
+    assert series['count'].shape == (2, 10)
+    assert len(warehouse.query(METHOD, PROJECT)) == 20
+
+def test_query_rollups(server, client, warehouse):
+    api    = client(warehouse=warehouse)
+    result = api.get_facebook_fans_count_by_date(PROJECT, '2017-01-01', '2017-02-28', ['1'])
+    counts = [point['count'] for point in result['data'][0]['data']]
+
+    months = warehouse.query(METHOD, PROJECT, ids=['1'], bucket='month', aggregate='last')
+    assert months == [('1', 'count', '2017-01-01', counts[30]), ('1', 'count', '2017-02-01', counts[-1])]
+
+    weeks = warehouse.query(METHOD, PROJECT, '2017-01-01', '2017-01-14', ['1'], bucket=7)
+    assert weeks == [('1', 'count', '2017-01-01', sum(counts[:7])), ('1', 'count', '2017-01-08', sum(counts[7:14]))]